@@ -0,0 +1,30 @@
+# accounts/consumers.py
+"""
+speech_to_sign 비동기 작업 진행 상황 WebSocket
+    ws/speech_jobs/<job_id>/
+접속하면 현재까지의 job 상태를 한 번 보내고, 이후 단계별 부분 결과를 그대로 전달한다.
+접속 중에는 job lease가 유지되고, 모든 접속이 끊기면 폴링이 없는 한 작업이 취소된다.
+"""
+from asgiref.sync import sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from .jobs import job_group, touch_job
+
+
+class SpeechJobConsumer(AsyncJsonWebsocketConsumer):
+    async def connect(self):
+        self.job_id = self.scope["url_route"]["kwargs"]["job_id"]
+        self.group = job_group(self.job_id)
+        await self.channel_layer.group_add(self.group, self.channel_name)
+        await self.accept()
+
+        job = await sync_to_async(touch_job)(self.job_id, ws_delta=1)
+        if job:
+            await self.send_json({"job_id": self.job_id, "stage": "snapshot", "data": job})
+
+    async def disconnect(self, code):
+        await self.channel_layer.group_discard(self.group, self.channel_name)
+        await sync_to_async(touch_job)(self.job_id, ws_delta=-1)
+
+    async def job_update(self, event):
+        await self.send_json({k: v for k, v in event.items() if k != "type"})
@@ -0,0 +1,209 @@
+# accounts/jobs.py
+"""
+speech_to_sign 비동기 작업(job) 관리
+
+- POST(async=1) → job_id를 바로 돌려주고, 실제 처리는 백그라운드 스레드 풀에서 실행
+- 단계가 끝날 때마다 부분 결과를 job 상태에 기록하고 Channels 그룹으로도 보냄
+    transcript → tokens → clips → video(최종 결과)
+  → 농인 고객 화면은 영상이 나오기 전에 자막(transcript)부터 보여줄 수 있음
+- 상태 저장: Django cache (signance:job:<id>)
+  여러 프로세스로 띄울 때는 CACHES를 Redis 등 공유 캐시로 설정해야 폴링이 항상 맞는다.
+- 취소 (core.cancellation):
+    같은 세션에서 새 job/요청이 들어오면 이전 job은 "superseded"로 취소
+    lease: 폴링(last_seen)이 JOB_LEASE_SEC 넘게 없고 WebSocket 접속도 없으면 "disconnected"로 취소
+    POST /api/accounts/speech_to_sign/cancel/ {job_id} 로 직접 취소
+
+폴링:    GET /api/accounts/speech_to_sign/jobs/<job_id>/
+WebSocket: ws/speech_jobs/<job_id>/  (그룹명 signance_job_<job_id>)
+"""
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+
+from core.cancellation import Cancelled, CancelToken, release, supersede, use_token
+
+JOB_TTL = 60 * 30  # 30분
+JOB_WORKERS = int(os.getenv("SPEECH_JOB_WORKERS", "2"))
+JOB_LEASE_SEC = float(os.getenv("SPEECH_JOB_LEASE_SEC", "20"))
+
+_POOL = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="speech-job")
+_LOCK = threading.Lock()
+_TOKENS: dict[str, CancelToken] = {}  # job_id → 실행 중인 job의 취소 토큰
+
+
+def job_cache_key(job_id: str) -> str:
+    return f"signance:job:{job_id}"
+
+
+def job_group(job_id: str) -> str:
+    return f"signance_job_{job_id}"
+
+
+def get_job(job_id: str) -> dict | None:
+    return cache.get(job_cache_key(job_id))
+
+
+def _group_send(job_id: str, message: dict):
+    """Channels 그룹으로 전송 (channels/redis가 없거나 꺼져 있으면 조용히 무시)."""
+    try:
+        from asgiref.sync import async_to_sync
+        from channels.layers import get_channel_layer
+
+        layer = get_channel_layer()
+        if layer is None:
+            return
+        async_to_sync(layer.group_send)(job_group(job_id), {"type": "job.update", **message})
+    except Exception as e:
+        print(f"[Job] group_send skipped: {e}")
+
+
+def _update(job_id: str, **fields) -> dict:
+    with _LOCK:
+        job = cache.get(job_cache_key(job_id)) or {"job_id": job_id, "partial": {}}
+        job.update(fields)
+        job["updated_at"] = time.time()
+        cache.set(job_cache_key(job_id), job, timeout=JOB_TTL)
+    return job
+
+
+def touch_job(job_id: str, ws_delta: int = 0) -> dict | None:
+    """
+    클라이언트가 아직 보고 있음을 기록 (폴링마다, WebSocket 접속/종료 시).
+    없는 job이면 None.
+    """
+    with _LOCK:
+        job = cache.get(job_cache_key(job_id))
+        if job is None:
+            return None
+        job["last_seen"] = time.time()
+        job["ws_clients"] = max(0, job.get("ws_clients", 0) + ws_delta)
+        cache.set(job_cache_key(job_id), job, timeout=JOB_TTL)
+    return job
+
+
+def _lease_alive(job_id: str) -> bool:
+    job = cache.get(job_cache_key(job_id))
+    if job is None:
+        return True
+    if job.get("ws_clients", 0) > 0:
+        return True
+    return time.time() - job.get("last_seen", job.get("created_at", 0)) < JOB_LEASE_SEC
+
+
+def cancel_job(job_id: str, reason: str = "client_cancel") -> bool:
+    """실행 중이거나 대기 중인 job 취소. 이미 끝났거나 없는 job이면 False."""
+    token = _TOKENS.get(job_id)
+    return token.cancel(reason) if token is not None else False
+
+
+def publish_stage(job_id: str, stage: str, data: dict):
+    """단계별 부분 결과 기록 + 그룹 전송."""
+    with _LOCK:
+        job = cache.get(job_cache_key(job_id)) or {"job_id": job_id, "partial": {}}
+        job.setdefault("partial", {})[stage] = data
+        job["stage"] = stage
+        job["updated_at"] = time.time()
+        cache.set(job_cache_key(job_id), job, timeout=JOB_TTL)
+    _group_send(job_id, {"job_id": job_id, "stage": stage, "data": data})
+
+
+def _run(job_id: str, upload: ContentFile, kwargs: dict, token: CancelToken):
+    from core.admission import AdmissionRejected, get_gate
+    from pipelines.service import process_audio_file
+
+    gate = get_gate("speech_to_sign")
+    try:
+        # 풀에서 기다리는 동안 취소(supersede/이탈)됐으면 gate 차례를 기다리지 않고 예약만 반납
+        if token.cancelled:
+            gate.unreserve()
+            token.check("queued")
+        # 동기 요청과 같은 gate를 통과해야 실행 (동시 실행 수 공유)
+        # submit_speech_job에서 예약한 자리로 들어감
+        with use_token(token), gate.admit(reserved=True):
+            token.check("queued")  # gate 대기 중에 취소됐으면 시작하지 않음
+            _update(job_id, status="running", started_at=time.time())
+            result = process_audio_file(
+                upload,
+                on_stage=lambda stage, data: publish_stage(job_id, stage, data),
+                **kwargs,
+            )
+    except AdmissionRejected as e:
+        print(f"[Job] {job_id} rejected: {e}")
+        data = {"error": "busy", "retry_after": e.retry_after}
+        _update(job_id, status="error", **data)
+        _group_send(job_id, {"job_id": job_id, "stage": "error", "data": data})
+        return
+    except Cancelled as e:
+        print(f"[Job] {job_id} cancelled: {e}")
+        data = {"reason": e.reason, "stage": e.stage}
+        _update(job_id, status="cancelled", finished_at=time.time(), **data)
+        _group_send(job_id, {"job_id": job_id, "stage": "cancelled", "data": data})
+        return
+    except Exception as e:
+        print("[Job ERROR]", traceback.format_exc())
+        _update(job_id, status="error", error=str(e))
+        _group_send(job_id, {"job_id": job_id, "stage": "error", "data": {"error": str(e)}})
+        return
+
+    _update(job_id, status="done", result=result, finished_at=time.time())
+    publish_stage(job_id, "video", {
+        "sentence_video_url": result.get("sentence_video_url"),
+        "sentence_video_ready": result.get("sentence_video_ready"),
+        "hls_playlist_url": result.get("hls_playlist_url"),
+        "sentence_vtt_url": result.get("sentence_vtt_url"),
+        "video_sec": result.get("video_sec"),
+    })
+
+
+def submit_speech_job(file_obj, **kwargs) -> str:
+    """
+    업로드 파일을 메모리로 복사해서(요청이 끝나면 임시 업로드 파일이 사라지므로)
+    백그라운드 작업으로 넘기고 job_id 반환.
+    kwargs: process_audio_file 인자 (mode, session_id, output, sentence_file, debug)
+    gate에 자리가 없으면 AdmissionRejected (job을 만들지 않음 → 뷰에서 429)
+    """
+    from core.admission import get_gate
+
+    gate = get_gate("speech_to_sign")
+    gate.reserve()
+    # 예약 뒤 어디서 실패하든 자리를 돌려줌 (안 그러면 gate가 영구히 429)
+    job_id = uuid.uuid4().hex
+    session_id = kwargs.get("session_id")
+    token = None
+    try:
+        upload = ContentFile(file_obj.read(), name=file_obj.name)
+        _update(
+            job_id,
+            status="queued",
+            stage=None,
+            session_id=session_id,
+            mode=kwargs.get("mode"),
+            created_at=time.time(),
+            last_seen=time.time(),
+            ws_clients=0,
+        )
+        # 같은 세션의 이전 job은 여기서 취소됨
+        token = supersede("speech_to_sign", session_id, lease=lambda: _lease_alive(job_id))
+        _TOKENS[job_id] = token
+        _POOL.submit(_run_job, job_id, upload, kwargs, token)
+    except Exception:
+        gate.unreserve()
+        _TOKENS.pop(job_id, None)
+        if token is not None:
+            release("speech_to_sign", session_id, token)
+        raise
+    return job_id
+
+
+def _run_job(job_id: str, upload: ContentFile, kwargs: dict, token: CancelToken):
+    try:
+        _run(job_id, upload, kwargs, token)
+    finally:
+        _TOKENS.pop(job_id, None)
+        release("speech_to_sign", kwargs.get("session_id"), token)
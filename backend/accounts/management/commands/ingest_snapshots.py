@@ -0,0 +1,42 @@
+# backend/accounts/management/commands/ingest_snapshots.py
+"""
+snapshots/api에 쌓인 스냅샷 파일을 SnapshotRecord 테이블로 적재
+
+    python manage.py ingest_snapshots                 # backend/snapshots/api
+    python manage.py ingest_snapshots --dir <폴더> --batch 1000
+
+예전 snapshot_*.json + telemetry가 쓴 snapshots.jsonl(회전된 .gz 포함)을 모두 읽는다.
+이미 들어간 스냅샷(source_key 같음)은 건너뛰므로 여러 번 돌려도 된다.
+"""
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from accounts.models import SnapshotRecord
+from accounts.snapshot_store import ingest, iter_snapshot_files
+
+
+class Command(BaseCommand):
+    help = "snapshots/api 스냅샷 파일을 SnapshotRecord 테이블로 적재"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dir",
+            default=str(Path(settings.BASE_DIR) / "snapshots" / "api"),
+            help="스냅샷 폴더 (기본 backend/snapshots/api)",
+        )
+        parser.add_argument("--batch", type=int, default=500, help="bulk insert 단위 (기본 500)")
+
+    def handle(self, *args, **options):
+        snapshot_dir = Path(options["dir"])
+        if not snapshot_dir.exists():
+            self.stderr.write(f"폴더 없음: {snapshot_dir}")
+            return
+
+        before = SnapshotRecord.objects.count()
+        seen = ingest(iter_snapshot_files(snapshot_dir), batch_size=options["batch"])
+        added = SnapshotRecord.objects.count() - before
+        self.stdout.write(self.style.SUCCESS(
+            f"스냅샷 {seen}건 읽음 → 새로 {added}건 적재 (중복 {seen - added}건 건너뜀)"
+        ))
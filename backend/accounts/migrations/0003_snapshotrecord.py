@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_chatsession_chatmessage_chat_session'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SnapshotRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ts', models.DateTimeField(db_index=True)),
+                ('session_id', models.CharField(blank=True, max_length=100)),
+                ('mode', models.CharField(blank=True, max_length=20)),
+                ('stt_ms', models.FloatField(blank=True, null=True)),
+                ('nlp_ms', models.FloatField(blank=True, null=True)),
+                ('mapping_ms', models.FloatField(blank=True, null=True)),
+                ('synth_ms', models.FloatField(blank=True, null=True)),
+                ('total_ms', models.FloatField(blank=True, null=True)),
+                ('wall_ms', models.FloatField(blank=True, null=True)),
+                ('payload', models.JSONField(default=dict)),
+                ('source_key', models.CharField(max_length=64, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-ts', '-id'],
+                'indexes': [models.Index(fields=['ts', 'id'], name='snapshot_ts_id_idx'), models.Index(fields=['session_id', 'ts'], name='snapshot_session_ts_idx'), models.Index(fields=['mode', 'ts'], name='snapshot_mode_ts_idx')],
+            },
+        ),
+    ]
@@ -78,3 +78,40 @@ class ChatMessage(models.Model):
 
     def __str__(self):
         return f"[{self.session_id}] {self.sender}: {self.text[:20]}"
+
+
+class SnapshotRecord(models.Model):
+    """
+    speech_to_sign API 스냅샷 1건 (snapshots/api 파일을 인덱스 있는 테이블로).
+
+    - ts: 스냅샷 시각 (payload["ts"], 목록/집계 기준)
+    - session_id / mode: 필터용
+    - *_ms: 단계별 지연 (payload["latency_ms"], 집계용 컬럼)
+    - payload: 스냅샷 원본 JSON
+    - source_key: payload 해시 (같은 스냅샷을 두 번 넣지 않게)
+    """
+    ts = models.DateTimeField(db_index=True)
+    session_id = models.CharField(max_length=100, blank=True)
+    mode = models.CharField(max_length=20, blank=True)
+
+    stt_ms = models.FloatField(null=True, blank=True)
+    nlp_ms = models.FloatField(null=True, blank=True)
+    mapping_ms = models.FloatField(null=True, blank=True)
+    synth_ms = models.FloatField(null=True, blank=True)
+    total_ms = models.FloatField(null=True, blank=True)
+    wall_ms = models.FloatField(null=True, blank=True)
+
+    payload = models.JSONField(default=dict)
+    source_key = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-ts", "-id"]
+        indexes = [
+            models.Index(fields=["ts", "id"], name="snapshot_ts_id_idx"),
+            models.Index(fields=["session_id", "ts"], name="snapshot_session_ts_idx"),
+            models.Index(fields=["mode", "ts"], name="snapshot_mode_ts_idx"),
+        ]
+
+    def __str__(self):
+        return f"[스냅샷 {self.ts:%Y%m%d_%H%M%S}] {self.session_id or '-'} / {self.mode or '-'}"
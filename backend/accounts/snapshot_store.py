@@ -0,0 +1,185 @@
+# backend/accounts/snapshot_store.py
+"""
+API 스냅샷 → SnapshotRecord 테이블 적재 + 조회(집계)
+
+snapshots/api에 파일로만 쌓으면 목록/통계를 볼 때마다 파일을 전부 열어야 한다.
+스냅샷을 ts / session_id / mode / 단계별 지연 컬럼(인덱스) + payload(JSON)로 넣어 두고
+목록은 (ts, id) 커서 페이지네이션, 통계는 기간 안의 단계별 평균/p95를 쿼리로 계산한다.
+
+적재 경로:
+- 실시간: core.telemetry "api_snapshots" 스트림 hook (writer 스레드, 요청 경로 밖)
+- 기존 파일: python manage.py ingest_snapshots (snapshot_*.json + snapshots.jsonl / 회전된 .gz)
+같은 스냅샷은 source_key(payload sha256)로 한 번만 들어간다.
+
+환경변수:
+    SNAPSHOT_DB_INGEST  0이면 telemetry hook 적재 안 함 (기본 1)
+"""
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+from collections.abc import Iterator
+from datetime import datetime
+from pathlib import Path
+
+from django.db import close_old_connections
+from django.db.models import Avg, Count
+from django.utils import timezone
+
+from core import telemetry
+from core.idempotency import hash_json
+
+SNAPSHOT_DB_INGEST = os.getenv("SNAPSHOT_DB_INGEST", "1") == "1"
+
+logger = logging.getLogger(__name__)
+
+# 집계 단계 이름 → SnapshotRecord 컬럼
+STAGE_COLUMNS = {
+    "stt": "stt_ms",
+    "nlp": "nlp_ms",
+    "mapping": "mapping_ms",
+    "synth": "synth_ms",
+    "total": "total_ms",
+    "wall": "wall_ms",
+}
+
+
+def parse_ts(value) -> datetime | None:
+    """스냅샷 ts("20251203_214908") 또는 ISO 문자열 → aware datetime."""
+    if not value:
+        return None
+    value = str(value)
+    for parse in (
+        lambda v: datetime.strptime(v[:15], "%Y%m%d_%H%M%S"),
+        datetime.fromisoformat,
+    ):
+        try:
+            dt = parse(value)
+        except ValueError:
+            continue
+        return timezone.make_aware(dt) if timezone.is_naive(dt) else dt
+    return None
+
+
+def _ms(value) -> float | None:
+    try:
+        return None if value is None else float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _sec_to_ms(value) -> float | None:
+    sec = _ms(value)
+    return None if sec is None else round(sec * 1000.0, 1)
+
+
+def record_from_payload(payload: dict):
+    """스냅샷 dict → 저장 전 SnapshotRecord (ts가 없거나 깨졌으면 None)."""
+    from .models import SnapshotRecord
+
+    if not isinstance(payload, dict):
+        return None
+    ts = parse_ts(payload.get("ts") or payload.get("timestamp"))
+    if ts is None:
+        return None
+
+    latency = payload.get("latency_ms") or {}
+    latency_sec = payload.get("latency_sec") or {}
+    total_ms = _sec_to_ms(latency_sec.get("total_sec"))
+    if total_ms is None and latency:
+        total_ms = round(sum(_ms(latency.get(k)) or 0.0 for k in ("stt", "nlp", "mapping", "synth")), 1)
+
+    return SnapshotRecord(
+        ts=ts,
+        session_id=(payload.get("session_id") or "")[:100],
+        mode=(payload.get("mode") or "")[:20],
+        stt_ms=_ms(latency.get("stt")),
+        nlp_ms=_ms(latency.get("nlp")),
+        mapping_ms=_ms(latency.get("mapping")),
+        synth_ms=_ms(latency.get("synth")),
+        total_ms=total_ms,
+        wall_ms=_sec_to_ms(latency_sec.get("wall_sec")),
+        payload=payload,
+        source_key=hash_json(payload),
+    )
+
+
+def ingest(payloads, batch_size: int = 500) -> int:
+    """스냅샷 dict들을 batch_size씩 bulk insert (이미 있는 source_key는 건너뜀). 처리한 건수 반환."""
+    from .models import SnapshotRecord
+
+    n = 0
+    batch = []
+    for payload in payloads:
+        rec = record_from_payload(payload)
+        if rec is None:
+            continue
+        batch.append(rec)
+        if len(batch) >= batch_size:
+            SnapshotRecord.objects.bulk_create(batch, ignore_conflicts=True)
+            n += len(batch)
+            batch = []
+    if batch:
+        SnapshotRecord.objects.bulk_create(batch, ignore_conflicts=True)
+        n += len(batch)
+    return n
+
+
+def ingest_from_sink(records: list[dict]):
+    """core.telemetry "api_snapshots" hook (writer 스레드에서 호출)."""
+    if not SNAPSHOT_DB_INGEST:
+        return
+    close_old_connections()
+    try:
+        ingest(records)
+    finally:
+        close_old_connections()
+
+
+def iter_snapshot_files(snapshot_dir) -> Iterator[dict]:
+    """snapshot_dir의 snapshot_*.json (예전 형식) + *.jsonl (회전된 .gz 포함) 스냅샷."""
+    snapshot_dir = Path(snapshot_dir)
+    if not snapshot_dir.exists():
+        return
+    for p in sorted(snapshot_dir.glob("*.json")):
+        try:
+            with p.open("r", encoding="utf-8") as f:
+                yield json.load(f)
+        except Exception as e:
+            logger.warning("skip snapshot file %s: %s", p.name, e)
+    for p in sorted(snapshot_dir.glob("*.jsonl")):
+        yield from telemetry.iter_jsonl(p)
+
+
+# ----------------------------------------------------------------------
+# 조회
+# ----------------------------------------------------------------------
+def stage_aggregates(qs) -> dict[str, dict]:
+    """
+    qs(기간/세션/모드로 거른 SnapshotRecord) 안의 단계별 {"count", "mean", "p95"} (ms).
+    평균/개수는 한 쿼리, p95는 단계마다 정렬 + OFFSET 한 건 조회.
+    """
+    agg = qs.aggregate(
+        **{f"{stage}_n": Count(col) for stage, col in STAGE_COLUMNS.items()},
+        **{f"{stage}_mean": Avg(col) for stage, col in STAGE_COLUMNS.items()},
+    )
+    out = {}
+    for stage, col in STAGE_COLUMNS.items():
+        n = agg[f"{stage}_n"] or 0
+        p95 = None
+        if n:
+            idx = max(0, math.ceil(0.95 * n) - 1)
+            p95 = (
+                qs.filter(**{f"{col}__isnull": False})
+                .order_by(col)
+                .values_list(col, flat=True)[idx]
+            )
+        mean = agg[f"{stage}_mean"]
+        out[stage] = {
+            "count": n,
+            "mean": round(mean, 1) if mean is not None else None,
+            "p95": round(p95, 1) if p95 is not None else None,
+        }
+    return out
@@ -1,3 +1,170 @@
-from django.test import TestCase
+import threading
+import time
+import uuid
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+from core import idempotency
+from core.admission import AdmissionRejected, Gate, admission_gate
+
+LOCMEM = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+def _wait_until(cond, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not cond():
+        if time.monotonic() >= deadline:
+            raise AssertionError("condition not reached")
+        time.sleep(0.005)
+
+
+class GateTests(SimpleTestCase):
+    def test_reserve_unreserve_accounting(self):
+        gate = Gate("t", concurrency=1, queue=1, max_wait=1.0)
+        gate.reserve()
+        gate.reserve()
+        self.assertEqual(gate.stats()["reserved"], 2)
+        with self.assertRaises(AdmissionRejected):
+            gate.reserve()
+
+        gate.unreserve()
+        self.assertEqual(gate.stats()["reserved"], 1)
+        # 예약된 job은 admit하면서 예약을 slot으로 바꿈
+        with gate.admit(reserved=True):
+            s = gate.stats()
+            self.assertEqual((s["active"], s["reserved"]), (1, 0))
+        s = gate.stats()
+        self.assertEqual((s["active"], s["reserved"], s["waiting"]), (0, 0, 0))
+        self.assertEqual(s["rejected"], 1)
+
+        # unreserve가 음수로 내려가지 않음
+        gate.unreserve()
+        self.assertEqual(gate.stats()["reserved"], 0)
+
+    def test_reserved_counts_against_sync_requests(self):
+        gate = Gate("t", concurrency=1, queue=0, max_wait=1.0)
+        gate.reserve()
+        with self.assertRaises(AdmissionRejected) as cm:
+            with gate.admit():
+                pass
+        self.assertEqual(cm.exception.reason, "queue full")
+
+    def test_queue_full_returns_429_with_retry_after(self):
+        name = f"test_{uuid.uuid4().hex}"
+        holding = threading.Event()
+        done = threading.Event()
+
+        @admission_gate(name)
+        def view(request):
+            holding.set()
+            done.wait(2)
+            return Response({"ok": True})
+
+        factory = APIRequestFactory()
+        with override_settings(ADMISSION_GATES={name: {"concurrency": 1, "queue": 0, "max_wait": 1.0}}):
+            t = threading.Thread(target=view, args=(factory.post("/x"),))
+            t.start()
+            try:
+                self.assertTrue(holding.wait(2))
+                resp = view(factory.post("/x"))
+            finally:
+                done.set()
+                t.join(2)
+
+        self.assertEqual(resp.status_code, 429)
+        self.assertGreaterEqual(int(resp["Retry-After"]), 1)
+        self.assertEqual(resp.data["reason"], "queue full")
+
+    def test_wait_timeout_leaves_waiters_clean(self):
+        gate = Gate("t", concurrency=1, queue=2, max_wait=0.05)
+        with gate.admit():
+            with self.assertRaises(AdmissionRejected) as cm:
+                with gate.admit():
+                    pass
+            self.assertEqual(cm.exception.reason, "wait timeout")
+            self.assertEqual(len(gate._waiters), 0)
+        s = gate.stats()
+        self.assertEqual((s["active"], s["waiting"], s["timed_out"]), (0, 0, 1))
+        # 타임아웃 뒤에도 다음 요청은 바로 들어감
+        with gate.admit():
+            self.assertEqual(gate.stats()["active"], 1)
+
+
+@override_settings(CACHES=LOCMEM)
+class RunOnceTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_joined_callers_get_owner_exception(self):
+        key = f"test:{uuid.uuid4().hex}"
+        go = threading.Event()
+        boom = ValueError("boom")
+        calls = []
+        errors = []
+
+        def fn():
+            calls.append(1)
+            go.wait(2)
+            raise boom
+
+        def call():
+            try:
+                idempotency.run_once(key, fn)
+            except BaseException as e:
+                errors.append(e)
+
+        joined0 = idempotency.stats()["joined"]
+        owner = threading.Thread(target=call)
+        owner.start()
+        _wait_until(lambda: calls)
+        joiners = [threading.Thread(target=call) for _ in range(3)]
+        for t in joiners:
+            t.start()
+        _wait_until(lambda: idempotency.stats()["joined"] - joined0 == 3)
+        go.set()
+        for t in [owner, *joiners]:
+            t.join(2)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(errors), 4)
+        self.assertTrue(all(e is boom for e in errors))
+        self.assertIsNone(cache.get(key))
+        self.assertNotIn(key, idempotency._INFLIGHT)
+
+    def _view(self, status: int):
+        calls = []
+
+        @api_view(["POST"])
+        @idempotency.idempotent("test", body_hash=lambda request: None)
+        def view(request):
+            calls.append(1)
+            return Response({"n": len(calls)}, status=status)
+
+        return view, calls
+
+    def _post(self, view, key: str):
+        factory = APIRequestFactory()
+        return view(factory.post("/x", {"session_id": "s"}, format="json", HTTP_IDEMPOTENCY_KEY=key))
+
+    def test_non_2xx_is_not_stored(self):
+        view, calls = self._view(500)
+        key = uuid.uuid4().hex
+        first = self._post(view, key)
+        second = self._post(view, key)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual((first.status_code, second.status_code), (500, 500))
+        self.assertEqual(second["Idempotency-Status"], "fresh")
+
+    def test_2xx_is_replayed(self):
+        view, calls = self._view(200)
+        key = uuid.uuid4().hex
+        self._post(view, key)
+        second = self._post(view, key)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second["Idempotency-Status"], "replay")
+        self.assertEqual(second.data, {"n": 1})
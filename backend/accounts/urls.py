@@ -7,6 +7,8 @@ urlpatterns = [
     path("login/", views.login, name="login"),
 
     path("speech_to_sign/", views.speech_to_sign, name="speech_to_sign"),
+    path("speech_to_sign/jobs/<str:job_id>/", views.speech_job_status, name="speech_job_status"),
+    path("speech_to_sign/cancel/", views.speech_to_sign_cancel, name="speech_to_sign_cancel"),
     # path("speech_logs/", views.speech_logs, name="speech_logs"),
 
     path("profile/update/", views.update_profile, name="profile_update"),
@@ -1,4 +1,5 @@
 import json
+import logging
 import traceback
 import subprocess
 from pathlib import Path
@@ -21,9 +22,16 @@ from rest_framework.response import Response
 from rest_framework import status
 
 from pipelines.service import process_audio_file
+from core.admission import AdmissionRejected, get_gate, rejected_response
+from core.cancellation import Cancelled, cancel_session, release, supersede, use_token
+from core.idempotency import hash_upload, idempotent
+from core.tracing import span
+from .jobs import cancel_job, submit_speech_job, touch_job
 from pipelines.pipeline import append_normalization_rule 
 from .models import ChatMessage, CustomerProfile, ChatSession
 
+logger = logging.getLogger(__name__)
+
 def get_or_create_session(request, session_id: str) -> ChatSession:
     """
     - session_id로 ChatSession을 찾고, 없으면 생성한다.
@@ -191,22 +199,20 @@ def login(request):
     except Exception:
         raw_body = ""
 
-    print("====== [DEBUG /login] ======")
-    print(f"CONTENT_TYPE = {content_type}")
-    print(f"raw body    = {repr(raw_body)}")
+    # 본문/파싱 결과에는 비밀번호가 들어 있으므로 로그에 남기지 않음
+    logger.debug("login request", extra={"content_type": content_type, "body_len": len(raw_body)})
 
     data = {}
 
     if raw_body:
         try:
             data = json.loads(raw_body)
-            print(f"[login] parsed JSON = {data}")
         except Exception as e:
-            print(f"[login] JSON decode error: {e}")
+            logger.info("login JSON decode error: %s", e)
 
     if not data:
         data = request.POST.dict()
-        print(f"[login] fallback POST data = {data}")
+        logger.debug("login fallback to POST form data")
 
     username = (
         data.get("username")
@@ -217,7 +223,7 @@ def login(request):
     )
     password = data.get("password") or data.get("pw") or data.get("pass")
 
-    print(f"[login] username = {username!r}, password 존재 여부 = {bool(password)}")
+    logger.debug("login attempt", extra={"username": username, "has_password": bool(password)})
 
     if not username or not password:
         return JsonResponse(
@@ -228,11 +234,11 @@ def login(request):
     user = authenticate(request, username=username, password=password)
 
     if user is None:
-        print("[login] authenticate 실패")
+        logger.info("login failed", extra={"username": username})
         return JsonResponse({"error": "아이디 또는 비밀번호가 올바르지 않습니다."}, status=400)
 
     auth_login(request, user)
-    print(f"[login] 로그인 성공: user_id={user.id}")
+    logger.info("login ok", extra={"user_id": user.id})
 
     return JsonResponse(
         {
@@ -246,14 +252,29 @@ def login(request):
 # ----------------------
 # STT → NLP → Sign 파이프라인
 # ----------------------
+def _audio_hash(request):
+    f = request.FILES.get("audio")
+    if not f:
+        return None
+    # 동기/비동기 응답 형식이 다르므로 async 여부도 키에 포함
+    is_async = str(request.data.get("async", "0")).lower() in ("1", "true", "yes")
+    return f"{hash_upload(f)}:{'async' if is_async else 'sync'}"
+
+
 @api_view(["POST"])
 @parser_classes([MultiPartParser, FormParser])
+@idempotent("speech_to_sign", _audio_hash)  # 재시도 중복 제거 (supersede보다 먼저 → 재시도가 원 요청을 취소하지 않음)
 def speech_to_sign(request):
     try:
         file_obj = request.FILES.get("audio")
         mode = request.data.get("mode") or ""
         session_id = request.data.get("session_id") or ""
         ts = request.data.get("ts")
+        # output=hls 이면 서버 concat 대신 m3u8 재생목록으로 응답
+        output = (request.data.get("output") or "mp4").lower()
+        sentence_file = str(request.data.get("sentence_file", "0")).lower() in ("1", "true", "yes")
+        # debug=1 이면 이 요청만 원문/토큰별 매핑/경로 목록 로그를 남김
+        debug = str(request.data.get("debug", "0")).lower() in ("1", "true", "yes")
 
         if not ts:
             ts = datetime.now().isoformat()
@@ -261,15 +282,65 @@ def speech_to_sign(request):
         if not file_obj:
             return Response({"error": "audio 파일 없음"}, status=400)
 
-        print(f"[speech_to_sign] uploaded size = {file_obj.size} bytes")
-        print(f"[speech_to_sign] mode={mode}, session_id={session_id}, ts={ts}")
-
-        result = process_audio_file(
-            django_file=file_obj,
-            mode=mode,
-            session_id=session_id,
+        logger.info(
+            "speech_to_sign request",
+            extra={"size": file_obj.size, "mode": mode, "session_id": session_id, "client_ts": ts},
         )
 
+        # 동시 처리 제한 (settings.ADMISSION_GATES["speech_to_sign"])
+        gate = get_gate("speech_to_sign")
+
+        # async=1 이면 job_id만 바로 돌려주고 단계별 결과는 폴링/WebSocket으로 전달
+        # (제출할 때 gate 자리를 예약하고 job 안에서 그 자리로 통과, 자리가 없으면 바로 429)
+        if str(request.data.get("async", "0")).lower() in ("1", "true", "yes"):
+            try:
+                job_id = submit_speech_job(
+                    file_obj,
+                    mode=mode,
+                    session_id=session_id,
+                    output=output,
+                    sentence_file=sentence_file or output != "hls",
+                    debug=debug,
+                )
+            except AdmissionRejected as e:
+                return rejected_response(e)
+            return Response(
+                {
+                    "job_id": job_id,
+                    "status": "queued",
+                    "poll_url": f"/api/accounts/speech_to_sign/jobs/{job_id}/",
+                    "ws_url": f"/ws/speech_jobs/{job_id}/",
+                    "timestamp": ts,
+                    "session_id": session_id,
+                    "mode": mode,
+                },
+                status=202,
+            )
+
+        # 같은 세션에서 새 요청이 오면 이 요청은 취소됨 (단계 사이 확인 + ffmpeg kill)
+        token = supersede("speech_to_sign", session_id)
+        try:
+            with span("request.speech_to_sign"), use_token(token), gate.admit():
+                result = process_audio_file(
+                    django_file=file_obj,
+                    mode=mode,
+                    session_id=session_id,
+                    output=output,
+                    sentence_file=sentence_file or output != "hls",
+                    debug=debug,
+                )
+        except AdmissionRejected as e:
+            return rejected_response(e)
+        except Cancelled as e:
+            logger.info("speech_to_sign cancelled: %s", e)
+            return _cancelled_response(e.reason, e.stage)
+        finally:
+            release("speech_to_sign", session_id, token)
+
+        # 처리 직후에 더 새 요청이 들어왔으면 옛 결과로 캐시를 덮어쓰지 않음
+        if token.cancelled:
+            return _cancelled_response(token.reason, "result")
+
         if isinstance(result, dict):
             result.setdefault("timestamp", ts)
             result.setdefault("session_id", session_id)
@@ -280,20 +351,56 @@ def speech_to_sign(request):
                 cache_key = f"signance:last_result:{session_id}"
                 try:
                     cache.set(cache_key, result, timeout=60 * 60)  # 1시간 캐시
-                    print(f"[cache] saved latest sign result: {cache_key}")
+                    logger.debug("saved latest sign result", extra={"cache_key": cache_key})
                 except Exception as e:
-                    print("[cache] save error:", e)
+                    logger.warning("latest result cache save error: %s", e)
 
         return Response(result, status=200)
 
     except Exception as e:
-        print("[speech_to_sign ERROR]", traceback.format_exc())
+        logger.exception("speech_to_sign error")
         return Response(
             {"error": "서버 내부 오류", "detail": str(e)},
             status=500,
         )
 
 
+def _cancelled_response(reason, stage=None):
+    return Response({"cancelled": True, "reason": reason, "stage": stage}, status=409)
+
+
+@api_view(["POST"])
+def speech_to_sign_cancel(request):
+    """
+    진행 중인 speech_to_sign 취소.
+    body: job_id (비동기 작업) 또는 session_id (그 세션에서 진행 중인 동기 요청)
+    """
+    job_id = request.data.get("job_id")
+    session_id = request.data.get("session_id")
+    if job_id:
+        ok = cancel_job(job_id)
+    elif session_id:
+        ok = cancel_session("speech_to_sign", session_id)
+    else:
+        return Response({"error": "job_id 또는 session_id 필요"}, status=400)
+    return Response({"cancelled": ok}, status=200)
+
+
+@api_view(["GET"])
+def speech_job_status(request, job_id):
+    """
+    비동기 speech_to_sign 작업 상태 조회.
+    폴링할 때마다 lease가 갱신됨 (폴링도 WebSocket도 끊기면 작업 취소, accounts.jobs 참고).
+    status: queued / running / done / error / cancelled
+    partial: 지금까지 끝난 단계의 부분 결과 (transcript, tokens, clips, video)
+    result: status=done일 때 최종 결과 (동기 모드 응답과 동일)
+    """
+    job = touch_job(job_id)
+    if job is None:
+        return Response({"error": "job 없음 (만료되었거나 잘못된 id)"}, status=404)
+    return Response(job, status=200)
+
+
 @api_view(["GET"])
 def session_customer(request):
     """
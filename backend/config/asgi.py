@@ -9,13 +9,18 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 
 import os
 from django.core.asgi import get_asgi_application
-from channels.routing import ProtocolTypeRouter
+from django.urls import path
+from channels.routing import ProtocolTypeRouter, URLRouter
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 django_asgi_app = get_asgi_application()
 
+from accounts.consumers import SpeechJobConsumer  # noqa: E402  (앱 로딩 후 import)
+
 application = ProtocolTypeRouter({
     "http": django_asgi_app,
-    # "websocket": YourURLRouter,  # 나중에 WS 붙일 때 추가
+    "websocket": URLRouter([
+        path("ws/speech_jobs/<str:job_id>/", SpeechJobConsumer.as_asgi()),
+    ]),
 })
 
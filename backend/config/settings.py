@@ -164,5 +164,60 @@ CHANNEL_LAYERS = {
         "CONFIG": {"hosts": [REDIS_URL]},
     }
 }
+
+# ======================================================
+# ADMISSION CONTROL (core/admission.py)
+# 무거운 엔드포인트 동시 실행 수 / 대기열 길이 / 최대 대기(초)
+# 넘치면 429 + Retry-After
+# ======================================================
+ADMISSION_GATES = {
+    "speech_to_sign": {
+        "concurrency": env.int("ADMISSION_SPEECH_CONCURRENCY", default=2),
+        "queue": env.int("ADMISSION_SPEECH_QUEUE", default=4),
+        "max_wait": env.float("ADMISSION_SPEECH_MAX_WAIT", default=15.0),
+    },
+    "ingest_and_infer": {
+        "concurrency": env.int("ADMISSION_INFER_CONCURRENCY", default=2),
+        "queue": env.int("ADMISSION_INFER_QUEUE", default=8),
+        "max_wait": env.float("ADMISSION_INFER_MAX_WAIT", default=5.0),
+    },
+}
+
+# ======================================================
+# LOGGING (core/log.py)
+# JSON 한 줄 로그, 큐 기반 논블로킹 핸들러(요청 스레드에서 stdout I/O 없음)
+# 모듈별 레벨: LOG_LEVEL_SERVICE / LOG_LEVEL_PIPELINE / LOG_LEVEL_ACCOUNTS / LOG_LEVEL_SIGN
+# 큰 디버그 페이로드(extra sample=True)는 LOG_DEBUG_SAMPLE_RATE 비율만 기록
+# ======================================================
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "json": {"()": "core.log.JsonFormatter"},
+    },
+    "filters": {
+        "sample_debug": {
+            "()": "core.log.SampleFilter",
+            "rate": env.float("LOG_DEBUG_SAMPLE_RATE", default=0.05),
+        },
+    },
+    "handlers": {
+        "async_stdout": {
+            "class": "core.log.NonBlockingHandler",
+            "formatter": "json",
+            "filters": ["sample_debug"],
+            "queue_size": env.int("LOG_QUEUE_SIZE", default=10000),
+        },
+    },
+    "root": {"handlers": ["async_stdout"], "level": env("LOG_LEVEL", default="INFO")},
+    "loggers": {
+        "pipelines.service": {"level": env("LOG_LEVEL_SERVICE", default="INFO")},
+        "pipelines.pipeline": {"level": env("LOG_LEVEL_PIPELINE", default="INFO")},
+        "accounts": {"level": env("LOG_LEVEL_ACCOUNTS", default="INFO")},
+        "sign": {"level": env("LOG_LEVEL_SIGN", default="INFO")},
+        "django": {"level": env("LOG_LEVEL_DJANGO", default="INFO")},
+    },
+}
+
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
@@ -4,6 +4,8 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from pipelines.views_metrics import prometheus_metrics
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("sign.urls")), 
@@ -15,6 +17,9 @@ urlpatterns = [
 
     # ★ 성능 평가 파이프라인 API 추가
     path("api/", include("pipelines.urls")),
+
+    # Prometheus scrape용 (단계별 지연 히스토그램 + 입장 제어/취소/캐시 카운터)
+    path("metrics", prometheus_metrics, name="prometheus-metrics"),
 ]
 
 if settings.DEBUG:
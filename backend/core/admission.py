@@ -0,0 +1,239 @@
+# backend/core/admission.py
+"""
+무거운 파이프라인 엔드포인트용 입장 제어(admission control) + backpressure
+
+Whisper / torch / ffmpeg가 동시에 몰리면 CPU를 나눠 쓰느라 모든 요청이 같이 느려진다.
+엔드포인트마다 Gate를 두고
+- 동시에 실행하는 요청 수를 concurrency개로 제한
+- 넘치는 요청은 최대 queue개까지 FIFO로 대기 (max_wait초까지)
+- 대기열도 꽉 찼거나 max_wait 안에 차례가 안 오면 바로 429 + Retry-After
+→ 과부하에서도 받아들인 요청의 지연(p99)은 대기열 길이만큼으로 묶인다.
+
+설정 (config/settings.py ADMISSION_GATES, 값은 환경변수로 조정):
+    ADMISSION_GATES = {"speech_to_sign": {"concurrency": 2, "queue": 4, "max_wait": 15.0}, ...}
+
+사용:
+    @api_view(["POST"])
+    @admission_gate("ingest_and_infer")
+    def ingest_and_infer(request): ...
+
+    with get_gate("speech_to_sign").admit():
+        ...
+
+비동기 job: 제출할 때 gate.reserve()로 자리를 미리 잡고 (job 스레드 풀 대기열도 gate 용량에 포함)
+    실행할 때 admit(reserved=True)로 그 자리를 씀. 자리가 없으면 제출 단계에서 429.
+
+지표: get_gate(name).stats() / all_stats()
+    active, waiting(대기열 깊이), reserved(제출됐지만 아직 gate에 안 온 job), max_waiting,
+    admitted, rejected, timed_out,
+    wait_ms (p50/p95/p99/max, 최근 WAIT_SAMPLES개)
+"""
+from __future__ import annotations
+
+import functools
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+DEFAULT_GATE = {"concurrency": 2, "queue": 4, "max_wait": 10.0}
+WAIT_SAMPLES = 1000
+
+
+class AdmissionRejected(Exception):
+    """대기열이 꽉 찼거나 max_wait 안에 차례가 오지 않음 → 429."""
+
+    def __init__(self, gate: str, reason: str, retry_after: int):
+        super().__init__(f"{gate}: {reason}")
+        self.gate = gate
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def _percentile(sorted_vals: list[float], q: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    idx = min(len(sorted_vals) - 1, max(0, math.ceil(q * len(sorted_vals)) - 1))
+    return round(sorted_vals[idx], 1)
+
+
+class Gate:
+    def __init__(self, name: str, concurrency: int = 2, queue: int = 4, max_wait: float = 10.0):
+        self.name = name
+        self.concurrency = max(1, int(concurrency))
+        self.queue_size = max(0, int(queue))
+        self.max_wait = float(max_wait)
+
+        self._lock = threading.Lock()
+        self._active = 0
+        self._waiters: deque[threading.Event] = deque()  # FIFO
+        self._reserved = 0  # reserve()로 자리를 잡고 아직 admit 전인 job 수
+
+        # 지표
+        self._admitted = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._max_waiting = 0
+        self._wait_ms: deque[float] = deque(maxlen=WAIT_SAMPLES)
+        self._service_ewma = 1.0  # 요청 1개 처리 시간(초) 추정치 → Retry-After 계산용
+
+    # ------------------------------------------------------------------
+    def _retry_after_locked(self) -> int:
+        """지금 대기열이 다 빠질 때까지 걸릴 시간(초) 추정."""
+        ahead = len(self._waiters) + self._reserved + 1
+        return max(1, min(60, math.ceil(self._service_ewma * ahead / self.concurrency)))
+
+    def retry_after(self) -> int:
+        with self._lock:
+            return self._retry_after_locked()
+
+    def _full_locked(self) -> bool:
+        # 실행 중 + 대기 중 + 예약된 job이 concurrency + queue를 다 채웠는지
+        return self._active + len(self._waiters) + self._reserved >= self.concurrency + self.queue_size
+
+    def reserve(self):
+        """
+        비동기 job 제출 시 자리 예약. 자리가 없으면 AdmissionRejected.
+        (job은 스레드 풀에서 기다리는 동안에도 gate 용량을 차지 → 풀 대기열이 무한히 쌓이지 않음)
+        """
+        with self._lock:
+            if self._full_locked():
+                self._rejected += 1
+                raise AdmissionRejected(self.name, "queue full", self._retry_after_locked())
+            self._reserved += 1
+
+    def unreserve(self):
+        """예약만 하고 admit하지 않고 끝난 job (제출 실패 등)."""
+        with self._lock:
+            self._reserved = max(0, self._reserved - 1)
+
+    def _acquire(self, reserved: bool = False):
+        t0 = time.perf_counter()
+        with self._lock:
+            if reserved:
+                self._reserved = max(0, self._reserved - 1)
+            # 예약된 job은 이미 자리를 받았으므로 대기열 길이로 거절하지 않음
+            # (빈 슬롯이 있어도 예약된 job 몫이면 새 요청은 거절)
+            elif self._full_locked():
+                self._rejected += 1
+                raise AdmissionRejected(self.name, "queue full", self._retry_after_locked())
+            if self._active < self.concurrency and not self._waiters:
+                self._active += 1
+                self._admitted += 1
+                self._wait_ms.append(0.0)
+                return
+            ev = threading.Event()
+            self._waiters.append(ev)
+            self._max_waiting = max(self._max_waiting, len(self._waiters))
+
+        got = ev.wait(self.max_wait)
+        with self._lock:
+            if not got and not ev.is_set():
+                self._waiters.remove(ev)
+                self._timed_out += 1
+                raise AdmissionRejected(self.name, "wait timeout", self._retry_after_locked())
+            # 슬롯은 _release가 넘겨줌 (_active 그대로)
+            self._admitted += 1
+            self._wait_ms.append((time.perf_counter() - t0) * 1000)
+
+    def _release(self, service_sec: float):
+        with self._lock:
+            self._service_ewma = 0.8 * self._service_ewma + 0.2 * service_sec
+            if self._waiters:
+                # 다음 대기자에게 슬롯을 바로 넘김 (FIFO, 새로 온 요청이 새치기하지 않음)
+                self._waiters.popleft().set()
+            else:
+                self._active -= 1
+
+    @contextmanager
+    def admit(self, reserved: bool = False):
+        """차례가 오면 들어가고, 거절되면 AdmissionRejected. reserved=True: reserve()로 잡은 자리 사용."""
+        self._acquire(reserved)
+        t0 = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self._release(time.perf_counter() - t0)
+
+    # ------------------------------------------------------------------
+    def stats(self) -> dict:
+        with self._lock:
+            waits = sorted(self._wait_ms)
+            return {
+                "name": self.name,
+                "concurrency": self.concurrency,
+                "queue": self.queue_size,
+                "max_wait": self.max_wait,
+                "active": self._active,
+                "waiting": len(self._waiters),
+                "reserved": self._reserved,
+                "max_waiting": self._max_waiting,
+                "admitted": self._admitted,
+                "rejected": self._rejected,
+                "timed_out": self._timed_out,
+                "service_sec_ewma": round(self._service_ewma, 3),
+                "wait_ms": {
+                    "p50": _percentile(waits, 0.50),
+                    "p95": _percentile(waits, 0.95),
+                    "p99": _percentile(waits, 0.99),
+                    "max": round(waits[-1], 1) if waits else 0.0,
+                    "count": len(waits),
+                },
+            }
+
+
+_GATES: dict[str, Gate] = {}
+_GATES_LOCK = threading.Lock()
+
+
+def get_gate(name: str) -> Gate:
+    """settings.ADMISSION_GATES[name] 설정으로 Gate 생성 (프로세스당 1개)."""
+    gate = _GATES.get(name)
+    if gate is not None:
+        return gate
+    with _GATES_LOCK:
+        if name not in _GATES:
+            from django.conf import settings
+
+            conf = {**DEFAULT_GATE, **(getattr(settings, "ADMISSION_GATES", {}) or {}).get(name, {})}
+            _GATES[name] = Gate(name, conf["concurrency"], conf["queue"], conf["max_wait"])
+        return _GATES[name]
+
+
+def all_stats() -> list[dict]:
+    return [g.stats() for g in list(_GATES.values())]
+
+
+def rejected_response(e: AdmissionRejected):
+    from rest_framework.response import Response
+
+    print(f"[Admission] reject {e.gate} ({e.reason}), retry_after={e.retry_after}s")
+    return Response(
+        {"ok": False, "error": "서버가 바쁩니다. 잠시 후 다시 시도해 주세요.", "reason": e.reason,
+         "retry_after": e.retry_after},
+        status=429,
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
+def admission_gate(name: str):
+    """
+    DRF 뷰 데코레이터 (@api_view 아래에 붙임).
+    OPTIONS(preflight)는 그대로 통과, 거절되면 429 + Retry-After.
+    """
+
+    def deco(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method == "OPTIONS":
+                return view(request, *args, **kwargs)
+            try:
+                with get_gate(name).admit():
+                    return view(request, *args, **kwargs)
+            except AdmissionRejected as e:
+                return rejected_response(e)
+
+        return wrapper
+
+    return deco
@@ -0,0 +1,230 @@
+# backend/core/cancellation.py
+"""
+협력적 취소(cancellation) 토큰
+
+은행원이 이전 speech_to_sign이 끝나기 전에 다시 녹음하면, 이전 요청의 Whisper/ffmpeg 결과는
+아무도 보지 않는데도 끝까지 돌고 signance:last_result:<session>을 옛 결과로 덮어쓴다.
+
+- CancelToken: 요청(또는 job) 1개당 1개. contextvar로 현재 실행 흐름에 붙여 둠
+  (pipelines.dag 노드는 호출한 스레드의 컨텍스트를 복사해서 실행 → 같은 토큰을 봄)
+- 단계 사이에서 check_cancelled()로 확인 → 취소됐으면 Cancelled 발생
+- run_cancellable(): ffmpeg 같은 서브프로세스를 토큰에 등록, 취소되면 바로 kill
+- supersede(scope, session_id): 같은 세션의 이전 요청 토큰을 "superseded"로 취소하고 새 토큰 발급
+- lease: 토큰에 "클라이언트가 아직 보고 있는지" 함수를 붙이면, False일 때 "disconnected"로 취소
+  (비동기 job은 폴링/WebSocket이 끊기면 lease가 만료됨, accounts.jobs 참고)
+
+지표: stats() → 취소 건수 (사유별/단계별), kill한 프로세스 수
+"""
+from __future__ import annotations
+
+import contextvars
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+
+LEASE_CHECK_INTERVAL = 1.0  # lease 함수(캐시 조회 등) 호출 간격(초)
+
+
+class Cancelled(Exception):
+    """토큰이 취소된 뒤 다음 확인 지점에서 발생."""
+
+    def __init__(self, reason: str = "cancelled", stage: str | None = None):
+        super().__init__(f"{reason}" + (f" @ {stage}" if stage else ""))
+        self.reason = reason
+        self.stage = stage
+
+
+_STATS_LOCK = threading.Lock()
+_STATS = {"cancelled": 0, "killed_procs": 0, "by_reason": {}, "by_stage": {}}
+
+
+def _count(key: str, sub: str | None = None, n: int = 1):
+    with _STATS_LOCK:
+        if sub is None:
+            _STATS[key] += n
+        else:
+            _STATS[key][sub] = _STATS[key].get(sub, 0) + n
+
+
+def stats() -> dict:
+    with _STATS_LOCK:
+        return {
+            "cancelled": _STATS["cancelled"],
+            "killed_procs": _STATS["killed_procs"],
+            "by_reason": dict(_STATS["by_reason"]),
+            "by_stage": dict(_STATS["by_stage"]),
+        }
+
+
+class CancelToken:
+    def __init__(self, name: str = "", lease=None):
+        self.name = name
+        self.reason: str | None = None
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._procs: set[subprocess.Popen] = set()
+        self._lease = lease          # () -> bool, False면 클라이언트가 떠난 것
+        self._lease_checked = 0.0
+        self._counted_stage = False
+
+    # ------------------------------------------------------------------
+    def cancel(self, reason: str = "cancelled") -> bool:
+        """취소 + 등록된 서브프로세스 kill. 이미 취소됐으면 False."""
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self.reason = reason
+            self._event.set()
+            procs = list(self._procs)
+        _count("cancelled")
+        _count("by_reason", reason)
+        for p in procs:
+            _kill(p)
+        print(f"[Cancel] {self.name or 'token'} cancelled: {reason} (killed {len(procs)} proc)")
+        return True
+
+    @property
+    def cancelled(self) -> bool:
+        if self._event.is_set():
+            return True
+        if self._lease is not None:
+            now = time.monotonic()
+            if now - self._lease_checked >= LEASE_CHECK_INTERVAL:
+                self._lease_checked = now
+                try:
+                    alive = self._lease()
+                except Exception:
+                    alive = True
+                if not alive:
+                    self.cancel("disconnected")
+                    return True
+        return False
+
+    def check(self, stage: str | None = None):
+        if self.cancelled:
+            # 처음 걸린 단계만 단계별 지표에 기록
+            with self._lock:
+                first = not self._counted_stage
+                self._counted_stage = True
+            if first:
+                _count("by_stage", stage or "unknown")
+            raise Cancelled(self.reason or "cancelled", stage)
+
+    # ------------------------------------------------------------------
+    def register(self, proc: subprocess.Popen):
+        with self._lock:
+            self._procs.add(proc)
+            cancelled = self._event.is_set()
+        if cancelled:
+            _kill(proc)
+
+    def unregister(self, proc: subprocess.Popen):
+        with self._lock:
+            self._procs.discard(proc)
+
+
+def _kill(proc: subprocess.Popen):
+    if proc.poll() is None:
+        try:
+            proc.kill()
+            _count("killed_procs")
+        except OSError:
+            pass
+
+
+# ----------------------------------------------------------------------
+# 현재 실행 흐름의 토큰 (contextvar)
+# ----------------------------------------------------------------------
+_CURRENT: contextvars.ContextVar[CancelToken | None] = contextvars.ContextVar("cancel_token", default=None)
+
+
+def current_token() -> CancelToken | None:
+    return _CURRENT.get()
+
+
+@contextmanager
+def use_token(token: CancelToken | None):
+    reset = _CURRENT.set(token)
+    try:
+        yield token
+    finally:
+        _CURRENT.reset(reset)
+
+
+def check_cancelled(stage: str | None = None):
+    """현재 토큰이 취소됐으면 Cancelled (토큰이 없으면 아무것도 안 함)."""
+    token = _CURRENT.get()
+    if token is not None:
+        token.check(stage)
+
+
+def run_cancellable(cmd, check: bool = True, poll: float = 0.2, **popen_kwargs) -> subprocess.CompletedProcess:
+    """
+    subprocess.run 대신 사용. 현재 토큰이 취소되면 프로세스를 kill하고 Cancelled.
+    (stdout/stderr를 PIPE로 받으면 communicate로 읽으므로 버퍼가 막히지 않음)
+    """
+    token = _CURRENT.get()
+    if token is None:
+        return subprocess.run(cmd, check=check, **popen_kwargs)
+
+    token.check("subprocess")
+    proc = subprocess.Popen(cmd, **popen_kwargs)
+    token.register(proc)
+    try:
+        while True:
+            try:
+                out, err = proc.communicate(timeout=poll)
+                break
+            except subprocess.TimeoutExpired:
+                if token.cancelled:
+                    _kill(proc)
+                    proc.communicate()
+                    token.check("subprocess")
+    finally:
+        token.unregister(proc)
+
+    if token.cancelled:
+        token.check("subprocess")
+    if check and proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, cmd, out, err)
+    return subprocess.CompletedProcess(cmd, proc.returncode, out, err)
+
+
+# ----------------------------------------------------------------------
+# 세션별 최신 요청 (supersession)
+# ----------------------------------------------------------------------
+_ACTIVE_LOCK = threading.Lock()
+_ACTIVE: dict[tuple[str, str], CancelToken] = {}
+
+
+def supersede(scope: str, session_id: str | None, lease=None) -> CancelToken:
+    """
+    (scope, session_id)의 새 토큰 발급. 같은 세션에서 진행 중이던 이전 요청은 "superseded"로 취소.
+    session_id가 없으면 다른 요청과 엮지 않은 토큰만 돌려줌.
+    """
+    token = CancelToken(f"{scope}:{session_id or '-'}", lease=lease)
+    if not session_id:
+        return token
+    with _ACTIVE_LOCK:
+        prev = _ACTIVE.get((scope, session_id))
+        _ACTIVE[(scope, session_id)] = token
+    if prev is not None:
+        prev.cancel("superseded")
+    return token
+
+
+def release(scope: str, session_id: str | None, token: CancelToken):
+    """요청이 끝나면 호출 (그 사이 더 새 요청이 등록됐으면 그대로 둠)."""
+    if not session_id:
+        return
+    with _ACTIVE_LOCK:
+        if _ACTIVE.get((scope, session_id)) is token:
+            del _ACTIVE[(scope, session_id)]
+
+
+def cancel_session(scope: str, session_id: str, reason: str = "client_cancel") -> bool:
+    """세션에서 진행 중인 요청 취소 (취소 API용). 진행 중인 요청이 없으면 False."""
+    with _ACTIVE_LOCK:
+        token = _ACTIVE.get((scope, session_id))
+    return token.cancel(reason) if token is not None else False
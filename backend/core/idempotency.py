@@ -0,0 +1,174 @@
+# backend/core/idempotency.py
+"""
+재시도 요청 중복 제거 (idempotency)
+
+프론트가 타임아웃 후 같은 오디오/프레임을 다시 보내면 파이프라인 전체가 다시 돌고
+스냅샷/문장 영상도 중복으로 생긴다. 요청마다 키를 정해서
+- 같은 키의 요청이 이미 끝났으면 저장된 응답을 그대로 돌려줌 (replay)
+- 같은 키의 요청이 아직 처리 중이면 그 결과를 기다렸다가 같이 돌려줌 (joined)
+- 처음 보는 키면 실행하고, 2xx 응답만 IDEMPOTENCY_WINDOW_SEC 동안 캐시에 저장
+
+키:
+    Idempotency-Key 헤더가 있으면 (엔드포인트, session_id, 헤더 값)
+    없으면 (엔드포인트, session_id, 본문 해시) - 오디오 바이트 sha256 / frames JSON sha256
+
+저장: Django cache (signance:idem:...), 처리 중 합류는 프로세스 안(threading.Event)에서만.
+여러 프로세스로 띄우면 끝난 요청 replay는 공유 캐시(Redis 등)로 되지만
+동시에 다른 프로세스로 들어온 재시도는 각자 실행된다.
+
+응답 헤더 Idempotency-Status: fresh / replay / joined
+
+환경변수:
+    IDEMPOTENCY_WINDOW_SEC   저장/중복 판정 기간 (기본 300초)
+    IDEMPOTENCY_JOIN_TIMEOUT 처리 중인 요청을 기다리는 최대 시간 (기본 120초)
+"""
+from __future__ import annotations
+
+import functools
+import hashlib
+import json
+import logging
+import os
+import threading
+
+WINDOW_SEC = int(os.getenv("IDEMPOTENCY_WINDOW_SEC", "300"))
+JOIN_TIMEOUT = float(os.getenv("IDEMPOTENCY_JOIN_TIMEOUT", "120"))
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error: BaseException | None = None
+
+
+_INFLIGHT: dict[str, _Flight] = {}
+_LOCK = threading.Lock()
+_STATS = {"fresh": 0, "replay": 0, "joined": 0}
+
+
+def stats() -> dict:
+    with _LOCK:
+        return {**_STATS, "inflight": len(_INFLIGHT)}
+
+
+def hash_upload(file_obj) -> str:
+    """업로드 파일 내용 sha256 (다 읽은 뒤 처음으로 되감음)."""
+    h = hashlib.sha256()
+    for chunk in file_obj.chunks():
+        h.update(chunk)
+    file_obj.seek(0)
+    return h.hexdigest()
+
+
+def hash_json(obj) -> str:
+    blob = json.dumps(obj, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def request_key(scope: str, session_id: str | None, idem_key: str | None = None, body_hash: str | None = None) -> str | None:
+    """캐시 키. 헤더 키도 본문 해시도 없으면 None (중복 제거 안 함)."""
+    sid = session_id or "-"
+    if idem_key:
+        digest = hashlib.sha1(idem_key.encode("utf-8")).hexdigest()
+        return f"signance:idem:{scope}:{sid}:k:{digest}"
+    if body_hash:
+        return f"signance:idem:{scope}:{sid}:h:{body_hash}"
+    return None
+
+
+def run_once(key: str, fn, storable=lambda value: True):
+    """
+    key로 fn()을 한 번만 실행.
+    반환: (값, "fresh" | "replay" | "joined")
+    fn이 예외를 내면 기다리던 요청에도 같은 예외가 전달되고 저장하지 않음.
+    """
+    from django.core.cache import cache
+
+    stored = cache.get(key)
+    if stored is not None:
+        with _LOCK:
+            _STATS["replay"] += 1
+        return stored, "replay"
+
+    with _LOCK:
+        flight = _INFLIGHT.get(key)
+        owner = flight is None
+        if owner:
+            flight = _INFLIGHT[key] = _Flight()
+        _STATS["fresh" if owner else "joined"] += 1
+
+    if not owner:
+        if not flight.event.wait(JOIN_TIMEOUT):
+            raise TimeoutError(f"idempotency join timeout: {key}")
+        if flight.error is not None:
+            raise flight.error
+        return flight.value, "joined"
+
+    try:
+        flight.value = fn()
+        if storable(flight.value):
+            try:
+                cache.set(key, flight.value, timeout=WINDOW_SEC)
+            except Exception as e:
+                logger.warning("cache save error for %s: %s", key, e)
+        return flight.value, "fresh"
+    except BaseException as e:
+        flight.error = e
+        raise
+    finally:
+        with _LOCK:
+            _INFLIGHT.pop(key, None)
+        flight.event.set()
+
+
+def idempotent(scope: str, body_hash):
+    """
+    DRF 뷰 데코레이터 (@api_view 아래, admission_gate보다 위에 붙임 → replay/합류는 슬롯을 쓰지 않음).
+    body_hash(request) -> str | None : 헤더가 없을 때 쓸 본문 해시
+    2xx 응답만 저장, 응답 헤더 Idempotency-Status로 fresh/replay/joined 표시.
+    """
+
+    def deco(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            from rest_framework.response import Response
+
+            if request.method != "POST":
+                return view(request, *args, **kwargs)
+
+            idem_key = request.headers.get("Idempotency-Key")
+            try:
+                key = request_key(
+                    scope,
+                    request.data.get("session_id"),
+                    idem_key=idem_key,
+                    body_hash=None if idem_key else body_hash(request),
+                )
+            except Exception as e:
+                logger.warning("key error (%s): %s", scope, e)
+                key = None
+            if key is None:
+                return view(request, *args, **kwargs)
+
+            def call():
+                resp = view(request, *args, **kwargs)
+                headers = {"Retry-After": resp["Retry-After"]} if resp.has_header("Retry-After") else {}
+                return {"data": resp.data, "status": resp.status_code, "headers": headers}
+
+            value, how = run_once(key, call, storable=lambda v: 200 <= v["status"] < 300)
+            if how != "fresh":
+                logger.info("idempotent %s", how, extra={"scope": scope, "key": key})
+            return Response(
+                value["data"],
+                status=value["status"],
+                headers={**value["headers"], "Idempotency-Status": how},
+            )
+
+        return wrapper
+
+    return deco
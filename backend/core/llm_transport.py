@@ -0,0 +1,239 @@
+# backend/core/llm_transport.py
+"""
+Gemini 호출용 교체 가능한 transport (live / record / replay)
+
+- live   : 지금처럼 실제 Gemini 호출 (기본값, 오버헤드 없음)
+- record : 실제 호출 결과를 cassette(JSON 파일)로 디스크에 저장
+- replay : API 키/네트워크 없이 cassette에서 응답을 꺼내 돌려줌
+           지연(latency)과 에러율을 주입할 수 있어서 부하/지연 벤치마크에 사용
+count_tokens()도 record에서 녹화하고 replay에서 꺼내 준다 (bench_prompt용, 지연/에러 주입 없음)
+
+환경변수:
+    LLM_TRANSPORT            live | record | replay
+    LLM_CASSETTE_DIR         cassette 저장 폴더 (기본: backend/outputs/cassettes)
+    LLM_REPLAY_LATENCY_MS    "recorded"(기본, 녹화 당시 지연) | "800" | "500-1500"
+    LLM_REPLAY_ERROR_RATE    0.0 ~ 1.0, 이 확률로 InjectedLLMError 발생
+    LLM_REPLAY_SEED          난수 시드 (재현 가능한 벤치마크용)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_CASSETTE_DIR = BACKEND_DIR / "outputs" / "cassettes"
+
+
+class CassetteMiss(RuntimeError):
+    """replay 모드에서 녹화된 응답이 없을 때."""
+
+
+class InjectedLLMError(RuntimeError):
+    """replay 모드에서 LLM_REPLAY_ERROR_RATE로 주입한 가짜 장애."""
+
+
+class CassetteResponse:
+    """genai 응답 객체 대신 돌려주는 최소 응답 (.text만 사용)."""
+
+    def __init__(self, text: str, usage: dict | None = None):
+        self.text = text
+        self.usage_metadata = usage
+
+
+class CassetteTokenCount:
+    """count_tokens() 응답 대신 돌려주는 최소 객체 (.total_tokens만 사용)."""
+
+    def __init__(self, total_tokens: int):
+        self.total_tokens = total_tokens
+
+
+def _request_key(model: str, system: str | None, contents) -> str:
+    blob = json.dumps(
+        {"model": model, "system": system or "", "contents": contents},
+        ensure_ascii=False,
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+
+def _parse_latency(spec: str):
+    spec = (spec or "recorded").strip().lower()
+    if spec == "recorded":
+        return None
+    if "-" in spec:
+        lo, hi = spec.split("-", 1)
+        return float(lo), float(hi)
+    return float(spec), float(spec)
+
+
+class LLMTransport:
+    def __init__(
+        self,
+        mode: str = "live",
+        cassette_dir: Path | str = DEFAULT_CASSETTE_DIR,
+        latency_ms: str = "recorded",
+        error_rate: float = 0.0,
+        seed: int | None = None,
+    ):
+        mode = (mode or "live").strip().lower()
+        if mode not in ("live", "record", "replay"):
+            raise ValueError(f"알 수 없는 LLM_TRANSPORT 모드: {mode}")
+        self.mode = mode
+        self.cassette_dir = Path(cassette_dir)
+        self.latency = _parse_latency(latency_ms)
+        self.error_rate = float(error_rate or 0.0)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "LLMTransport":
+        seed = os.getenv("LLM_REPLAY_SEED")
+        return cls(
+            mode=os.getenv("LLM_TRANSPORT", "live"),
+            cassette_dir=os.getenv("LLM_CASSETTE_DIR") or DEFAULT_CASSETTE_DIR,
+            latency_ms=os.getenv("LLM_REPLAY_LATENCY_MS", "recorded"),
+            error_rate=float(os.getenv("LLM_REPLAY_ERROR_RATE", "0") or 0),
+            seed=int(seed) if seed else None,
+        )
+
+    @property
+    def offline(self) -> bool:
+        """replay 모드면 API 키 없이도 동작."""
+        return self.mode == "replay"
+
+    # ------------------------------------------------------------------
+    def _path(self, key: str) -> Path:
+        return self.cassette_dir / key[:2] / f"{key}.json"
+
+    def _save(self, key: str, model: str, contents, text: str, latency_ms: float, **extra):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "model": model,
+            "contents": contents,
+            "text": text,
+            "latency_ms": round(latency_ms, 1),
+            "recorded_at": datetime.now().isoformat(timespec="seconds"),
+            **extra,
+        }
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=1, default=str)
+        os.replace(tmp, path)
+
+    def _load(self, key: str) -> dict:
+        path = self._path(key)
+        if not path.exists():
+            raise CassetteMiss(f"녹화된 응답 없음: {path}")
+        with path.open("r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _replay(self, key: str) -> CassetteResponse:
+        data = self._load(key)
+
+        with self._lock:
+            if self.latency is None:
+                delay_ms = float(data.get("latency_ms") or 0.0)
+            else:
+                delay_ms = self._rng.uniform(*self.latency)
+            fail = self._rng.random() < self.error_rate
+
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000.0)
+        if fail:
+            raise InjectedLLMError("replay 주입 에러 (LLM_REPLAY_ERROR_RATE)")
+        return CassetteResponse(data.get("text") or "")
+
+    def generate(self, model: str, system: str | None, contents, call):
+        """
+        call: 실제 Gemini를 호출하는 0-인자 함수 (live/record에서만 실행)
+        """
+        if self.mode == "live":
+            return call()
+
+        key = _request_key(model, system, contents)
+        if self.mode == "replay":
+            return self._replay(key)
+
+        t0 = time.perf_counter()
+        resp = call()
+        latency_ms = (time.perf_counter() - t0) * 1000.0
+        try:
+            self._save(key, model, contents, getattr(resp, "text", "") or "", latency_ms)
+        except Exception as e:
+            print(f"[LLMTransport] cassette 저장 실패: {e}")
+        return resp
+
+    def count_tokens(self, model: str, system: str | None, contents, call):
+        """
+        call: 실제 count_tokens를 호출하는 0-인자 함수 (live/record에서만 실행)
+        cassette 키는 generate와 겹치지 않게 모델명 뒤에 "#count_tokens"를 붙임
+        """
+        if self.mode == "live":
+            return call()
+
+        key = _request_key(f"{model}#count_tokens", system, contents)
+        if self.mode == "replay":
+            return CassetteTokenCount(int(self._load(key).get("total_tokens") or 0))
+
+        resp = call()
+        try:
+            self._save(key, model, contents, "", 0.0, total_tokens=int(resp.total_tokens))
+        except Exception as e:
+            print(f"[LLMTransport] cassette 저장 실패: {e}")
+        return resp
+
+
+class TransportModel:
+    """
+    genai.GenerativeModel 자리에 끼우는 래퍼.
+    generate_content() / count_tokens()는 transport를 거치고, 나머지 속성은 실제 모델로 넘긴다.
+    replay 모드에서는 실제 모델을 만들지 않는다.
+    """
+
+    def __init__(self, transport: LLMTransport, model_name: str, system: str | None, factory):
+        self._transport = transport
+        self.model_name = model_name
+        self.system_instruction = system
+        self._model = None if transport.offline else factory()
+
+    def generate_content(self, contents, **kwargs):
+        return self._transport.generate(
+            self.model_name,
+            self.system_instruction,
+            contents,
+            lambda: self._model.generate_content(contents, **kwargs),
+        )
+
+    def count_tokens(self, contents, **kwargs):
+        return self._transport.count_tokens(
+            self.model_name,
+            self.system_instruction,
+            contents,
+            lambda: self._model.count_tokens(contents, **kwargs),
+        )
+
+    def __getattr__(self, name):
+        model = self.__dict__.get("_model")
+        if model is None:
+            raise AttributeError(name)
+        return getattr(model, name)
+
+
+def wrap_model(model_name: str, system: str | None, factory, transport: LLMTransport | None = None):
+    """live 모드면 실제 모델 그대로, 그 외에는 TransportModel로 감싸서 반환."""
+    transport = transport or TRANSPORT
+    if transport.mode == "live":
+        return factory()
+    return TransportModel(transport, model_name, system, factory)
+
+
+TRANSPORT = LLMTransport.from_env()
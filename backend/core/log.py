@@ -0,0 +1,132 @@
+# backend/core/log.py
+"""
+구조화 로깅 (JSON 한 줄) + 논블로킹 핸들러 + 디버그 페이로드 샘플링
+
+요청마다 print로 큰 repr / 경로 목록 / 디버그 배너를 stdout에 바로 쓰면
+uvicorn 아래에서 stdout 쓰기 + lock 경합이 요청 지연에 그대로 들어간다.
+
+- NonBlockingHandler: emit()은 큐에 넣기만 함 (큐가 꽉 차면 버리고 dropped 카운트)
+  별도 스레드가 모아서 한 번에 쓰고 flush → 요청 스레드는 I/O를 기다리지 않음
+- JsonFormatter: {"ts", "level", "logger", "msg", ...extra} 한 줄
+  logger.info("...", extra={"data": {...}}) 처럼 extra로 넘긴 필드가 그대로 들어감
+- SampleFilter: extra={"sample": True}가 붙은 로그(큰 디버그 페이로드)는 rate 비율만 통과
+
+설정은 config/settings.py LOGGING (모듈별 레벨 LOG_LEVEL_*, 샘플링 LOG_DEBUG_SAMPLE_RATE).
+"""
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+from datetime import datetime
+
+# LogRecord 기본 속성 (나머지는 extra로 들어온 필드)
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "sample"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        out = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for k, v in record.__dict__.items():
+            if k not in _RECORD_ATTRS and not k.startswith("_"):
+                out[k] = v
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        return json.dumps(out, ensure_ascii=False, default=str)
+
+
+class SampleFilter(logging.Filter):
+    """extra={"sample": True}인 로그만 rate 확률로 통과 (나머지는 그대로)."""
+
+    def __init__(self, rate: float = 0.05):
+        super().__init__()
+        self.rate = float(rate)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "sample", False):
+            return random.random() < self.rate
+        return True
+
+
+class NonBlockingHandler(logging.Handler):
+    def __init__(self, queue_size: int = 10000, batch: int = 256, stream=None):
+        super().__init__()
+        self._queue: queue.Queue = queue.Queue(maxsize=int(queue_size))
+        self._batch = int(batch)
+        self._stream = stream or sys.stdout
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._worker, name="log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            # 인자 병합은 호출 시점 값으로 (나중에 객체가 바뀌어도 로그는 그대로)
+            record.msg = record.getMessage()
+            record.args = None
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+        except Exception:
+            self.handleError(record)
+
+    def _write(self, records: list[logging.LogRecord]):
+        lines = []
+        for r in records:
+            try:
+                lines.append(self.format(r))
+            except Exception:
+                self.handleError(r)
+        if lines:
+            try:
+                self._stream.write("\n".join(lines) + "\n")
+                self._stream.flush()
+            except Exception:
+                pass
+
+    def _worker(self):
+        while True:
+            rec = self._queue.get()
+            if rec is None:
+                return
+            records = [rec]
+            while len(records) < self._batch:
+                try:
+                    nxt = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    self._write(records)
+                    return
+                records.append(nxt)
+            self._write(records)
+
+    def close(self):
+        if self._thread.is_alive():
+            try:
+                self._queue.put(None, timeout=1)
+            except queue.Full:
+                pass
+            self._thread.join(timeout=2)
+        super().close()
+
+
+def debug_payload(logger: logging.Logger, msg: str, debug: bool = False, **fields):
+    """
+    큰 디버그 페이로드(원문, 경로 목록 등) 기록.
+    debug=True(요청에서 명시적으로 켬)면 INFO로 항상 기록,
+    아니면 DEBUG + 샘플링 대상 (모듈 레벨이 DEBUG일 때만, LOG_DEBUG_SAMPLE_RATE 비율로).
+    """
+    if debug:
+        logger.info(msg, extra=fields)
+    elif logger.isEnabledFor(logging.DEBUG):
+        logger.debug(msg, extra={**fields, "sample": True})
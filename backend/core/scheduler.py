@@ -0,0 +1,192 @@
+# backend/core/scheduler.py
+"""
+STT / 영상 합성 워커 앞단의 우선순위 스케줄러
+
+요청을 들어온 순서(FIFO)대로 처리하면
+- 은행원 응답(고객이 기다리는 중)이 질문 여러 개 뒤에서 기다리고
+- 짧은 발화가 긴 발화 뒤에서 기다리고
+- 한 세션이 연달아 보내면 다른 세션이 밀린다.
+
+그래서 워커 슬롯이 빌 때마다 대기 중인 작업 중 하나를 골라 넘겨준다.
+    deadline = 도착 시각 + 모드별 예산(초) + size × size_factor + 세션 패널티
+    세션 패널티 = SCHED_SESSION_PENALTY_SEC × (도착 시점에 같은 세션이 실행/대기 중인 작업 수)
+    고르는 순서: (모드 우선순위, deadline) 오름차순 = 같은 우선순위 안에서는 EDF
+    deadline이 이미 지난 작업은 우선순위 0으로 취급 → 낮은 우선순위도 굶지 않음
+
+사용:
+    with get_scheduler("stt").slot(mode="응답", session_id=sid, size=audio_sec) as ticket:
+        text = stt_from_file(...)
+    ticket.wait_ms  # 슬롯을 기다린 시간
+
+환경변수:
+    SCHED_STT_WORKERS          STT 동시 실행 수 (기본 1, whisper 모델 1개를 공유)
+    SCHED_SYNTH_WORKERS        합성 동시 실행 수 (기본 2)
+    SCHED_MODE_PRIORITY        "응답:0,질문:1" (작을수록 먼저, 모르는 모드는 SCHED_DEFAULT_PRIORITY)
+    SCHED_MODE_BUDGET_SEC      "응답:2,질문:4" (모드별 목표 지연, 모르는 모드는 SCHED_DEFAULT_BUDGET_SEC)
+    SCHED_DEFAULT_PRIORITY     기본 2
+    SCHED_DEFAULT_BUDGET_SEC   기본 6
+    SCHED_SESSION_PENALTY_SEC  기본 1.0
+"""
+from __future__ import annotations
+
+import itertools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_map(spec: str) -> dict[str, float]:
+    out = {}
+    for part in (spec or "").split(","):
+        key, _, val = part.partition(":")
+        if key.strip() and val.strip():
+            out[key.strip()] = float(val)
+    return out
+
+
+MODE_PRIORITY = _parse_map(os.getenv("SCHED_MODE_PRIORITY", "응답:0,질문:1"))
+MODE_BUDGET_SEC = _parse_map(os.getenv("SCHED_MODE_BUDGET_SEC", "응답:2,질문:4"))
+DEFAULT_PRIORITY = float(os.getenv("SCHED_DEFAULT_PRIORITY", "2"))
+DEFAULT_BUDGET_SEC = float(os.getenv("SCHED_DEFAULT_BUDGET_SEC", "6"))
+SESSION_PENALTY_SEC = float(os.getenv("SCHED_SESSION_PENALTY_SEC", "1.0"))
+
+# 스케줄러별 (동시 실행 수, size 1단위당 deadline에 더할 초)
+SCHEDULER_CONF = {
+    "stt": (int(os.getenv("SCHED_STT_WORKERS", "1")), 1.0),      # size = 오디오 길이(초)
+    "synth": (int(os.getenv("SCHED_SYNTH_WORKERS", "2")), 0.2),  # size = 클립 개수
+}
+
+
+class Ticket:
+    __slots__ = ("seq", "mode", "session_id", "priority", "arrival", "deadline", "event", "wait_ms")
+
+    def __init__(self, seq, mode, session_id, priority, arrival, deadline):
+        self.seq = seq
+        self.mode = mode
+        self.session_id = session_id
+        self.priority = priority
+        self.arrival = arrival
+        self.deadline = deadline
+        self.event = threading.Event()
+        self.wait_ms = 0.0
+
+    def key(self, now: float):
+        prio = 0 if now >= self.deadline else self.priority
+        return prio, self.deadline, self.seq
+
+
+class PriorityScheduler:
+    def __init__(self, name: str, workers: int = 1, size_factor: float = 1.0):
+        self.name = name
+        self.workers = max(1, int(workers))
+        self.size_factor = float(size_factor)
+        self._lock = threading.Lock()
+        self._running = 0
+        self._waiting: list[Ticket] = []
+        self._per_session: dict[str, int] = {}  # 실행 + 대기 중인 작업 수
+        self._seq = itertools.count()
+
+        # 지표
+        self._served = 0
+        self._overdue = 0  # deadline을 넘겨서 시작한 작업 수
+
+    def _make_ticket(self, mode: str | None, session_id: str | None, size: float) -> Ticket:
+        now = time.monotonic()
+        mode = mode or ""
+        sid = session_id or ""
+        priority = MODE_PRIORITY.get(mode, DEFAULT_PRIORITY)
+        budget = MODE_BUDGET_SEC.get(mode, DEFAULT_BUDGET_SEC)
+        penalty = SESSION_PENALTY_SEC * self._per_session.get(sid, 0) if sid else 0.0
+        deadline = now + budget + max(size, 0.0) * self.size_factor + penalty
+        return Ticket(next(self._seq), mode, sid, priority, now, deadline)
+
+    def _start_locked(self, ticket: Ticket):
+        self._running += 1
+        self._served += 1
+        ticket.wait_ms = round((time.monotonic() - ticket.arrival) * 1000, 1)
+        if time.monotonic() > ticket.deadline:
+            self._overdue += 1
+
+    def _acquire(self, mode, session_id, size) -> Ticket:
+        with self._lock:
+            ticket = self._make_ticket(mode, session_id, size)
+            if ticket.session_id:
+                self._per_session[ticket.session_id] = self._per_session.get(ticket.session_id, 0) + 1
+            if self._running < self.workers and not self._waiting:
+                self._start_locked(ticket)
+                return ticket
+            self._waiting.append(ticket)
+        ticket.event.wait()
+        return ticket
+
+    def _release(self, ticket: Ticket):
+        with self._lock:
+            self._running -= 1
+            sid = ticket.session_id
+            if sid:
+                left = self._per_session.get(sid, 1) - 1
+                if left > 0:
+                    self._per_session[sid] = left
+                else:
+                    self._per_session.pop(sid, None)
+            if self._waiting and self._running < self.workers:
+                now = time.monotonic()
+                nxt = min(self._waiting, key=lambda t: t.key(now))
+                self._waiting.remove(nxt)
+                self._start_locked(nxt)
+                nxt.event.set()
+
+    @contextmanager
+    def slot(self, mode: str | None = None, session_id: str | None = None, size: float = 0.0):
+        """차례가 올 때까지 기다렸다가 워커 슬롯 1개를 잡음."""
+        ticket = self._acquire(mode, session_id, size)
+        if ticket.wait_ms >= 1:
+            logger.info(
+                "slot waited",
+                extra={
+                    "scheduler": self.name,
+                    "mode": ticket.mode,
+                    "session_id": ticket.session_id,
+                    "wait_ms": round(ticket.wait_ms),
+                },
+            )
+        try:
+            yield ticket
+        finally:
+            self._release(ticket)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "name": self.name,
+                "workers": self.workers,
+                "running": self._running,
+                "waiting": len(self._waiting),
+                "sessions": len(self._per_session),
+                "served": self._served,
+                "overdue": self._overdue,
+            }
+
+
+_SCHEDULERS: dict[str, PriorityScheduler] = {}
+_SCHEDULERS_LOCK = threading.Lock()
+
+
+def get_scheduler(name: str) -> PriorityScheduler:
+    """SCHEDULER_CONF[name] 설정으로 스케줄러 생성 (프로세스당 1개)."""
+    sched = _SCHEDULERS.get(name)
+    if sched is not None:
+        return sched
+    with _SCHEDULERS_LOCK:
+        if name not in _SCHEDULERS:
+            workers, size_factor = SCHEDULER_CONF.get(name, (1, 1.0))
+            _SCHEDULERS[name] = PriorityScheduler(name, workers, size_factor)
+        return _SCHEDULERS[name]
+
+
+def all_stats() -> list[dict]:
+    return [s.stats() for s in list(_SCHEDULERS.values())]
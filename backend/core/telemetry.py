@@ -0,0 +1,345 @@
+# backend/core/telemetry.py
+"""
+스냅샷 / gloss 매핑 로그 / E2E 로그 백그라운드 기록기 (telemetry sink)
+
+지금까지는 요청(또는 응답 직후 persist 노드)마다
+- snapshots/api/snapshot_<ts>.json 파일을 하나씩 새로 만들고 (indent=2)
+- gloss_mapping_log.csv / e2e_sps_log.csv를 열고 → 한 줄 쓰고 → 닫았다.
+작은 파일이 계속 쌓이고, 여러 워커가 같은 CSV에 동시에 쓰면 줄이 섞일 수 있다.
+
+- emit(stream, record): 메모리 큐에 넣기만 함 (디스크 I/O 없음, 큐가 꽉 차면 버리고 dropped 카운트)
+- 별도 스레드가 TELEMETRY_FLUSH_SEC 동안 모아서 스트림(파일)별로 한 번에 append
+- 파일 형식: jsonl (한 줄 = JSON 1개) / csv (헤더는 빈 파일일 때만)
+- 여러 프로세스: <파일>.lock에 flock을 잡고 쓰기 + 회전 (fcntl이 없는 OS에서는 잠금 없이 씀)
+- 회전: 크기가 TELEMETRY_ROTATE_MB를 넘거나 날짜가 바뀌면
+  <이름>.<YYYYmmdd_HHMMSS><확장자>로 바꾸고 gzip (예: snapshots.20250101_000000.jsonl.gz)
+- 읽는 쪽은 iter_files(path)로 회전된 .gz + 현재 파일을 오래된 순서로, open_text(p)로 열기
+- add_hook(stream, fn): 파일에 쓴 뒤 같은 writer 스레드에서 fn(records) 호출
+  (예: api_snapshots → accounts.snapshot_store가 SnapshotRecord 테이블에 적재)
+
+스트림 등록: register_stream(name, path, fmt="jsonl" | "csv", fields=[...])
+    api_snapshots  snapshots/api/snapshots.jsonl        (pipelines.service)
+    gloss_mapping  gloss_tools/gloss_mapping_log.csv    (pipelines.pipeline)
+    e2e            logs/e2e_sps_log.csv                 (sign.log_utils)
+
+환경변수:
+    TELEMETRY_QUEUE_SIZE   큐 최대 길이 (기본 10000)
+    TELEMETRY_BATCH        한 번에 쓰는 최대 건수 (기본 500)
+    TELEMETRY_FLUSH_SEC    모으는 시간 (기본 1.0초)
+    TELEMETRY_ROTATE_MB    회전 크기 (기본 64MB, 0이면 크기 회전 안 함)
+    TELEMETRY_ROTATE_DAILY 1이면 날짜가 바뀔 때 회전 (기본 1)
+"""
+from __future__ import annotations
+
+import atexit
+import csv
+import gzip
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+try:
+    import fcntl  # POSIX 전용
+except ImportError:  # Windows 개발 환경
+    fcntl = None
+
+QUEUE_SIZE = int(os.getenv("TELEMETRY_QUEUE_SIZE", "10000"))
+BATCH = int(os.getenv("TELEMETRY_BATCH", "500"))
+FLUSH_SEC = float(os.getenv("TELEMETRY_FLUSH_SEC", "1.0"))
+ROTATE_BYTES = int(float(os.getenv("TELEMETRY_ROTATE_MB", "64")) * 1024 * 1024)
+ROTATE_DAILY = os.getenv("TELEMETRY_ROTATE_DAILY", "1") == "1"
+
+logger = logging.getLogger(__name__)
+
+
+class Stream:
+    __slots__ = ("name", "path", "fmt", "fields")
+
+    def __init__(self, name: str, path: Path, fmt: str = "jsonl", fields: list[str] | None = None):
+        if fmt not in ("jsonl", "csv"):
+            raise ValueError(f"unknown telemetry format: {fmt}")
+        if fmt == "csv" and not fields:
+            raise ValueError("csv stream needs fields")
+        self.name = name
+        self.path = Path(path)
+        self.fmt = fmt
+        self.fields = list(fields or ())
+
+
+_STREAMS: dict[str, Stream] = {}
+_STREAMS_LOCK = threading.Lock()
+
+
+_HOOKS: dict[str, list] = {}
+
+
+def register_stream(name: str, path, fmt: str = "jsonl", fields: list[str] | None = None) -> Stream:
+    """스트림 등록 (모듈 import 시 1번). 같은 이름으로 다시 부르면 덮어씀."""
+    stream = Stream(name, Path(path), fmt, fields)
+    with _STREAMS_LOCK:
+        _STREAMS[name] = stream
+    return stream
+
+
+def add_hook(name: str, fn):
+    """stream name의 기록이 파일에 써진 뒤 fn(records) 호출 (writer 스레드, 예외는 기록만)."""
+    with _STREAMS_LOCK:
+        hooks = _HOOKS.setdefault(name, [])
+        if fn not in hooks:
+            hooks.append(fn)
+
+
+# ----------------------------------------------------------------------
+# 파일 쓰기 (writer 스레드에서만 호출)
+# ----------------------------------------------------------------------
+def _rotated_name(path: Path, stamp: str) -> Path:
+    # snapshots.jsonl → snapshots.20250101_000000.jsonl
+    return path.with_name(f"{path.stem}.{stamp}{path.suffix}")
+
+
+def _maybe_rotate(path: Path) -> Path | None:
+    """잠금을 잡은 상태에서 호출. 회전했으면 바뀐 파일 경로 (gzip 전)."""
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    if st.st_size == 0:
+        return None
+    too_big = ROTATE_BYTES > 0 and st.st_size >= ROTATE_BYTES
+    new_day = ROTATE_DAILY and date.fromtimestamp(st.st_mtime) != date.today()
+    if not (too_big or new_day):
+        return None
+    target = _rotated_name(path, datetime.fromtimestamp(st.st_mtime).strftime("%Y%m%d_%H%M%S"))
+    n = 1
+    while target.exists() or Path(f"{target}.gz").exists():
+        target = _rotated_name(path, datetime.fromtimestamp(st.st_mtime).strftime("%Y%m%d_%H%M%S") + f"_{n}")
+        n += 1
+    path.rename(target)
+    return target
+
+
+def _gzip(path: Path):
+    # 임시 이름에 다 쓴 뒤 바꿔서, 읽는 쪽(iter_files)이 쓰다 만 .gz를 보지 않게
+    gz = Path(f"{path}.gz")
+    tmp = Path(f"{path}.gz.tmp")
+    try:
+        with path.open("rb") as src, gzip.open(tmp, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.replace(tmp, gz)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    path.unlink()
+
+
+def _append(stream: Stream, records: list[dict]):
+    path = stream.path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lock_path = path.with_name(path.name + ".lock")
+    rotated = None
+    with open(lock_path, "a") as lk:
+        if fcntl is not None:
+            fcntl.flock(lk.fileno(), fcntl.LOCK_EX)
+        try:
+            rotated = _maybe_rotate(path)
+            with path.open("a", encoding="utf-8", newline="") as f:
+                if stream.fmt == "csv":
+                    writer = csv.DictWriter(f, fieldnames=stream.fields, extrasaction="ignore")
+                    if f.tell() == 0:
+                        writer.writeheader()
+                    writer.writerows(records)
+                else:
+                    f.write("".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in records))
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lk.fileno(), fcntl.LOCK_UN)
+    # 회전된 파일은 이제 아무도 쓰지 않으므로 잠금 밖에서 압축
+    if rotated is not None:
+        try:
+            _gzip(rotated)
+        except Exception as e:
+            logger.warning("gzip error (%s): %s", rotated, e)
+
+
+# ----------------------------------------------------------------------
+# 백그라운드 기록기
+# ----------------------------------------------------------------------
+class TelemetrySink:
+    def __init__(self, queue_size: int = QUEUE_SIZE, batch: int = BATCH, flush_sec: float = FLUSH_SEC):
+        self._queue: queue.Queue = queue.Queue(maxsize=int(queue_size))
+        self._batch = max(1, int(batch))
+        self._flush_sec = float(flush_sec)
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self.emitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0
+        self.hook_errors = 0
+        self.flushes = 0
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._worker, name="telemetry-writer", daemon=True)
+                self._thread.start()
+
+    def emit(self, stream: str, record: dict) -> bool:
+        """큐에 넣기만 함. 큐가 꽉 찼거나 모르는 스트림이면 False."""
+        if stream not in _STREAMS:
+            logger.warning("unknown telemetry stream: %s", stream)
+            return False
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait((stream, record))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.emitted += 1
+        return True
+
+    def _collect(self, first) -> tuple[list, bool]:
+        items = [first]
+        deadline = time.monotonic() + self._flush_sec
+        while len(items) < self._batch:
+            remaining = deadline - time.monotonic()
+            try:
+                nxt = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if nxt is None:
+                return items, True
+            items.append(nxt)
+        return items, False
+
+    def _write(self, items: list):
+        by_stream: dict[str, list[dict]] = {}
+        for name, rec in items:
+            by_stream.setdefault(name, []).append(rec)
+        for name, records in by_stream.items():
+            stream = _STREAMS.get(name)
+            if stream is None:
+                continue
+            try:
+                _append(stream, records)
+                with self._lock:
+                    self.written += len(records)
+            except Exception as e:
+                with self._lock:
+                    self.errors += 1
+                logger.error("write error (%s, %d records): %s", name, len(records), e)
+                continue
+            for hook in list(_HOOKS.get(name, ())):
+                try:
+                    hook(records)
+                except Exception as e:
+                    with self._lock:
+                        self.hook_errors += 1
+                    logger.warning("hook error (%s): %s", name, e)
+        with self._lock:
+            self.flushes += 1
+
+    def _worker(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                self._queue.task_done()
+                return
+            items, stop = self._collect(first)
+            try:
+                self._write(items)
+            finally:
+                for _ in range(len(items) + (1 if stop else 0)):
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """큐에 들어간 기록이 파일에 써질 때까지 대기 (관리 명령/종료용)."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def close(self, timeout: float = 5.0):
+        if self._thread is not None and self._thread.is_alive():
+            try:
+                self._queue.put(None, timeout=1)
+            except queue.Full:
+                pass
+            self._thread.join(timeout=timeout)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queued": self._queue.qsize(),
+                "emitted": self.emitted,
+                "written": self.written,
+                "dropped": self.dropped,
+                "errors": self.errors,
+                "hook_errors": self.hook_errors,
+                "flushes": self.flushes,
+            }
+
+
+SINK = TelemetrySink()
+atexit.register(SINK.close)
+
+
+def emit(stream: str, record: dict) -> bool:
+    return SINK.emit(stream, record)
+
+
+def flush(timeout: float = 5.0) -> bool:
+    return SINK.flush(timeout)
+
+
+def stats() -> dict:
+    return SINK.stats()
+
+
+# ----------------------------------------------------------------------
+# 읽기 (회전된 파일 포함)
+# ----------------------------------------------------------------------
+def iter_files(path) -> list[Path]:
+    """path의 회전된 .gz 파일들 + 현재 파일 (오래된 순서)."""
+    path = Path(path)
+    rotated = sorted(path.parent.glob(f"{path.stem}.*{path.suffix}.gz")) if path.parent.exists() else []
+    return rotated + ([path] if path.exists() else [])
+
+
+def open_text(path):
+    """.gz면 gzip으로 풀어서, 아니면 그대로 텍스트 모드로 연다."""
+    path = Path(path)
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return path.open("r", encoding="utf-8", newline="")
+
+
+def iter_jsonl(path):
+    """jsonl 스트림의 모든 기록 (회전된 파일 포함, 깨진 줄은 건너뜀)."""
+    for p in iter_files(path):
+        try:
+            with open_text(p) as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+        except (OSError, EOFError) as e:  # 잘린 gzip은 EOFError
+            logger.warning("read error (%s): %s", p, e)
@@ -0,0 +1,163 @@
+# backend/core/tracing.py
+"""
+단계별 지연 시간 추적(span) + 롤링 히스토그램
+
+지금까지는 단계마다 perf_counter를 따로 재서 [Perf ...]로 print하고 응답에만 넣었기 때문에
+요청을 모아 본 분포(p50/p95/p99)는 알 수 없었다.
+
+- span("stt") 컨텍스트 매니저 / @traced("concat") 데코레이터 / record(name, ms)
+- 기록은 프로세스 메모리에 (span, 분 단위 시간칸)별 버킷 카운터로 누적
+  (요청 상태(last_result, job, idempotency)가 들어 있는 기본 캐시를 쓰면
+   LocMemCache MAX_ENTRIES를 넘겨 요청 상태가 밀려나므로 캐시에 쓰지 않음)
+- 최근 TRACE_WINDOW_MIN분 시간칸을 합쳐서 버킷 분포 → p50/p95/p99 (버킷 안에서는 선형 보간)
+- 누적 카운터(cumulative): 프로세스 시작 후 계속 증가만 하는 버킷/합계/개수
+  → /metrics의 Prometheus histogram (rate(), histogram_quantile()은 이 값으로)
+- /metrics (pipelines.views_metrics.prometheus_metrics)에서 Prometheus text 형식으로 노출
+  여러 워커 프로세스 값은 Prometheus 쪽에서 합친다 (프로세스마다 scrape)
+
+span 이름:
+    upload, decode, stt, normalize, gemini, mapping, card_render, concat, ffprobe, snapshot_write
+    sign.npz_save, sign.npz_load, sign.segment_infer, sign.sentence, sign.total
+    request.speech_to_sign
+
+환경변수:
+    TRACE_ENABLED     0이면 기록 안 함 (기본 1)
+    TRACE_WINDOW_MIN  롤링 구간(분, 기본 15)
+"""
+from __future__ import annotations
+
+import bisect
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+TRACE_ENABLED = os.getenv("TRACE_ENABLED", "1") == "1"
+TRACE_WINDOW_MIN = int(os.getenv("TRACE_WINDOW_MIN", "15"))
+
+# 버킷 상한(ms). 마지막 버킷은 +Inf
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 300, 500, 700, 1000, 1500, 2000, 3000, 5000, 7000, 10000, 20000, 60000)
+
+_NB = len(BUCKETS_MS) + 1  # +Inf 버킷 포함
+
+_lock = threading.Lock()
+# name → {분: [버킷 개수..., 합계(us)]}  (최근 TRACE_WINDOW_MIN분만 유지)
+_windows: dict[str, dict[int, list[int]]] = {}
+# name → [버킷 개수..., 합계(us)]  (프로세스 시작 후 누적, 줄어들지 않음)
+_totals: dict[str, list[int]] = {}
+
+
+def record(name: str, ms: float):
+    """span name의 소요 시간(ms) 1건 기록."""
+    if not TRACE_ENABLED:
+        return
+    minute = int(time.time() // 60)
+    b = bisect.bisect_left(BUCKETS_MS, ms)  # _NB - 1 = +Inf 버킷
+    us = int(ms * 1000)
+    with _lock:
+        per_min = _windows.setdefault(name, {})
+        cell = per_min.get(minute)
+        if cell is None:
+            cell = per_min[minute] = [0] * (_NB + 1)
+            # 새 시간칸을 만들 때 구간 밖 시간칸 정리
+            for m in [m for m in per_min if m <= minute - TRACE_WINDOW_MIN]:
+                del per_min[m]
+        cell[b] += 1
+        cell[_NB] += us
+        total = _totals.get(name)
+        if total is None:
+            total = _totals[name] = [0] * (_NB + 1)
+        total[b] += 1
+        total[_NB] += us
+
+
+@contextmanager
+def span(name: str):
+    """with span("stt"): ... → 소요 시간 기록 (예외가 나도 기록)."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, (time.perf_counter() - t0) * 1000)
+
+
+def traced(name: str):
+    """함수 전체를 span으로 감싸는 데코레이터."""
+
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return deco
+
+
+# ----------------------------------------------------------------------
+# 조회
+# ----------------------------------------------------------------------
+def _quantile(counts: list[int], q: float) -> float:
+    total = sum(counts)
+    if not total:
+        return 0.0
+    target = q * total
+    seen = 0
+    for i, c in enumerate(counts):
+        if c and seen + c >= target:
+            lo = BUCKETS_MS[i - 1] if i > 0 else 0.0
+            hi = BUCKETS_MS[i] if i < len(BUCKETS_MS) else BUCKETS_MS[-1]
+            return round(lo + (hi - lo) * (target - seen) / c, 1)
+        seen += c
+    return float(BUCKETS_MS[-1])
+
+
+def _summary(counts: list[int], sum_us: int) -> dict:
+    bounds = list(BUCKETS_MS) + ["+Inf"]
+    return {
+        "buckets": list(zip(bounds, counts)),
+        "count": sum(counts),
+        "sum_ms": round(sum_us / 1000, 1),
+        "p50": _quantile(counts, 0.50),
+        "p95": _quantile(counts, 0.95),
+        "p99": _quantile(counts, 0.99),
+    }
+
+
+def histogram(name: str, window_min: int = TRACE_WINDOW_MIN) -> dict:
+    """
+    최근 window_min분 분포 (window_min은 TRACE_WINDOW_MIN까지만 의미 있음).
+    반환: {"buckets": [(상한ms 또는 "+Inf", 개수)...], "count", "sum_ms", "p50", "p95", "p99"}
+    """
+    now_min = int(time.time() // 60)
+    counts = [0] * _NB
+    sum_us = 0
+    with _lock:
+        for m, cell in _windows.get(name, {}).items():
+            if m > now_min - window_min:
+                for b in range(_NB):
+                    counts[b] += cell[b]
+                sum_us += cell[_NB]
+    return _summary(counts, sum_us)
+
+
+def cumulative(name: str) -> dict:
+    """프로세스 시작 후 누적 분포 (Prometheus histogram용, 값이 줄어들지 않음)."""
+    with _lock:
+        total = list(_totals.get(name) or [0] * (_NB + 1))
+    return _summary(total[:_NB], total[_NB])
+
+
+def span_names() -> list[str]:
+    with _lock:
+        return sorted(_totals)
+
+
+def all_histograms(window_min: int = TRACE_WINDOW_MIN) -> dict[str, dict]:
+    return {name: histogram(name, window_min) for name in span_names()}
+
+
+def all_cumulative() -> dict[str, dict]:
+    return {name: cumulative(name) for name in span_names()}
@@ -8,6 +8,7 @@ Pipeline V2.3: Financial KSL System (Final Integrated Version)
   4. Hybrid Synthesis (Auto-Caption for Verification)
   5. Robust Error Handling (Empty JSON Fix)
   6. Detailed Performance Timing (Seconds)
+  7. Retrieval-scoped Vocabulary (문장별 사전 후보 어휘만 전송)
 """
 
 import os
@@ -26,6 +27,12 @@ from datetime import datetime
 from pathlib import Path
 from dotenv import load_dotenv
 
+from core.llm_transport import TRANSPORT as LLM_TRANSPORT, CassetteMiss, wrap_model
+from pipelines.captions import write_vtt
+from pipelines.clip_store import CLIP_STORE, clip_key
+from pipelines.video_index import VIDEO_INDEX
+from pipelines.vocab_retrieval import VocabRetriever
+
 # [Warning Suppression]
 warnings.filterwarnings("ignore", message="FP16 is not supported on CPU")
 
@@ -45,10 +52,11 @@ GLOSS_MP4_DIR = DATA_DIR / "gloss_mp4"
 OUTPUT_DIR = BASE_DIR / "outputs"
 LOG_DIR = OUTPUT_DIR / "logs"
 CACHE_DIR = OUTPUT_DIR / "cache"
+CAPTION_DIR = OUTPUT_DIR / "captions"
 
 
 # [Create Dirs]
-for d in [LOG_DIR, CACHE_DIR, DATA_DIR]:
+for d in [LOG_DIR, CACHE_DIR, CAPTION_DIR, DATA_DIR]:
     d.mkdir(parents=True, exist_ok=True)
 
 # [Font Path]
@@ -79,11 +87,12 @@ except ImportError:
 # 2. NLP (Topic-Comment + Vocab Injection)
 # =========================================================
 class SmartNLP:
-    def __init__(self):
-        if not GOOGLE_API_KEY:
-            raise ValueError("❌ GOOGLE_API_KEY missing in .env")
-        
-        genai.configure(api_key=GOOGLE_API_KEY)
+    def __init__(self, vocab_retrieval=True):
+        # LLM_TRANSPORT=replay면 API 키 없이 cassette 응답으로 동작
+        if not LLM_TRANSPORT.offline:
+            if not GOOGLE_API_KEY:
+                raise ValueError("❌ GOOGLE_API_KEY missing in .env")
+            genai.configure(api_key=GOOGLE_API_KEY)
         
         # ---------------------------------------------------------
         # A. Vocabulary Injection (DB 단어장 로드)
@@ -102,9 +111,17 @@ class SmartNLP:
                         vocab_list.extend([t.strip() for t in terms])
         
         unique_vocab = sorted(list(set(vocab_list)))
-        vocab_str = ", ".join(unique_vocab)
         print(f"📚 [NLP] Loaded {len(unique_vocab)} words from DB.")
 
+        # vocab_retrieval=True: 전체 단어장(최대 15,000자)을 system prompt에 넣지 않고
+        # 요청마다 문장 관련 어휘 top-k만 user 입력에 붙인다.
+        self.retriever = VocabRetriever(unique_vocab) if vocab_retrieval else None
+        if self.retriever:
+            vocab_block = "입력과 함께 주어지는 [사전 후보 어휘] 목록의 단어를 우선 사용하세요."
+        else:
+            vocab_block = f"{', '.join(unique_vocab)[:15000]}..."
+        self.last_prompt_tokens = None
+
         # ---------------------------------------------------------
         # B. Terminology Injection (규칙 파일 로드)
         # ---------------------------------------------------------
@@ -129,7 +146,7 @@ class SmartNLP:
         입력된 문장을 철저히 분석하여 **수어 문법(화제-서술)**에 맞게 재조립하세요.
 
         [Available Vocabulary (DB)]
-        {vocab_str[:15000]}...
+        {vocab_block}
 
         {term_instruction}
 
@@ -156,15 +173,27 @@ class SmartNLP:
         }}
         """
         
-        self.model = genai.GenerativeModel(
-            GEMINI_MODEL_NAME, 
-            system_instruction=self.sys_prompt,
-            generation_config={"response_mime_type": "application/json"}
+        self.model = wrap_model(
+            GEMINI_MODEL_NAME,
+            self.sys_prompt,
+            lambda: genai.GenerativeModel(
+                GEMINI_MODEL_NAME,
+                system_instruction=self.sys_prompt,
+                generation_config={"response_mime_type": "application/json"}
+            ),
         )
 
+    def build_contents(self, text):
+        if not self.retriever:
+            return text
+        ctx = self.retriever.context_for(text)
+        return [ctx, f"[입력 문장]\n{text}"] if ctx else text
+
     def process(self, text):
         try:
-            response = self.model.generate_content(text)
+            response = self.model.generate_content(self.build_contents(text))
+            usage = getattr(response, "usage_metadata", None)
+            self.last_prompt_tokens = getattr(usage, "prompt_token_count", None)
             return json.loads(response.text)
         except Exception as e:
             print(f"⚠️ NLP Error: {e}")
@@ -235,30 +264,32 @@ class IntelligentMapper:
 # 4. Synthesizer (Auto-Caption + Windows Fix)
 # =========================================================
 class HybridSynthesizer:
+    """
+    텍스트/pause 클립은 pipelines.clip_store.CLIP_STORE에 저장 (재시작 후에도 재사용).
+    gloss 자막은 drawtext로 굽지 않고 WebVTT(last_vtt)로 따로 만든다.
+    """
+
     def __init__(self):
         self.ffmpeg = "ffmpeg"
+        self.resolution = f"{VIDEO_WIDTH}x{VIDEO_HEIGHT}"
+        self.last_vtt = None  # 마지막 synthesize() 결과의 WebVTT 자막 경로
+        # gid → mp4 경로 (토큰마다 rglob하지 않도록 시작 시 한 번 로드)
+        self.video_paths = VIDEO_INDEX.load(GLOSS_MP4_DIR) if GLOSS_MP4_DIR.exists() else {}
+
+    @staticmethod
+    def _render_or_raise(ok):
+        if not ok:
+            raise RuntimeError("ffmpeg 렌더링 실패")
+
+    def _render_pause(self, out_path):
+        cmd = [self.ffmpeg, "-y", "-f", "lavfi", "-i", f"color=c=black:s={VIDEO_WIDTH}x{VIDEO_HEIGHT}:d=0.5",
+               "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p", str(out_path)]
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
 
     def _escape_path(self, path_str):
         p = Path(path_str).as_posix()
         return p.replace(":", "\\:")
 
-    def _add_caption(self, input_video, text, output_video):
-        font_p = self._escape_path(str(FONT_PATH))
-        drawtext = (
-            f"fontfile='{font_p}':text='{text}':fontsize=60:fontcolor=yellow:"
-            f"x=(w-text_w)/2:y=h-th-20:borderw=3:bordercolor=black"
-        )
-        cmd = [
-            self.ffmpeg, "-y", "-i", str(input_video), "-vf", f"drawtext={drawtext}",
-            "-c:v", "libx264", "-preset", "ultrafast", "-c:a", "copy", str(output_video)
-        ]
-        try:
-            subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            return True
-        except Exception as e:
-            print(f"⚠️ Caption Error: {e}")
-            return False
-
     def _generate_text_video(self, text, out_path):
         txt_hash = hashlib.md5(text.encode()).hexdigest()
         txt_file = CACHE_DIR / f"content_{txt_hash}.txt"
@@ -281,6 +312,7 @@ class HybridSynthesizer:
 
     def synthesize(self, mapped_tokens):
         playlist = []
+        segments = []  # (자막 텍스트, 클립 경로들) → last_vtt
         print(f"   (Processing {len(mapped_tokens)} clips...)")
 
         for tok in mapped_tokens:
@@ -290,35 +322,37 @@ class HybridSynthesizer:
             if typ == "gloss":
                 gid = tok.get("id")
                 if gid:
-                    found = list(GLOSS_MP4_DIR.rglob(f"{gid}.mp4"))
+                    found = self.video_paths.get(str(gid))
                     if found:
-                        src_video = found[0]
-                        caption_hash = hashlib.md5(f"{gid}_{txt}".encode()).hexdigest()
-                        caption_video = CACHE_DIR / f"cap_{caption_hash}.mp4"
-                        
-                        if not caption_video.exists():
-                            success = self._add_caption(src_video, txt, caption_video)
-                            if not success: caption_video = src_video
-                        playlist.append(str(caption_video))
+                        # 자막은 영상에 굽지 않고 VTT로 따로 (재인코딩 없음)
+                        playlist.append(found)
+                        segments.append((txt, [found]))
                     else:
                         print(f"⚠️ File Missing: {txt} (ID: {gid})")
                 else:
                     print(f"❓ Unknown Gloss: {txt}")
             
             elif typ == "image":
-                name_hash = hashlib.md5(txt.encode()).hexdigest()
-                cache_path = CACHE_DIR / f"img_{name_hash}.mp4"
-                if not cache_path.exists(): self._generate_text_video(txt, cache_path)
-                if cache_path.exists(): playlist.append(str(cache_path))
+                key = clip_key("image_hybrid", text=txt, duration=2.0, font=str(FONT_PATH), resolution=self.resolution)
+                try:
+                    path = CLIP_STORE.get_or_create(
+                        key, lambda tmp: self._render_or_raise(self._generate_text_video(txt, tmp))
+                    )
+                    playlist.append(path)
+                    segments.append(("", [path]))
+                except Exception as e:
+                    print(f"⚠️ Text Video Error: {e}")
 
             elif typ == "pause":
-                pause_path = CACHE_DIR / "pause_0.5s.mp4"
-                if not pause_path.exists():
-                    cmd = [self.ffmpeg, "-y", "-f", "lavfi", "-i", f"color=c=black:s={VIDEO_WIDTH}x{VIDEO_HEIGHT}:d=0.5", 
-                           "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p", str(pause_path)]
-                    subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-                playlist.append(str(pause_path))
-
+                key = clip_key("pause_hybrid", duration=0.5, resolution=self.resolution)
+                try:
+                    path = CLIP_STORE.get_or_create(key, self._render_pause)
+                    playlist.append(path)
+                    segments.append(("", [path]))
+                except Exception as e:
+                    print(f"⚠️ Pause Video Error: {e}")
+
+        self.last_vtt = write_vtt(segments, CAPTION_DIR, prefix="play_")
         return playlist
 
 
@@ -326,7 +360,7 @@ class HybridSynthesizer:
 # 5. Player & Main
 # =========================================================
 class VideoPlayer:
-    def play(self, paths):
+    def play(self, paths, vtt=None):
         if not paths: return False
         with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False, encoding="utf-8") as f:
             list_path = f.name
@@ -334,11 +368,13 @@ class VideoPlayer:
                 safe_p = p.replace("\\", "/")
                 f.write(f"file '{safe_p}'\n")
         try:
-            subprocess.run(
-                ["ffplay", "-f", "concat", "-safe", "0", "-i", list_path, 
-                 "-autoexit", "-hide_banner", "-loglevel", "error"],
-                check=True
-            )
+            cmd = ["ffplay", "-f", "concat", "-safe", "0", "-i", list_path,
+                   "-autoexit", "-hide_banner", "-loglevel", "error"]
+            if vtt:
+                # 재생할 때만 자막 오버레이 (파일 재인코딩 없음)
+                vtt_p = Path(vtt).as_posix().replace(":", "\\:")
+                cmd[1:1] = ["-vf", f"subtitles='{vtt_p}'"]
+            subprocess.run(cmd, check=True)
             return True
         except Exception as e:
             print(f"❌ Play Error: {e}")
@@ -411,6 +447,7 @@ def main():
             t0 = time.perf_counter()
             nlp_result = nlp.process(raw_text)
             timings["NLP"] = time.perf_counter() - t0
+            print(f"🔢 Prompt tokens: {nlp.last_prompt_tokens}")
             
             cleaned_text = nlp_result.get("cleaned", "(No info)")
             tokens = nlp_result.get("tokens", [])
@@ -429,7 +466,7 @@ def main():
             
             # 6. Play
             t0 = time.perf_counter()
-            player.play(playlist)
+            player.play(playlist, vtt=synth.last_vtt)
             timings["Output"] = time.perf_counter() - t0
             
             total_time = time.perf_counter() - pipeline_start
@@ -462,5 +499,42 @@ def main():
     except Exception:
         traceback.print_exc()
 
+def bench_prompt(n_sentences=20):
+    """
+    전체 단어장 주입(before) vs 문장별 어휘 검색(after) 비교.
+    문장마다 프롬프트 토큰 수(count_tokens)와 generate_content 지연을 잰다.
+        python pipeline_second.py --bench-prompt [N]
+    """
+    script_path = BASE_DIR / "pipelines" / "gloss" / "script.txt"
+    with open(script_path, "r", encoding="utf-8") as f:
+        sentences = [l.strip() for l in f if l.strip()][:n_sentences]
+
+    for label, retrieval in [("before(full vocab)", False), ("after(retrieval)", True)]:
+        nlp = SmartNLP(vocab_retrieval=retrieval)
+        tok_list, sec_list = [], []
+        for sent in sentences:
+            contents = nlp.build_contents(sent)
+            try:
+                tok_list.append(nlp.model.count_tokens(contents).total_tokens)
+            except CassetteMiss:
+                pass  # replay인데 토큰 수가 녹화되지 않은 문장 (예전 cassette) → 토큰 수만 건너뜀
+            t0 = time.perf_counter()
+            nlp.process(sent)
+            sec_list.append(time.perf_counter() - t0)
+        sec_sorted = sorted(sec_list)
+        tok_avg = f"{sum(tok_list) / len(tok_list):.0f}" if tok_list else "n/a"
+        print(
+            f"[{label}] n={len(sentences)} "
+            f"prompt_tokens(avg)={tok_avg} "
+            f"latency(avg)={sum(sec_list) / len(sec_list):.2f}s "
+            f"latency(p50)={sec_sorted[len(sec_sorted) // 2]:.2f}s"
+        )
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if "--bench-prompt" in sys.argv:
+        idx = sys.argv.index("--bench-prompt")
+        n = int(sys.argv[idx + 1]) if len(sys.argv) > idx + 1 else 20
+        bench_prompt(n)
+    else:
+        main()
\ No newline at end of file
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+captions.py
+문장 수어 영상용 WebVTT 자막 (sidecar .vtt)
+
+영상에 drawtext로 글자를 구워 넣으면 (gloss, 텍스트) 조합마다 재인코딩이 필요하다.
+대신 클립 길이(clip_meta.clip_duration, 1회 probe 후 캐시)로 타임라인을 계산해서
+자막 파일만 따로 만든다 → 영상 재인코딩 없음.
+<video>에서는 <track kind="captions" src="...vtt">로 붙이면 된다.
+
+파일명 sent_<문장 영상 키>.<자막 해시>.vtt → 같은 문장 영상(sent_<키>.mp4)과 함께
+service._enforce_sentence_cache_budget 용량 한도에 들어가고 같이 삭제된다.
+"""
+
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+from .clip_meta import clip_duration
+from .clip_store import touch_atime
+
+
+def _fmt_ts(sec: float) -> str:
+    ms = int(round(max(sec, 0.0) * 1000))
+    h, ms = divmod(ms, 3600_000)
+    m, ms = divmod(ms, 60_000)
+    s, ms = divmod(ms, 1000)
+    return f"{h:02d}:{m:02d}:{s:02d}.{ms:03d}"
+
+
+def cues_from_segments(segments: list[tuple[str, list[str]]]) -> list[tuple[float, float, str]]:
+    """
+    segments: [(자막 텍스트, 그 텍스트 동안 재생되는 클립 경로들)] (재생 순서)
+    반환: [(시작초, 끝초, 텍스트)] - 텍스트가 빈 구간(pause 등)은 시간만 흘러감
+    """
+    cues = []
+    t = 0.0
+    for text, paths in segments:
+        dur = sum(clip_duration(p) for p in paths)
+        if dur <= 0:
+            continue
+        text = (text or "").strip()
+        if text:
+            cues.append((t, t + dur, text))
+        t += dur
+    return cues
+
+
+def segments_from_debug_info(debug_info: list[dict]) -> list[tuple[str, list[str]]]:
+    """build_video_sequence_from_tokens / sequence_from_entry의 debug_info → segments."""
+    segments = []
+    for entry in debug_info or []:
+        paths = entry.get("paths") or []
+        if not paths:
+            continue
+        text = entry.get("token_text") if entry.get("token_type") in ("gloss", "image") else ""
+        segments.append((text or "", list(paths)))
+    return segments
+
+
+def build_vtt(cues: list[tuple[float, float, str]]) -> str:
+    lines = ["WEBVTT", ""]
+    for i, (start, end, text) in enumerate(cues, 1):
+        lines.append(str(i))
+        lines.append(f"{_fmt_ts(start)} --> {_fmt_ts(end)}")
+        lines.append(text.replace("-->", "→"))
+        lines.append("")
+    return "\n".join(lines)
+
+
+def write_vtt(
+    segments: list[tuple[str, list[str]]],
+    out_dir: Path,
+    prefix: str = "sent_",
+    video_key: str | None = None,
+) -> Path | None:
+    """
+    segments로 VTT 파일을 out_dir에 저장 (같은 내용이면 기존 파일 재사용).
+    파일명은 (클립 경로, 텍스트) 해시. video_key(문장 영상 키)를 주면
+    {prefix}{video_key}.{해시 8자}.vtt → 같은 키의 영상과 묶여서 캐시 용량 관리/삭제됨.
+    """
+    if not segments:
+        return None
+    sig = "|".join(f"{text}:{','.join(paths)}" for text, paths in segments)
+    digest = hashlib.sha1(sig.encode("utf-8")).hexdigest()
+    name = f"{prefix}{video_key}.{digest[:8]}.vtt" if video_key else f"{prefix}{digest[:24]}.vtt"
+    out = Path(out_dir) / name
+    if touch_atime(out):
+        return out
+
+    out.parent.mkdir(parents=True, exist_ok=True)
+    body = build_vtt(cues_from_segments(segments))
+    fd, tmp = tempfile.mkstemp(dir=out.parent, suffix=".vtt")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(body)
+    os.replace(tmp, out)
+    return out
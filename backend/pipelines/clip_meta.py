@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+clip_meta.py
+클립 메타데이터 인덱스 (SQLite에 저장, 요청 중 ffprobe 없음)
+
+- 클립마다 duration / fps / 해상도 / 코덱 / size / sha1을 한 번만 계산해서 저장
+- 키: 절대경로, 저장된 (mtime_ns, size)가 현재 파일과 다를 때만 다시 probe (증분 갱신)
+- MP4는 moov만 읽어서 계산 (프로세스 없음), MP4가 아니면 ffprobe로 폴백
+- 프로세스 안에서는 dict로 미러링 → 조회 비용은 os.stat 1번
+
+오프라인 예열 (수어 클립 + 합성 클립 저장소 전체):
+    python -m pipelines.clip_meta
+
+환경변수:
+    CLIP_META_DB   SQLite 파일 경로 (기본: backend/outputs/clip_meta.sqlite3)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import struct
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+from core.tracing import traced
+
+from .mp4concat import Mp4ConcatError, _read_mvhd_or_mdhd, _scan_top_level
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_DB_PATH = BACKEND_DIR / "outputs" / "clip_meta.sqlite3"
+
+FIELDS = ("path", "mtime_ns", "size", "duration", "fps", "width", "height", "codec", "sha1")
+
+
+def _file_sha1(path: Path) -> str:
+    h = hashlib.sha1()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _probe_mp4(path: Path) -> dict | None:
+    """moov에서 길이/fps/해상도/코덱 읽기. MP4가 아니거나 구조가 이상하면 None."""
+    try:
+        _ftyp, moov, _mdat = _scan_top_level(str(path))
+    except (Mp4ConcatError, OSError, struct.error):
+        return None
+    try:
+        movie_ts, movie_dur = _read_mvhd_or_mdhd(moov.find(b"mvhd").payload)
+        meta = {"duration": movie_dur / movie_ts if movie_ts else 0.0}
+        for trak in moov.find_all(b"trak"):
+            mdia = trak.find(b"mdia")
+            if mdia is None or mdia.find(b"hdlr").payload[8:12] != b"vide":
+                continue
+            media_ts, _ = _read_mvhd_or_mdhd(mdia.find(b"mdhd").payload)
+            stbl = mdia.find(b"minf").find(b"stbl")
+            stsd = stbl.find(b"stsd").payload
+            # stsd: vf(4) count(4) | entry: size(4) type(4) ... width(2) height(2) @ +32
+            meta["codec"] = stsd[12:16].decode("ascii", "replace")
+            meta["width"], meta["height"] = struct.unpack_from(">HH", stsd, 8 + 32)
+            stts = stbl.find(b"stts").payload
+            n = struct.unpack_from(">I", stts, 4)[0]
+            flat = struct.unpack_from(f">{n * 2}I", stts, 8)
+            count = sum(flat[0::2])
+            ticks = sum(c * d for c, d in zip(flat[0::2], flat[1::2]))
+            # 2프레임 텍스트 카드처럼 VFR인 클립은 첫 샘플 간격 기준
+            delta = min(flat[1::2]) if n else 0
+            meta["fps"] = round(media_ts / delta, 3) if delta else (count / (ticks / media_ts) if ticks else 0.0)
+            break
+        return meta
+    except (AttributeError, struct.error, ZeroDivisionError):
+        return None
+
+
+@traced("ffprobe")
+def _probe_ffprobe(path: Path) -> dict:
+    cmd = [
+        "ffprobe", "-v", "error",
+        "-show_entries", "format=duration:stream=codec_name,width,height,r_frame_rate",
+        "-of", "json",
+        str(path),
+    ]
+    meta = {"duration": 0.0}
+    try:
+        r = subprocess.run(cmd, capture_output=True, text=True)
+        data = json.loads(r.stdout)
+        meta["duration"] = float(data["format"]["duration"])
+        for st in data.get("streams") or []:
+            if st.get("width"):
+                num, _, den = (st.get("r_frame_rate") or "0/1").partition("/")
+                meta.update(
+                    codec=st.get("codec_name"),
+                    width=st.get("width"),
+                    height=st.get("height"),
+                    fps=round(float(num) / float(den or 1), 3) if float(den or 1) else 0.0,
+                )
+                break
+    except Exception:
+        pass
+    return meta
+
+
+class ClipMetaIndex:
+    def __init__(self, db_path: Path | str = DEFAULT_DB_PATH):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS clips (
+                path TEXT PRIMARY KEY,
+                mtime_ns INTEGER,
+                size INTEGER,
+                duration REAL,
+                fps REAL,
+                width INTEGER,
+                height INTEGER,
+                codec TEXT,
+                sha1 TEXT,
+                updated_at REAL
+            )
+            """
+        )
+        self._conn.commit()
+        self._rows: dict[str, dict] | None = None
+
+    @classmethod
+    def from_env(cls) -> "ClipMetaIndex":
+        return cls(os.getenv("CLIP_META_DB") or DEFAULT_DB_PATH)
+
+    def _load(self):
+        if self._rows is None:
+            cur = self._conn.execute(f"SELECT {', '.join(FIELDS)} FROM clips")
+            self._rows = {r[0]: dict(zip(FIELDS, r)) for r in cur.fetchall()}
+
+    def get(self, path: str | Path) -> dict | None:
+        """
+        클립 메타 반환 (없거나 파일이 바뀌었으면 probe 후 저장).
+        파일이 없으면 None.
+        """
+        p = Path(path)
+        try:
+            st = p.stat()
+        except OSError:
+            return None
+        key = str(p.resolve())
+
+        with self._lock:
+            self._load()
+            row = self._rows.get(key)
+        if row and row["mtime_ns"] == st.st_mtime_ns and row["size"] == st.st_size:
+            return row
+
+        meta = _probe_mp4(p) or _probe_ffprobe(p)
+        row = {
+            "path": key,
+            "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size,
+            "duration": float(meta.get("duration") or 0.0),
+            "fps": meta.get("fps"),
+            "width": meta.get("width"),
+            "height": meta.get("height"),
+            "codec": meta.get("codec"),
+            "sha1": _file_sha1(p),
+        }
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO clips ({', '.join(FIELDS)}, updated_at) "
+                f"VALUES ({', '.join('?' * len(FIELDS))}, ?)",
+                [row[f] for f in FIELDS] + [time.time()],
+            )
+            self._conn.commit()
+            self._rows[key] = row
+        return row
+
+    def refresh(self, paths) -> tuple[int, int]:
+        """여러 클립을 한 번에 인덱싱 (바뀐 것만 probe). 반환: (전체, 새로 probe한 수)."""
+        self._load()
+        total = probed = 0
+        for p in paths:
+            total += 1
+            before = self._rows.get(str(Path(p).resolve()))
+            row = self.get(p)
+            if row is not None and row is not before:
+                probed += 1
+        return total, probed
+
+
+CLIP_META = ClipMetaIndex.from_env()
+
+
+def clip_duration(path: str | Path) -> float:
+    """클립 길이(초). 인덱스에 있고 파일이 그대로면 probe 없음."""
+    row = CLIP_META.get(path)
+    return float(row["duration"]) if row else 0.0
+
+
+def timeline(paths: list[str]) -> list[dict]:
+    """재생 순서대로 각 클립의 시작/끝 시각(초)."""
+    out = []
+    t = 0.0
+    for p in paths:
+        dur = clip_duration(p)
+        out.append({"path": str(p), "start": round(t, 3), "end": round(t + dur, 3), "duration": round(dur, 3)})
+        t += dur
+    return out
+
+
+def token_timeline(debug_info: list[dict]) -> list[dict]:
+    """
+    debug_info(토큰별 매핑 결과)에 토큰 단위 시작/끝 시각을 붙인 목록.
+    (paths가 비어 있는 토큰은 길이 0)
+    """
+    out = []
+    t = 0.0
+    for entry in debug_info or []:
+        dur = sum(clip_duration(p) for p in entry.get("paths") or [])
+        out.append(
+            {
+                "idx": entry.get("idx"),
+                "token_type": entry.get("token_type"),
+                "token_text": entry.get("token_text"),
+                "start": round(t, 3),
+                "end": round(t + dur, 3),
+            }
+        )
+        t += dur
+    return out
+
+
+if __name__ == "__main__":
+    from .clip_store import CLIP_STORE
+    from .pipeline import VIDEO_PATH_INDEX
+
+    paths = sorted(set(VIDEO_PATH_INDEX.values()))
+    paths += [str(p) for p in CLIP_STORE.root.glob("*/*.mp4") if not p.name.startswith(".tmp_")]
+    t0 = time.perf_counter()
+    total, probed = CLIP_META.refresh(paths)
+    print(f"[ClipMeta] total={total}, probed={probed}, {time.perf_counter() - t0:.1f}s -> {CLIP_META.db_path}")
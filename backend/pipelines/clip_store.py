@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+clip_store.py
+텍스트 카드 / 빈 화면(pause) / 자막 클립처럼 서버가 만들어 쓰는 합성 클립의 디스크 저장소
+
+- 내용 주소(content-addressed): (종류, 텍스트, 길이, 폰트, 해상도, 프로파일) 해시 → 파일명
+  → 재시작 후에도, 여러 워커 프로세스 사이에서도 같은 클립을 재사용
+- 원자적 쓰기: 같은 폴더의 임시 파일에 렌더링 후 os.replace
+- single-flight: 같은 키를 동시에 요청하면 한 번만 렌더링
+  (프로세스 안: 키별 threading.Lock / 프로세스 사이: O_EXCL lock 파일)
+- 용량 한도(CLIP_STORE_MAX_BYTES)를 넘으면 오래 안 쓴(atime) 클립부터 삭제
+  사용 기록은 atime으로만 남기고 mtime은 그대로 둔다
+  (문장 영상 캐시 키 / HLS 세그먼트 키 / clip_meta가 mtime을 내용 버전으로 쓰기 때문)
+
+환경변수:
+    CLIP_STORE_DIR         저장 폴더 (기본: backend/outputs/clip_store)
+    CLIP_STORE_MAX_BYTES   용량 한도 (기본 512 MiB)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_STORE_DIR = BACKEND_DIR / "outputs" / "clip_store"
+
+# 다른 프로세스가 잡은 lock 파일을 이 시간(초)이 지나면 죽은 것으로 보고 치움
+LOCK_STALE_SEC = 120.0
+LOCK_POLL_SEC = 0.05
+
+
+def touch_atime(path) -> bool:
+    """LRU용 사용 시각(atime)만 지금으로, mtime은 유지. 파일이 없으면 False."""
+    try:
+        st = os.stat(path)
+        os.utime(path, ns=(time.time_ns(), st.st_mtime_ns))
+        return True
+    except OSError:
+        return False
+
+
+def clip_key(kind: str, **params) -> str:
+    """클립 종류 + 렌더링 파라미터 → 저장 키 (sha1 앞 24자)."""
+    blob = json.dumps({"kind": kind, **params}, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()[:24]
+
+
+class ClipStore:
+    def __init__(self, root: Path | str, max_bytes: int = 512 * 1024 ** 2, suffix: str = ".mp4"):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_bytes)
+        self.suffix = suffix
+
+        self._lock = threading.Lock()
+        self._key_locks: dict[str, threading.Lock] = {}
+        self._approx_bytes: int | None = None  # 첫 eviction 검사 때 실제 용량으로 채움
+        self.hits = 0     # /metrics 용 (프로세스 단위)
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "ClipStore":
+        return cls(
+            os.getenv("CLIP_STORE_DIR") or DEFAULT_STORE_DIR,
+            max_bytes=int(os.getenv("CLIP_STORE_MAX_BYTES", str(512 * 1024 ** 2))),
+        )
+
+    # ------------------------------------------------------------------
+    def path_for(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}{self.suffix}"
+
+    def get(self, key: str) -> str | None:
+        """있으면 경로 반환 (+ LRU용 atime 갱신), 없으면 None."""
+        path = self.path_for(key)
+        if not touch_atime(path):
+            return None
+        return str(path)
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            lk = self._key_locks.get(key)
+            if lk is None:
+                lk = self._key_locks[key] = threading.Lock()
+            return lk
+
+    def _acquire_file_lock(self, lock_path: Path, path: Path) -> bool:
+        """
+        프로세스 간 lock 획득. 다른 프로세스가 렌더링을 끝내서 결과 파일이 생기면 False.
+        """
+        while True:
+            try:
+                fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(fd, str(os.getpid()).encode())
+                os.close(fd)
+                return True
+            except FileExistsError:
+                pass
+
+            if path.exists():
+                return False
+            try:
+                if time.time() - lock_path.stat().st_mtime > LOCK_STALE_SEC:
+                    os.remove(lock_path)
+                    continue
+            except OSError:
+                continue
+            time.sleep(LOCK_POLL_SEC)
+
+    def get_or_create(self, key: str, render) -> str:
+        """
+        key에 해당하는 클립 경로 반환. 없으면 render(tmp_path)로 한 번만 생성.
+        render는 인자로 받은 경로에 파일을 쓰고, 실패하면 예외를 던져야 한다.
+        """
+        hit = self.get(key)
+        if hit:
+            self.hits += 1
+            return hit
+
+        path = self.path_for(key)
+        with self._key_lock(key):
+            hit = self.get(key)
+            if hit:
+                self.hits += 1
+                return hit
+            self.misses += 1
+
+            path.parent.mkdir(parents=True, exist_ok=True)
+            lock_path = path.with_name(path.name + ".lock")
+            if not self._acquire_file_lock(lock_path, path):
+                return str(path)
+
+            tmp = path.with_name(f".tmp_{uuid.uuid4().hex}{self.suffix}")
+            try:
+                if path.exists():
+                    return str(path)
+                render(str(tmp))
+                if not tmp.exists() or tmp.stat().st_size == 0:
+                    raise RuntimeError(f"클립 렌더링 결과 없음: {key}")
+                os.replace(tmp, path)
+            finally:
+                for p in (tmp, lock_path):
+                    try:
+                        os.remove(p)
+                    except OSError:
+                        pass
+
+        try:
+            self._account(path)
+        except Exception as e:
+            print(f"[ClipStore] eviction error: {e}")
+        return str(path)
+
+    # ------------------------------------------------------------------
+    def _scan(self) -> list[tuple[float, int, Path]]:
+        items = []
+        for p in self.root.glob(f"*/*{self.suffix}"):
+            if p.name.startswith(".tmp_"):
+                continue
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            items.append((st.st_atime, st.st_size, p))
+        return items
+
+    def _account(self, new_path: Path):
+        """새 클립 크기를 누적하고, 한도를 넘으면 실제로 스캔해서 LRU 삭제."""
+        size = new_path.stat().st_size
+        with self._lock:
+            if self._approx_bytes is None:
+                self._approx_bytes = sum(s for _, s, _ in self._scan())
+            else:
+                self._approx_bytes += size
+            if self._approx_bytes <= self.max_bytes:
+                return
+            self._approx_bytes = self.evict(keep=new_path)
+
+    def evict(self, keep: Path | None = None) -> int:
+        """용량 한도까지 오래된 클립 삭제. 남은 총 용량 반환."""
+        items = self._scan()
+        total = sum(s for _, s, _ in items)
+        for _, size, p in sorted(items):
+            if total <= self.max_bytes:
+                break
+            if keep is not None and p == keep:
+                continue
+            try:
+                os.remove(p)
+                total -= size
+            except OSError:
+                pass
+        return total
+
+
+CLIP_STORE = ClipStore.from_env()
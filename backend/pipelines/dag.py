@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+dag.py
+요청 하나의 처리 단계를 의존관계(DAG)대로 실행하는 작은 실행기
+
+- 노드는 의존 노드가 끝나는 즉시 실행 → 서로 무관한 단계는 겹쳐서 돌아감
+  준비된 노드가 1개뿐이고 실행 중인 노드가 없으면(직선 구간) run()을 부른 스레드에서 바로 실행,
+  동시에 준비된 노드가 여러 개일 때만 이 run() 전용 스레드 풀(최대 DAG_WORKERS개)을 만들어 나눠 실행
+  → 공유 풀이 없으므로 한 요청의 노드가 STT 슬롯 대기 등으로 막혀도 다른 요청의 노드를 막지 않음
+- 노드 함수는 의존 노드의 결과를 같은 이름의 키워드 인자로 받음
+- 노드마다 시작/끝 시각(ms, DAG 시작 기준)을 기록
+- 노드는 호출한 스레드의 contextvars를 복사한 컨텍스트에서 실행
+- 노드 시작 전에 현재 취소 토큰(core.cancellation)을 확인 → 취소됐으면 다음 단계로 넘어가지 않음
+- after_response=True 노드(스냅샷/로그 저장 등)는 run()이 기다리지 않음
+  → 응답을 다 만든 뒤 res.release(result=...)로 시작. DAG 밖의 값(최종 응답 등)은
+    release 인자로 넘기고, after_response 노드는 그 이름을 deps에 적을 수 있음
+
+사용:
+    dag = Dag("speech")
+
+    @dag.node()
+    def stt(): ...
+
+    @dag.node(deps=["stt"])
+    def nlp(stt): ...
+
+    @dag.node(deps=["nlp", "result"], after_response=True)
+    def persist(nlp, result): ...
+
+    res = dag.run()
+    res["nlp"], res.timing["nlp"]
+    res.release(result=...)
+"""
+
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from core.cancellation import check_cancelled
+
+DAG_WORKERS = int(os.getenv("DAG_WORKERS", "4"))  # run() 1번당 동시 실행 노드 수
+# after_response 노드(스냅샷/로그 저장)는 응답 뒤라 요청별 풀 대신 작은 공유 풀에서
+_AFTER_POOL = ThreadPoolExecutor(max_workers=int(os.getenv("DAG_AFTER_WORKERS", "2")), thread_name_prefix="dag-after")
+
+
+class DagResult(dict):
+    """노드 이름 → 결과. timing: 노드 이름 → {"start", "end", "ms"}."""
+
+    def __init__(self):
+        super().__init__()
+        self.timing: dict[str, dict] = {}
+        self._release = None
+
+    def ms(self, name: str) -> float:
+        t = self.timing.get(name)
+        return t["ms"] if t else 0.0
+
+    def release(self, **values):
+        """after_response 노드 시작 (values는 그 노드들의 추가 입력). 기다리지 않음."""
+        release, self._release = self._release, None
+        if release is not None:
+            self.update(values)
+            release()
+
+
+class Dag:
+    def __init__(self, name: str = "dag", workers: int = DAG_WORKERS):
+        self.name = name
+        self.workers = max(1, int(workers))
+        self._nodes: dict[str, dict] = {}
+
+    def node(self, name: str | None = None, deps=(), after_response: bool = False):
+        def deco(fn):
+            key = name or fn.__name__
+            for d in deps:
+                # after_response 노드는 release()로 받을 값도 deps에 적을 수 있음
+                if d not in self._nodes and not after_response:
+                    raise ValueError(f"[{self.name}] 알 수 없는 의존 노드: {d} (먼저 정의해야 함)")
+            self._nodes[key] = {"fn": fn, "deps": tuple(deps), "after": after_response}
+            return fn
+
+        return deco
+
+    def run(self) -> DagResult:
+        res = DagResult()
+        base_ctx = contextvars.copy_context()
+        t0 = time.perf_counter()
+        lock = threading.Lock()
+
+        def call(key):
+            node = self._nodes[key]
+            kwargs = {d: res[d] for d in node["deps"]}
+            start = time.perf_counter()
+            ctx = base_ctx.copy()
+            ctx.run(check_cancelled, key)
+            try:
+                return ctx.run(node["fn"], **kwargs)
+            finally:
+                end = time.perf_counter()
+                with lock:
+                    res.timing[key] = {
+                        "start": round((start - t0) * 1000, 1),
+                        "end": round((end - t0) * 1000, 1),
+                        "ms": round((end - start) * 1000, 1),
+                    }
+
+        pending = dict(self._nodes)
+        running = {}  # future -> key
+        deferred = []
+        done_keys: set[str] = set()
+
+        def take_ready() -> list[str]:
+            ready = []
+            for key in list(pending):
+                node = pending[key]
+                # after_response 노드끼리는 앞선 after_response 노드에 의존 가능 (정의 순서대로 실행)
+                if all(
+                    d in done_keys or (node["after"] and (d in deferred or d not in self._nodes))
+                    for d in node["deps"]
+                ):
+                    del pending[key]
+                    if node["after"]:
+                        deferred.append(key)
+                    else:
+                        ready.append(key)
+            return ready
+
+        pool = None  # 동시에 준비된 노드가 생길 때 만드는 이 run() 전용 풀
+        try:
+            ready = take_ready()
+            while ready or running:
+                if len(ready) == 1 and not running:
+                    # 직선 구간: 풀로 넘기지 않고 지금 스레드에서 실행
+                    key = ready.pop()
+                    res[key] = call(key)
+                    done_keys.add(key)
+                else:
+                    if pool is None:
+                        pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"dag-{self.name}")
+                    for key in ready:
+                        running[pool.submit(call, key)] = key
+                    ready = []
+                    finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                    for fut in finished:
+                        key = running.pop(fut)
+                        exc = fut.exception()
+                        if exc is not None:
+                            raise exc
+                        res[key] = fut.result()
+                        done_keys.add(key)
+                ready += take_ready()
+        finally:
+            if pool is not None:
+                # 실패 시 아직 시작 안 한 노드는 취소, 실행 중인 노드는 끝나면 스레드 정리
+                pool.shutdown(wait=False, cancel_futures=True)
+
+        if pending:
+            raise RuntimeError(f"[{self.name}] 실행되지 못한 노드: {list(pending)}")
+
+        # 응답 뒤에 해도 되는 노드: release() 때 의존 순서대로 한 작업 안에서 실행
+        if deferred:
+            def run_deferred():
+                for key in deferred:
+                    try:
+                        res[key] = call(key)
+                    except Exception as e:
+                        print(f"[DAG] {self.name}.{key} (after_response) error: {e}")
+
+            res._release = lambda: _AFTER_POOL.submit(run_deferred)
+        return res
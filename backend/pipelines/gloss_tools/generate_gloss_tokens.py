@@ -15,6 +15,7 @@ from pathlib import Path
 # 기본 경로
 # --------------------------------
 ROOT_DIR       = Path(__file__).resolve().parent
+BACKEND_DIR    = ROOT_DIR.parent.parent
 SCRIPT_PATH    = ROOT_DIR / "script.txt"
 GLOSS_OUT_PATH = ROOT_DIR / "gloss_tokens_merged.txt"
 
@@ -22,14 +23,20 @@ GLOSS_OUT_PATH = ROOT_DIR / "gloss_tokens_merged.txt"
 API_KEY = os.environ.get("GOOGLE_API_KEY", "")
 MODEL_NAME = "models/gemini-2.5-flash"
 
+# core.llm_transport (live / record / replay) 사용을 위해 backend/를 import 경로에 추가
+sys.path.insert(0, str(BACKEND_DIR))
+from core.llm_transport import TRANSPORT, wrap_model  # noqa: E402
+
 # --------------------------------
 # Gemini 로드
 # --------------------------------
 try:
     import google.generativeai as genai
 except Exception as e:
-    print(f"[Error] google.generativeai import 실패: {e}")
-    sys.exit(1)
+    genai = None
+    if not TRANSPORT.offline:
+        print(f"[Error] google.generativeai import 실패: {e}")
+        sys.exit(1)
 
 
 def norm(s: str) -> str:
@@ -39,12 +46,12 @@ def norm(s: str) -> str:
 
 
 def build_model():
-    """Gemini 모델 생성."""
-    if not API_KEY:
-        print("[Error] GOOGLE_API_KEY 미설정")
-        sys.exit(1)
-
-    genai.configure(api_key=API_KEY)
+    """Gemini 모델 생성. (LLM_TRANSPORT=replay면 키 없이 cassette 사용)"""
+    if not TRANSPORT.offline:
+        if not API_KEY:
+            print("[Error] GOOGLE_API_KEY 미설정")
+            sys.exit(1)
+        genai.configure(api_key=API_KEY)
 
     sys_prompt = (
         "역할: 한국어 전사 교정 + 수어 글로스 추출기.\n"
@@ -55,13 +62,17 @@ def build_model():
         "3) 예: ['정기예금','만기','이자','보호']"
     )
 
-    return genai.GenerativeModel(
+    return wrap_model(
         MODEL_NAME,
-        system_instruction=sys_prompt,
-        generation_config={
-            "response_mime_type": "application/json",
-            "temperature": 0.2,
-        },
+        sys_prompt,
+        lambda: genai.GenerativeModel(
+            MODEL_NAME,
+            system_instruction=sys_prompt,
+            generation_config={
+                "response_mime_type": "application/json",
+                "temperature": 0.2,
+            },
+        ),
     )
 
 
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+GLOSS_MP4_DIR 아래(fi, li 등)의 모든 수어 클립을 표준 프로파일
+(video_profile.CANONICAL_*: libx264 high / 1280x720 / 30fps / timescale 90000 /
+첫 프레임 키프레임)로 한 번만 재인코딩하는 오프라인 배치 스크립트.
+
+- 여러 ffmpeg 프로세스를 병렬로 실행 (--workers)
+- 원본 mtime/size가 그대로이고 프로파일이 같으면 건너뜀 (증분 실행)
+- 결과는 GLOSS_NORM_DIR/<gloss_id>.mp4, 목록은 manifest.json
+  → pipeline.build_video_index가 manifest를 읽어 정규화본을 우선 사용하므로
+    문장 합성(concat -c copy)에서 재인코딩이 필요 없다.
+
+사용:
+    python normalize_clips.py --src D:/.../service [--workers 4]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+ROOT_DIR    = Path(__file__).resolve().parent
+BACKEND_DIR = ROOT_DIR.parent.parent
+
+sys.path.insert(0, str(BACKEND_DIR))
+from pipelines.video_profile import (  # noqa: E402
+    CANONICAL_ENCODE_ARGS,
+    CANONICAL_VF,
+    GLOSS_NORM_DIR,
+    NORM_MANIFEST_PATH,
+    PROFILE_ID,
+    load_norm_manifest,
+)
+
+
+def normalize_one(src: Path, dst: Path) -> None:
+    """원본 1개 → 표준 프로파일 mp4 (임시 파일에 쓰고 교체)."""
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=dst.parent, suffix=".mp4")
+    os.close(fd)
+    cmd = [
+        "ffmpeg", "-y",
+        "-i", str(src),
+        "-vf", CANONICAL_VF,
+        *CANONICAL_ENCODE_ARGS,
+        "-movflags", "+faststart",
+        "-loglevel", "error",
+        tmp,
+    ]
+    try:
+        subprocess.run(cmd, check=True)
+        os.replace(tmp, dst)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--src", default=os.getenv("GLOSS_MP4_DIR", ""), help="원본 클립 루트 폴더")
+    ap.add_argument("--out", default=str(GLOSS_NORM_DIR), help="정규화 클립 저장 폴더")
+    ap.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    ap.add_argument("--force", action="store_true", help="변경 여부와 관계없이 전부 다시 인코딩")
+    args = ap.parse_args()
+
+    src_root = Path(args.src)
+    out_root = Path(args.out)
+    if not args.src or not src_root.exists():
+        print(f"[Error] 원본 폴더 없음: {args.src!r} (--src 또는 GLOSS_MP4_DIR 지정)")
+        sys.exit(1)
+
+    manifest_path = out_root / NORM_MANIFEST_PATH.name
+    old = {} if args.force else (load_norm_manifest(manifest_path).get("clips") or {})
+
+    clips: dict[str, dict] = {}
+    jobs = []
+    for src in sorted(src_root.rglob("*.mp4")):
+        gid = src.stem
+        st = src.stat()
+        dst = out_root / f"{gid}.mp4"
+        item = {
+            "src": str(src.resolve()),
+            "src_mtime_ns": st.st_mtime_ns,
+            "src_size": st.st_size,
+            "out": str(dst.resolve()),
+        }
+        prev = old.get(gid)
+        if (
+            prev
+            and prev.get("src_mtime_ns") == item["src_mtime_ns"]
+            and prev.get("src_size") == item["src_size"]
+            and dst.exists()
+        ):
+            clips[gid] = prev
+            continue
+        jobs.append((gid, src, dst, item))
+
+    print(f"[Normalize] total={len(clips) + len(jobs)}, todo={len(jobs)}, workers={args.workers}")
+
+    failed = []
+    with ThreadPoolExecutor(max_workers=args.workers) as ex:
+        futs = {ex.submit(normalize_one, src, dst): (gid, item) for gid, src, dst, item in jobs}
+        for i, fut in enumerate(as_completed(futs), 1):
+            gid, item = futs[fut]
+            try:
+                fut.result()
+                clips[gid] = item
+            except Exception as e:
+                failed.append(gid)
+                print(f"[Normalize] 실패 {gid}: {e}")
+            if i % 100 == 0:
+                print(f"[Normalize] {i}/{len(jobs)}")
+
+    out_root.mkdir(parents=True, exist_ok=True)
+    manifest = {
+        "profile_id": PROFILE_ID,
+        "encode_args": CANONICAL_ENCODE_ARGS,
+        "vf": CANONICAL_VF,
+        "updated_at": datetime.now().isoformat(timespec="seconds"),
+        "clips": clips,
+    }
+    fd, tmp = tempfile.mkstemp(dir=out_root, suffix=".json")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, manifest_path)
+
+    print(f"[Done] normalized={len(clips)}, failed={len(failed)}")
+    print(f"[Done] manifest: {manifest_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+hls.py
+서버 concat 대신 HLS 재생목록(m3u8)으로 문장 영상 전달
+
+- 클립(수어 mp4 / 텍스트 카드 / 빈 화면)마다 MPEG-TS 세그먼트를 한 번만 만들어 둠
+  (표준 프로파일 클립은 remux만, 나머지는 표준 프로파일로 재인코딩)
+- 세그먼트가 이미 있는 클립은 요청 시 m3u8 문자열만 만들어 저장 → ffmpeg/ffprobe 없음
+- 세그먼트가 없는 클립(예열 안 된 수어 클립, 새로 만든 텍스트 카드 등)은
+  그 요청 안에서 ffmpeg 1번 + ffprobe 1번으로 만듦 (다음 요청부터는 재사용)
+- 세그먼트 파일명은 (원본 경로, mtime, size, 프로파일) 해시라 원본이 바뀌면 새로 생성
+
+오프라인 예열:
+    python -m pipelines.hls        # VIDEO_PATH_INDEX의 모든 수어 클립 세그먼트 생성
+"""
+
+import hashlib
+import json
+import math
+import os
+import subprocess
+import tempfile
+from pathlib import Path
+
+from core.tracing import traced
+
+from .pipeline import GLOSS_MP4_DIR, MEDIA_ROOT
+from .video_profile import CANONICAL_ENCODE_ARGS, CANONICAL_VF, GLOSS_NORM_DIR, PROFILE_ID
+
+HLS_DIR = MEDIA_ROOT / "hls"
+SEGMENT_DIR = HLS_DIR / "segments"
+PLAYLIST_DIR = HLS_DIR / "playlists"
+HLS_URL_PREFIX = "/media/hls"
+
+for d in (SEGMENT_DIR, PLAYLIST_DIR):
+    d.mkdir(parents=True, exist_ok=True)
+
+# mp4 전용 muxer 옵션은 mpegts 출력에서 빼야 함
+_TS_ENCODE_ARGS = []
+_skip = False
+for _a in CANONICAL_ENCODE_ARGS:
+    if _skip:
+        _skip = False
+        continue
+    if _a == "-video_track_timescale":
+        _skip = True
+        continue
+    _TS_ENCODE_ARGS.append(_a)
+
+
+def _is_canonical(path: Path) -> bool:
+    """표준 프로파일로 만들어진 클립인지 (정규화본 또는 서버가 생성한 카드/빈 화면)."""
+    p = str(path.resolve())
+    if p.startswith(str(GLOSS_NORM_DIR.resolve())):
+        return True
+    return not p.startswith(str(GLOSS_MP4_DIR.resolve()))
+
+
+def _segment_key(path: Path) -> str:
+    st = path.stat()
+    sig = f"{path.resolve()}|{st.st_mtime_ns}|{st.st_size}|{PROFILE_ID}"
+    return hashlib.sha1(sig.encode("utf-8")).hexdigest()[:20]
+
+
+@traced("ffprobe")
+def _probe_duration(path: Path) -> float:
+    cmd = [
+        "ffprobe", "-v", "error",
+        "-show_entries", "format=duration",
+        "-of", "json",
+        str(path),
+    ]
+    r = subprocess.run(cmd, capture_output=True, text=True)
+    if r.returncode != 0:
+        return 0.0
+    try:
+        return float(json.loads(r.stdout)["format"]["duration"])
+    except Exception:
+        return 0.0
+
+
+def ensure_segment(src: str | Path) -> tuple[str, float]:
+    """
+    클립 1개의 TS 세그먼트를 보장하고 (세그먼트 파일명, 길이초) 반환.
+    이미 있으면 sidecar json만 읽고 끝.
+    """
+    src = Path(src)
+    key = _segment_key(src)
+    seg = SEGMENT_DIR / f"{key}.ts"
+    meta = SEGMENT_DIR / f"{key}.json"
+
+    if seg.exists() and meta.exists():
+        try:
+            with meta.open("r", encoding="utf-8") as f:
+                return seg.name, float(json.load(f)["duration"])
+        except Exception:
+            pass
+
+    fd, tmp = tempfile.mkstemp(dir=SEGMENT_DIR, suffix=".ts")
+    os.close(fd)
+    if _is_canonical(src):
+        codec_args = ["-c", "copy", "-bsf:v", "h264_mp4toannexb"]
+    else:
+        codec_args = ["-vf", CANONICAL_VF, *_TS_ENCODE_ARGS]
+    cmd = [
+        "ffmpeg", "-y",
+        "-i", str(src),
+        *codec_args,
+        "-f", "mpegts",
+        "-loglevel", "error",
+        tmp,
+    ]
+    try:
+        subprocess.run(cmd, check=True)
+        os.replace(tmp, seg)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+    duration = _probe_duration(seg)
+    with meta.open("w", encoding="utf-8") as f:
+        json.dump({"src": str(src), "duration": duration}, f, ensure_ascii=False)
+    return seg.name, duration
+
+
+def build_playlist(video_paths: list[str]) -> tuple[Path | None, str | None, float]:
+    """
+    클립 경로 리스트 → VOD m3u8 저장.
+    세그먼트가 없는 클립은 ensure_segment가 여기서 동기로 만듦 (클립당 ffmpeg + ffprobe).
+    반환: (m3u8 절대경로, URL, 전체 길이초)
+    """
+    segments = [ensure_segment(p) for p in video_paths or []]
+    if not segments:
+        return None, None, 0.0
+
+    key = hashlib.sha1("|".join(name for name, _ in segments).encode("utf-8")).hexdigest()[:24]
+    name = f"sent_{key}.m3u8"
+    out = PLAYLIST_DIR / name
+    total = sum(d for _, d in segments)
+    url = f"{HLS_URL_PREFIX}/playlists/{name}"
+
+    if out.exists():
+        return out, url, total
+
+    target = max(1, math.ceil(max(d for _, d in segments)))
+    lines = [
+        "#EXTM3U",
+        "#EXT-X-VERSION:3",
+        "#EXT-X-PLAYLIST-TYPE:VOD",
+        f"#EXT-X-TARGETDURATION:{target}",
+        "#EXT-X-MEDIA-SEQUENCE:0",
+    ]
+    for i, (seg_name, dur) in enumerate(segments):
+        if i > 0:
+            # 클립마다 타임스탬프가 0부터 시작하므로 경계마다 discontinuity 표시
+            lines.append("#EXT-X-DISCONTINUITY")
+        lines.append(f"#EXTINF:{dur:.3f},")
+        lines.append(f"../segments/{seg_name}")
+    lines.append("#EXT-X-ENDLIST")
+
+    fd, tmp = tempfile.mkstemp(dir=PLAYLIST_DIR, suffix=".m3u8")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp, out)
+    return out, url, total
+
+
+if __name__ == "__main__":
+    from concurrent.futures import ThreadPoolExecutor
+
+    from .pipeline import VIDEO_PATH_INDEX
+
+    paths = sorted(set(VIDEO_PATH_INDEX.values()))
+    print(f"[HLS] 세그먼트 예열: {len(paths)}개")
+    with ThreadPoolExecutor(max_workers=max(1, (os.cpu_count() or 2) // 2)) as ex:
+        for i, _ in enumerate(ex.map(ensure_segment, paths), 1):
+            if i % 200 == 0:
+                print(f"[HLS] {i}/{len(paths)}")
+    print("[HLS] done")
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+morph.py
+Gemini 없이 쓰는 로컬 조사/어미 제거기 (suffix trie 기반)
+
+역할:
+- morph_suffixes.json(조사 목록 + 어미→기본형 접미사)를 뒤집어서 trie로 구성
+- 토큰 끝에서부터 trie를 한 번만 훑어 가능한 절단 위치를 모두 찾음
+- 잘라낸 어간(또는 어간+기본형 접미사)이 글로스 사전에 있으면 그 단어를 사용
+  예) "신분증을" -> "신분증", "가능합니다" -> "가능", "잊어버렸어요" -> "잊어버리다"
+- 결과는 인스턴스 단위로 캐시해서 같은 토큰은 dict 조회 한 번으로 끝남
+"""
+
+import json
+from pathlib import Path
+
+_END = "$"
+
+
+class SuffixTrie:
+    """접미사를 뒤집어서 저장하는 trie. 단어 끝에서부터 매칭한다."""
+
+    def __init__(self):
+        self.root: dict = {}
+
+    def add(self, suffix: str, info):
+        node = self.root
+        for ch in reversed(suffix):
+            node = node.setdefault(ch, {})
+        node.setdefault(_END, []).append(info)
+
+    def matches(self, word: str) -> list[tuple[int, object]]:
+        """
+        word 끝에 붙은 모든 접미사를 (길이, info) 리스트로 반환.
+        긴 접미사가 먼저 오도록 정렬.
+        """
+        out = []
+        node = self.root
+        n = 0
+        for ch in reversed(word):
+            node = node.get(ch)
+            if node is None:
+                break
+            n += 1
+            for info in node.get(_END, ()):
+                out.append((n, info))
+        out.reverse()
+        return out
+
+
+class MorphStripper:
+    """
+    조사/어미를 떼어 사전 표제어에 맞춘 어간을 돌려준다.
+
+    vocab: 사전 표제어 집합(공백 제거형, load_gloss_index()["exact"]의 key)
+    particles: 조사 리스트
+    endings: {어미: 기본형 접미사} (예: {"습니다": "다", "합니다": "하다"})
+    """
+
+    MAX_DEPTH = 2  # "개설하기를" -> "를" -> "하기" 처럼 두 번까지 벗김
+
+    def __init__(self, vocab=None, particles=None, endings=None):
+        self.vocab = set(vocab or ())
+        self.trie = SuffixTrie()
+        for p in particles or ():
+            if p:
+                self.trie.add(p, ("particle", ""))
+        for e, lemma in (endings or {}).items():
+            if e:
+                self.trie.add(e, ("ending", lemma or ""))
+        self._cache: dict[str, str] = {}
+
+    @classmethod
+    def from_file(cls, path: Path | str, vocab=None) -> "MorphStripper":
+        path = Path(path)
+        data = {}
+        if path.exists():
+            try:
+                with path.open("r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except Exception as e:
+                print(f"[Morph] suffix 파일 로드 실패: {e}")
+        return cls(
+            vocab=vocab,
+            particles=data.get("particles") or [],
+            endings=data.get("endings") or {},
+        )
+
+    def _candidates(self, word: str, depth: int):
+        """(후보 단어, 폴백 허용 여부) 를 긴 절단부터 순서대로 생성."""
+        for n, (kind, lemma) in self.trie.matches(word):
+            stem = word[:-n]
+            if not stem:
+                continue
+            if kind == "particle":
+                yield stem, len(stem) >= 2
+            else:
+                # 기본형(어간+다)을 먼저 본다: "먹습니다" -> "먹다"가 "먹"보다 우선
+                if lemma:
+                    yield stem + lemma, n >= 2
+                yield stem, n >= 2 and len(stem) >= 2
+            if depth + 1 < self.MAX_DEPTH:
+                yield from (
+                    (c, False) for c, _ in self._candidates(stem, depth + 1)
+                )
+
+    def strip(self, word: str) -> str:
+        """토큰 하나를 사전 정렬된 어간으로 변환. 못 찾으면 원형 유지."""
+        w = (word or "").strip()
+        if not w:
+            return w
+
+        hit = self._cache.get(w)
+        if hit is not None:
+            return hit
+
+        if w in self.vocab:
+            self._cache[w] = w
+            return w
+
+        fallback = None
+        out = None
+        for cand, allow_fallback in self._candidates(w, 0):
+            if cand in self.vocab:
+                out = cand
+                break
+            if fallback is None and allow_fallback:
+                fallback = cand
+
+        if out is None:
+            # 사전을 못 쓰는 경우(vocab 비어 있음 등)에도 조사 정도는 떼어줌
+            out = fallback or w
+
+        self._cache[w] = out
+        return out
+
+    def strip_all(self, words: list[str]) -> list[str]:
+        return [s for s in (self.strip(w) for w in words or []) if s]
@@ -0,0 +1,525 @@
+# -*- coding: utf-8 -*-
+"""
+mp4concat.py
+ffmpeg 프로세스 없이 MP4 클립을 이어붙이는 box 단위 concat
+
+조건 (모두 만족할 때만 사용, 아니면 Mp4ConcatError → 호출 측에서 ffmpeg로 폴백):
+- 입력마다 비디오 트랙 1개, mdat 1개, 조각(fragmented) MP4 아님
+- stsd(코덱 헤더: avcC SPS/PPS 포함) 바이트가 동일 (정보용 btrt 비트레이트 box는 무시)
+- mdhd timescale, mvhd timescale이 동일
+  (B-프레임 지연(elst 시작 시점)이 다른 클립은 ctts를 보정해서 가장 큰 지연에 맞춤)
+
+동작:
+- 각 입력의 moov만 읽어서 샘플 테이블(stts/ctts/stss/stsz/stsc/stco)을 이어붙이고
+  청크 오프셋을 새 mdat 위치 기준으로 보정
+- 출력 = ftyp + moov + mdat, mdat 페이로드는 os.sendfile(없으면 mmap)로 그대로 복사
+"""
+
+import copy
+import mmap
+import os
+import struct
+
+CONTAINER_TYPES = {b"moov", b"trak", b"mdia", b"minf", b"stbl", b"edts", b"dinf"}
+KNOWN_STBL = {b"stsd", b"stts", b"ctts", b"stss", b"stsz", b"stsc", b"stco", b"co64", b"sdtp"}
+U32_MAX = 0xFFFFFFFF
+
+
+class Mp4ConcatError(Exception):
+    """입력이 box 단위 concat 조건을 만족하지 않음 (ffmpeg 폴백 필요)."""
+
+
+# ======================================================================
+# box 파싱/직렬화
+# ======================================================================
+class Box:
+    __slots__ = ("type", "payload", "children")
+
+    def __init__(self, btype: bytes, payload: bytes = b"", children=None):
+        self.type = btype
+        self.payload = payload
+        self.children = children
+
+    def find(self, btype: bytes):
+        for c in self.children or ():
+            if c.type == btype:
+                return c
+        return None
+
+    def find_all(self, btype: bytes):
+        return [c for c in self.children or () if c.type == btype]
+
+    def serialize(self) -> bytes:
+        if self.children is not None:
+            body = b"".join(c.serialize() for c in self.children)
+        else:
+            body = self.payload
+        size = 8 + len(body)
+        if size > U32_MAX:
+            return struct.pack(">I4sQ", 1, self.type, size + 8) + body
+        return struct.pack(">I4s", size, self.type) + body
+
+
+def _parse_boxes(buf: bytes, start: int = 0, end: int | None = None) -> list[Box]:
+    end = len(buf) if end is None else end
+    out = []
+    pos = start
+    while pos + 8 <= end:
+        size, btype = struct.unpack_from(">I4s", buf, pos)
+        hdr = 8
+        if size == 1:
+            size = struct.unpack_from(">Q", buf, pos + 8)[0]
+            hdr = 16
+        elif size == 0:
+            size = end - pos
+        if size < hdr or pos + size > end:
+            raise Mp4ConcatError(f"잘못된 box 크기: {btype!r}")
+        if btype in CONTAINER_TYPES:
+            out.append(Box(btype, children=_parse_boxes(buf, pos + hdr, pos + size)))
+        else:
+            out.append(Box(btype, payload=bytes(buf[pos + hdr : pos + size])))
+        pos += size
+    return out
+
+
+def _scan_top_level(path: str):
+    """
+    파일 최상위 box를 훑어서 ftyp/moov 바이트와 mdat 페이로드 위치만 얻는다.
+    (mdat 본문은 읽지 않음)
+    """
+    ftyp = moov = None
+    mdats = []
+    file_size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        pos = 0
+        while pos + 8 <= file_size:
+            f.seek(pos)
+            hdr = f.read(16)
+            size, btype = struct.unpack_from(">I4s", hdr, 0)
+            hlen = 8
+            if size == 1:
+                size = struct.unpack_from(">Q", hdr, 8)[0]
+                hlen = 16
+            elif size == 0:
+                size = file_size - pos
+            if size < hlen:
+                raise Mp4ConcatError(f"잘못된 최상위 box: {path}")
+            if btype == b"ftyp":
+                f.seek(pos)
+                ftyp = f.read(size)
+            elif btype == b"moov":
+                f.seek(pos + hlen)
+                moov = Box(b"moov", children=_parse_boxes(f.read(size - hlen)))
+            elif btype == b"mdat":
+                mdats.append((pos + hlen, size - hlen))
+            elif btype == b"moof":
+                raise Mp4ConcatError(f"fragmented MP4는 지원하지 않음: {path}")
+            pos += size
+    if ftyp is None or moov is None or len(mdats) != 1:
+        raise Mp4ConcatError(f"ftyp/moov/mdat 구성이 예상과 다름: {path}")
+    return ftyp, moov, mdats[0]
+
+
+# ======================================================================
+# 개별 box 읽기/쓰기
+# ======================================================================
+def _full_header(payload: bytes) -> tuple[int, int]:
+    return payload[0], int.from_bytes(payload[1:4], "big")
+
+
+def _u32_table(payload: bytes, offset: int, count: int, width: int = 1) -> list:
+    return list(struct.unpack_from(f">{count * width}I", payload, offset))
+
+
+def _read_mvhd_or_mdhd(payload: bytes) -> tuple[int, int]:
+    """(timescale, duration)"""
+    if payload[0] == 1:
+        return struct.unpack_from(">IQ", payload, 20)
+    return struct.unpack_from(">II", payload, 12)
+
+
+def _write_duration_mvhd_or_mdhd(payload: bytes, duration: int) -> bytes:
+    b = bytearray(payload)
+    if b[0] == 1:
+        struct.pack_into(">Q", b, 24, duration)
+    else:
+        struct.pack_into(">I", b, 16, min(duration, U32_MAX))
+    return bytes(b)
+
+
+def _write_duration_tkhd(payload: bytes, duration: int) -> bytes:
+    b = bytearray(payload)
+    if b[0] == 1:
+        struct.pack_into(">Q", b, 28, duration)
+    else:
+        struct.pack_into(">I", b, 20, min(duration, U32_MAX))
+    return bytes(b)
+
+
+def _read_elst(payload: bytes) -> list[tuple[int, int, int]]:
+    version, _ = _full_header(payload)
+    count = struct.unpack_from(">I", payload, 4)[0]
+    out = []
+    pos = 8
+    for _ in range(count):
+        if version == 1:
+            dur, mt = struct.unpack_from(">Qq", payload, pos)
+            pos += 16
+        else:
+            dur, mt = struct.unpack_from(">Ii", payload, pos)
+            pos += 8
+        rate = struct.unpack_from(">I", payload, pos)[0]
+        pos += 4
+        out.append((dur, mt, rate))
+    return out
+
+
+def _write_elst(entries: list[tuple[int, int, int]]) -> bytes:
+    v1 = any(d > U32_MAX for d, _, _ in entries)
+    out = struct.pack(">B3sI", 1 if v1 else 0, b"\0\0\0", len(entries))
+    for dur, mt, rate in entries:
+        out += struct.pack(">Qq" if v1 else ">Ii", dur, mt) + struct.pack(">I", rate)
+    return out
+
+
+# VisualSampleEntry 고정 필드 길이 (box 헤더 8바이트 뒤)
+_VISUAL_ENTRY_FIXED = 78
+
+
+def _codec_config(stsd: bytes) -> bytes:
+    """
+    비교용 stsd: 샘플 엔트리의 하위 box 중 btrt(비트레이트 통계)를 뺀 바이트.
+    같은 인코더 설정이라도 클립마다 btrt 값은 달라서 그대로 비교하면 항상 불일치가 난다.
+    """
+    try:
+        count = struct.unpack_from(">I", stsd, 4)[0]
+        pos = 8
+        out = [stsd[:8]]
+        for _ in range(count):
+            size = struct.unpack_from(">I", stsd, pos)[0]
+            entry = stsd[pos : pos + size]
+            head = entry[: 8 + _VISUAL_ENTRY_FIXED]
+            kids = [
+                b.serialize()
+                for b in _parse_boxes(entry, 8 + _VISUAL_ENTRY_FIXED)
+                if b.type != b"btrt"
+            ]
+            out.append(head + b"".join(kids))
+            pos += size
+        return b"".join(out)
+    except (struct.error, Mp4ConcatError):
+        return stsd
+
+
+class _Track:
+    """입력 파일 1개의 비디오 트랙 샘플 테이블."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.ftyp, self.moov, (self.mdat_start, self.mdat_size) = _scan_top_level(path)
+
+        if self.moov.find(b"mvex") is not None:
+            raise Mp4ConcatError(f"fragmented MP4는 지원하지 않음: {path}")
+        traks = self.moov.find_all(b"trak")
+        if len(traks) != 1:
+            raise Mp4ConcatError(f"트랙이 1개가 아님({len(traks)}): {path}")
+        self.trak = traks[0]
+        mdia = self.trak.find(b"mdia")
+        hdlr = mdia.find(b"hdlr") if mdia else None
+        if hdlr is None or hdlr.payload[8:12] != b"vide":
+            raise Mp4ConcatError(f"비디오 트랙이 아님: {path}")
+        self.stbl = mdia.find(b"minf").find(b"stbl")
+
+        for c in self.stbl.children:
+            if c.type not in KNOWN_STBL:
+                raise Mp4ConcatError(f"지원하지 않는 stbl box {c.type!r}: {path}")
+
+        self.movie_ts, _ = _read_mvhd_or_mdhd(self.moov.find(b"mvhd").payload)
+        self.media_ts, _ = _read_mvhd_or_mdhd(mdia.find(b"mdhd").payload)
+        self.stsd = self.stbl.find(b"stsd").payload
+
+        # stts
+        p = self.stbl.find(b"stts").payload
+        n = struct.unpack_from(">I", p, 4)[0]
+        flat = _u32_table(p, 8, n, 2)
+        self.stts = list(zip(flat[0::2], flat[1::2]))
+        self.sample_count = sum(c for c, _ in self.stts)
+        self.media_duration = sum(c * d for c, d in self.stts)
+
+        # ctts (옵션)
+        ctts = self.stbl.find(b"ctts")
+        self.ctts_version = None
+        self.ctts = []
+        if ctts is not None:
+            self.ctts_version = ctts.payload[0]
+            n = struct.unpack_from(">I", ctts.payload, 4)[0]
+            fmt = ">" + ("Ii" if self.ctts_version == 1 else "II") * n
+            flat = struct.unpack_from(fmt, ctts.payload, 8)
+            self.ctts = list(zip(flat[0::2], flat[1::2]))
+
+        # stss (없으면 전부 키프레임)
+        stss = self.stbl.find(b"stss")
+        if stss is not None:
+            n = struct.unpack_from(">I", stss.payload, 4)[0]
+            self.stss = _u32_table(stss.payload, 8, n)
+        else:
+            self.stss = None
+
+        # stsz
+        p = self.stbl.find(b"stsz")
+        if p is None:
+            raise Mp4ConcatError(f"stsz 없음(stz2 미지원): {self.path}")
+        p = p.payload
+        uniform, n = struct.unpack_from(">II", p, 4)
+        self.stsz_uniform = uniform
+        self.stsz = [] if uniform else _u32_table(p, 12, n)
+
+        # stsc
+        p = self.stbl.find(b"stsc").payload
+        n = struct.unpack_from(">I", p, 4)[0]
+        flat = _u32_table(p, 8, n, 3)
+        self.stsc = list(zip(flat[0::3], flat[1::3], flat[2::3]))
+
+        # stco / co64
+        stco = self.stbl.find(b"stco")
+        co64 = self.stbl.find(b"co64")
+        if stco is not None:
+            n = struct.unpack_from(">I", stco.payload, 4)[0]
+            self.chunks = _u32_table(stco.payload, 8, n)
+        elif co64 is not None:
+            n = struct.unpack_from(">I", co64.payload, 4)[0]
+            self.chunks = list(struct.unpack_from(f">{n}Q", co64.payload, 8))
+        else:
+            raise Mp4ConcatError(f"청크 오프셋 테이블 없음: {path}")
+        lo, hi = self.mdat_start, self.mdat_start + self.mdat_size
+        if any(not (lo <= c < hi) for c in self.chunks):
+            raise Mp4ConcatError(f"mdat 밖을 가리키는 청크가 있음: {path}")
+
+        sdtp = self.stbl.find(b"sdtp")
+        self.sdtp = sdtp.payload[4:] if sdtp is not None else None
+
+        edts = self.trak.find(b"edts")
+        elst = edts.find(b"elst") if edts is not None else None
+        self.elst = _read_elst(elst.payload) if elst is not None else []
+
+    @property
+    def media_start(self) -> int:
+        """편집 목록이 건너뛰는 미디어 시작 시점 (B-프레임 지연 등)."""
+        for dur, mt, _ in self.elst:
+            if mt >= 0:
+                return mt
+        return 0
+
+    def signature(self):
+        return (
+            _codec_config(self.stsd),
+            self.movie_ts,
+            self.media_ts,
+            self.sdtp is not None,
+        )
+
+
+# ======================================================================
+# concat
+# ======================================================================
+def probe_tracks(paths: list[str]) -> list[_Track]:
+    """모든 입력을 파싱하고 코덱 헤더/타임스케일 호환 여부 확인."""
+    if not paths:
+        raise Mp4ConcatError("입력 없음")
+    tracks = [_Track(str(p)) for p in paths]
+    sig = tracks[0].signature()
+    for t in tracks[1:]:
+        if t.signature() != sig:
+            raise Mp4ConcatError(f"코덱 파라미터가 다름: {t.path}")
+    return tracks
+
+
+def _build_moov(tracks: list[_Track], chunk_offsets: list[int], use_co64: bool) -> bytes:
+    first = tracks[0]
+    moov = copy.deepcopy(first.moov)
+    trak = moov.find(b"trak")
+    mdia = trak.find(b"mdia")
+    stbl = mdia.find(b"minf").find(b"stbl")
+
+    media_duration = sum(t.media_duration for t in tracks)
+    # 편집 목록은 media_start만큼 건너뛰고 전체 길이만큼 재생
+    movie_duration = media_duration * first.movie_ts // first.media_ts
+
+    # --- 샘플 테이블 병합 ---
+    stts: list[list[int]] = []
+    for t in tracks:
+        for c, d in t.stts:
+            if stts and stts[-1][1] == d:
+                stts[-1][0] += c
+            else:
+                stts.append([c, d])
+
+    # B-프레임 지연(elst 시작 시점)이 가장 큰 클립에 맞춰 나머지 클립의 ctts를 밀어줌
+    # (ctts가 없는 클립 = 모든 샘플 오프셋 0)
+    media_start = max(t.media_start for t in tracks)
+    need_ctts = any(t.ctts for t in tracks) or media_start > 0
+    ctts = []
+    if need_ctts:
+        for t in tracks:
+            shift = media_start - t.media_start
+            if t.ctts:
+                ctts.extend((c, o + shift) for c, o in t.ctts)
+            else:
+                ctts.append((t.sample_count, shift))
+    ctts_version = 1 if any(o < 0 for _, o in ctts) else 0
+
+    any_stss = any(t.stss is not None for t in tracks)
+    stss = []
+    stsz_uniform = first.stsz_uniform if all(t.stsz_uniform == first.stsz_uniform for t in tracks) else 0
+    stsz = []
+    stsc = []
+    sdtp = b""
+    base_sample = 0
+    base_chunk = 0
+    for t in tracks:
+        if any_stss:
+            if t.stss is None:
+                stss.extend(base_sample + i for i in range(1, t.sample_count + 1))
+            else:
+                stss.extend(base_sample + s for s in t.stss)
+        if not stsz_uniform:
+            stsz.extend(t.stsz if not t.stsz_uniform else [t.stsz_uniform] * t.sample_count)
+        for fc, spc, sdi in t.stsc:
+            stsc.append((base_chunk + fc, spc, sdi))
+        if t.sdtp is not None:
+            sdtp += t.sdtp
+        base_sample += t.sample_count
+        base_chunk += len(t.chunks)
+
+    total_samples = base_sample
+    vf = b"\0\0\0\0"
+
+    new_children = []
+    for c in stbl.children:
+        if c.type == b"stsd":
+            new_children.append(c)
+        elif c.type == b"stts":
+            flat = [x for e in stts for x in e]
+            new_children.append(Box(b"stts", vf + struct.pack(f">I{len(flat)}I", len(stts), *flat)))
+        elif c.type == b"stss":
+            new_children.append(Box(b"stss", vf + struct.pack(f">I{len(stss)}I", len(stss), *stss)))
+        elif c.type == b"stsz":
+            body = struct.pack(">II", stsz_uniform, total_samples)
+            if not stsz_uniform:
+                body += struct.pack(f">{len(stsz)}I", *stsz)
+            new_children.append(Box(b"stsz", vf + body))
+        elif c.type == b"stsc":
+            flat = [x for e in stsc for x in e]
+            new_children.append(Box(b"stsc", vf + struct.pack(f">I{len(flat)}I", len(stsc), *flat)))
+        elif c.type in (b"stco", b"co64"):
+            if use_co64:
+                body = struct.pack(f">I{len(chunk_offsets)}Q", len(chunk_offsets), *chunk_offsets)
+                new_children.append(Box(b"co64", vf + body))
+            else:
+                body = struct.pack(f">I{len(chunk_offsets)}I", len(chunk_offsets), *chunk_offsets)
+                new_children.append(Box(b"stco", vf + body))
+        elif c.type == b"sdtp":
+            new_children.append(Box(b"sdtp", vf + sdtp))
+    # 첫 입력에 stss가 없었는데 다른 입력에 있는 경우
+    if any_stss and stbl.find(b"stss") is None:
+        new_children.append(Box(b"stss", vf + struct.pack(f">I{len(stss)}I", len(stss), *stss)))
+    if ctts:
+        fmt = ("Ii" if ctts_version == 1 else "II") * len(ctts)
+        flat = [x for e in ctts for x in e]
+        payload = bytes([ctts_version]) + b"\0\0\0" + struct.pack(f">I{fmt}", len(ctts), *flat)
+        new_children.append(Box(b"ctts", payload))
+    stbl.children = new_children
+
+    # --- 길이 갱신 ---
+    mvhd = moov.find(b"mvhd")
+    mvhd.payload = _write_duration_mvhd_or_mdhd(mvhd.payload, movie_duration)
+    tkhd = trak.find(b"tkhd")
+    tkhd.payload = _write_duration_tkhd(tkhd.payload, movie_duration)
+    mdhd = mdia.find(b"mdhd")
+    mdhd.payload = _write_duration_mvhd_or_mdhd(mdhd.payload, media_duration)
+
+    edts = trak.find(b"edts")
+    elst_payload = _write_elst([(movie_duration, media_start, 0x10000)])
+    if edts is not None and edts.find(b"elst") is not None:
+        edts.find(b"elst").payload = elst_payload
+    elif media_start > 0:
+        trak.children.insert(1, Box(b"edts", children=[Box(b"elst", elst_payload)]))
+
+    return moov.serialize()
+
+
+def _copy_range(src_fd: int, dst_fd: int, offset: int, count: int):
+    """src의 [offset, offset+count) 구간을 dst 현재 위치에 복사 (커널 sendfile 우선)."""
+    if hasattr(os, "sendfile"):
+        try:
+            while count > 0:
+                sent = os.sendfile(dst_fd, src_fd, offset, count)
+                if sent == 0:
+                    raise OSError("sendfile returned 0")
+                offset += sent
+                count -= sent
+            return
+        except OSError:
+            if count <= 0:
+                return
+    # sendfile이 없거나(Windows 등) 실패하면 mmap 슬라이스로 복사
+    with mmap.mmap(src_fd, 0, access=mmap.ACCESS_READ) as mm:
+        view = memoryview(mm)
+        try:
+            while count > 0:
+                n = min(count, 8 << 20)
+                os.write(dst_fd, view[offset : offset + n])
+                offset += n
+                count -= n
+        finally:
+            view.release()
+
+
+def concat_mp4(paths: list[str], out_path: str) -> None:
+    """
+    호환 가능한 MP4 클립들을 out_path 하나로 이어붙인다.
+    호환되지 않으면 아무것도 쓰지 않고 Mp4ConcatError.
+    """
+    tracks = probe_tracks(paths)
+
+    payload_total = sum(t.mdat_size for t in tracks)
+    ftyp = tracks[0].ftyp
+
+    # 1) 오프셋 0으로 moov 크기 먼저 계산 (stco/co64 여부만 크기에 영향)
+    n_chunks = sum(len(t.chunks) for t in tracks)
+    use_co64 = False
+    moov_len = len(_build_moov(tracks, [0] * n_chunks, use_co64))
+    mdat_hdr = 16 if payload_total + 8 > U32_MAX else 8
+    if len(ftyp) + moov_len + mdat_hdr + payload_total > U32_MAX:
+        use_co64 = True
+        moov_len = len(_build_moov(tracks, [0] * n_chunks, use_co64))
+
+    # 2) 실제 청크 오프셋 계산 후 moov 재작성
+    data_start = len(ftyp) + moov_len + mdat_hdr
+    offsets = []
+    cum = 0
+    for t in tracks:
+        shift = data_start + cum - t.mdat_start
+        offsets.extend(c + shift for c in t.chunks)
+        cum += t.mdat_size
+    moov = _build_moov(tracks, offsets, use_co64)
+    if len(moov) != moov_len:
+        raise Mp4ConcatError("moov 크기 계산 불일치")
+
+    if mdat_hdr == 16:
+        mdat_header = struct.pack(">I4sQ", 1, b"mdat", payload_total + 16)
+    else:
+        mdat_header = struct.pack(">I4s", payload_total + 8, b"mdat")
+
+    # 3) ftyp + moov + mdat 헤더 쓰고 각 입력 mdat 페이로드를 그대로 복사
+    fd = os.open(out_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o644)
+    try:
+        os.write(fd, ftyp + moov + mdat_header)
+        for t in tracks:
+            src = os.open(t.path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+            try:
+                _copy_range(src, fd, t.mdat_start, t.mdat_size)
+            finally:
+                os.close(src)
+    finally:
+        os.close(fd)
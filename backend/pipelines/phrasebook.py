@@ -0,0 +1,332 @@
+# -*- coding: utf-8 -*-
+"""
+phrasebook.py
+은행 창구 스크립트 문장용 문장 단위 phrasebook
+
+오프라인(빌드):
+- gloss/script.txt + 누적 스냅샷(snapshots14, snapshots/api)의 문장을 모아서
+- 문장마다 tokens / gloss / gloss_ids / 클립 목록(clips)을 미리 계산해 phrasebook.json에 저장
+- --render 옵션이면 문장 영상까지 미리 합성해서 경로를 같이 저장
+
+요청 시(service.process_audio_file):
+- 정규화 문장의 글자 3-gram Jaccard 유사도로 가장 가까운 문장을 찾고
+- threshold 이상이면 NLP(Gemini) + 매핑을 건너뛰고 저장된 결과를 그대로 사용
+
+실행:
+    python -m pipelines.phrasebook            # backend/ 에서
+    python -m pipelines.phrasebook --render   # 문장 영상까지 미리 합성
+"""
+
+import hashlib
+import json
+import re
+import sys
+import unicodedata
+from collections import defaultdict
+from pathlib import Path
+
+from core import telemetry
+
+from .pipeline import (
+    DATA_DIR,
+    MEDIA_ROOT,
+    MERGED_RULES,
+    OUT_DIR,
+    _norm,
+    _paths_from_ids,
+    extract_tokens,
+    get_image_video_cached,
+    load_gloss_index,
+    resolve_gloss_token,
+    save_sequence,
+    to_gloss_ids,
+)
+
+ROOT_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = ROOT_DIR.parent
+
+PHRASEBOOK_PATH = DATA_DIR / "phrasebook.json"
+SCRIPT_PATH = ROOT_DIR / "gloss" / "script.txt"
+SNAPSHOT_DIRS = [
+    OUT_DIR,                          # gloss_new/snapshots14
+    DATA_DIR / "snapshots14",         # gloss_new/data/snapshots14
+    BACKEND_DIR / "snapshots" / "api",
+]
+PHRASE_VIDEO_DIR = MEDIA_ROOT / "sign_sentences" / "phrasebook"
+
+DEFAULT_THRESHOLD = 0.85
+SHINGLE = 3
+
+
+# ======================================================================
+# 문장 정규화 + n-gram Jaccard 인덱스
+# ======================================================================
+def normalize_sentence(text: str) -> str:
+    """NFKC + 공백/문장부호 제거. 호칭("고객님")도 떼어서 비교."""
+    s = unicodedata.normalize("NFKC", text or "")
+    s = re.sub(r"[^\w가-힣]", "", s)
+    s = re.sub(r"^고객님", "", s)
+    return s
+
+
+def shingles(norm: str) -> set[str]:
+    if len(norm) < SHINGLE:
+        return {norm} if norm else set()
+    return {norm[i : i + SHINGLE] for i in range(len(norm) - SHINGLE + 1)}
+
+
+# 숫자(금리, 기간, 금액)와 부정 표현은 몇 글자 차이라 Jaccard가 높게 나와도 뜻이 달라진다
+# ("연 4.5퍼센트" vs "연 6.5퍼센트" = 0.878) → 정확히 같을 때만 유사 매칭 허용
+_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)*")
+_NEGATION_RE = re.compile(r"않|없|못|아니|아닙|불가|금지|마세요|마십시오|말고|말아|(?<![가-힣])안(?=\s)")
+
+
+def content_signature(text: str) -> tuple[tuple[str, ...], tuple[str, ...]]:
+    """(숫자 목록, 부정 표현 목록). 유사 매칭은 이 값이 같은 문장끼리만."""
+    s = unicodedata.normalize("NFKC", text or "")
+    numbers = tuple(n.replace(",", "") for n in _NUMBER_RE.findall(s))
+    negations = tuple(sorted(_NEGATION_RE.findall(s)))
+    return numbers, negations
+
+
+class Phrasebook:
+    def __init__(self, entries: list[dict] | None = None):
+        self.entries: list[dict] = []
+        self._sizes: list[int] = []
+        self._postings: dict[str, list[int]] = defaultdict(list)
+        self._exact: dict[str, int] = {}
+        self._sigs: list[tuple | None] = []  # content_signature (처음 비교할 때 계산)
+        for e in entries or []:
+            self.add(e)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, entry: dict):
+        norm = entry.get("norm") or normalize_sentence(entry.get("sentence", ""))
+        if not norm or norm in self._exact:
+            return
+        entry["norm"] = norm
+        idx = len(self.entries)
+        grams = shingles(norm)
+        self.entries.append(entry)
+        self._sizes.append(len(grams))
+        self._sigs.append(None)
+        self._exact[norm] = idx
+        for g in grams:
+            self._postings[g].append(idx)
+
+    def lookup(self, text: str, threshold: float = DEFAULT_THRESHOLD) -> dict | None:
+        """
+        가장 비슷한 스크립트 문장을 찾는다.
+        완전 일치가 아니면 숫자/부정 표현(content_signature)이 같은 문장만 후보.
+        반환: {"entry": {...}, "score": Jaccard} 또는 None
+        """
+        norm = normalize_sentence(text)
+        if not norm or not self.entries:
+            return None
+
+        idx = self._exact.get(norm)
+        if idx is not None:
+            return {"entry": self.entries[idx], "score": 1.0}
+
+        grams = shingles(norm)
+        inter: dict[int, int] = defaultdict(int)
+        for g in grams:
+            for i in self._postings.get(g, ()):
+                inter[i] += 1
+
+        scored = []
+        for i, n in inter.items():
+            sc = n / (len(grams) + self._sizes[i] - n)
+            if sc >= threshold:
+                scored.append((sc, i))
+        if not scored:
+            return None
+
+        sig = content_signature(text)
+        for sc, i in sorted(scored, reverse=True):
+            if self._signature(i) == sig:
+                return {"entry": self.entries[i], "score": round(sc, 4)}
+        return None
+
+    def _signature(self, i: int) -> tuple:
+        sig = self._sigs[i]
+        if sig is None:
+            sig = self._sigs[i] = content_signature(self.entries[i].get("sentence", ""))
+        return sig
+
+    @classmethod
+    def load(cls, path: Path | str = PHRASEBOOK_PATH) -> "Phrasebook":
+        path = Path(path)
+        if not path.exists():
+            return cls()
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"[Phrasebook] 로드 실패: {e}")
+            return cls()
+        pb = cls(data.get("entries") or [])
+        print(f"[Phrasebook] loaded {len(pb)} sentences from {path}")
+        return pb
+
+    def save(self, path: Path | str = PHRASEBOOK_PATH):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("w", encoding="utf-8") as f:
+            json.dump({"entries": self.entries}, f, ensure_ascii=False, indent=1)
+
+
+# ======================================================================
+# 요청 시: 저장된 clips → 영상 경로 시퀀스
+# ======================================================================
+def sequence_from_entry(entry: dict) -> tuple[list[str], list[dict]]:
+    """
+    phrasebook 항목의 clips를 실제 mp4 경로로 바꾼다.
+    (gloss는 VIDEO_PATH_INDEX 조회, image는 텍스트 카드 캐시 재사용)
+    """
+    video_paths: list[str] = []
+    debug_info: list[dict] = []
+    for idx, clip in enumerate(entry.get("clips") or []):
+        kind = clip.get("type")
+        if kind == "gloss":
+            paths = _paths_from_ids(clip.get("ids") or [])
+        elif kind == "image":
+            paths = [get_image_video_cached(clip.get("text") or "", duration=2.0)]
+        else:
+            paths = []
+        video_paths.extend(paths)
+        debug_info.append(
+            {
+                "idx": idx,
+                "token_type": kind,
+                "token_text": clip.get("text"),
+                "ids": clip.get("ids") or [],
+                "paths": paths,
+                "resolve_logs": [{"method": "phrasebook"}],
+            }
+        )
+    return video_paths, debug_info
+
+
+# ======================================================================
+# 오프라인 빌드
+# ======================================================================
+def _iter_snapshots():
+    """스냅샷 dict: 예전 snapshot_*.json 파일 + telemetry가 모아 쓴 *.jsonl(회전된 .gz 포함)."""
+    for d in SNAPSHOT_DIRS:
+        if not d.exists():
+            continue
+        for p in sorted(d.glob("*.json")):
+            try:
+                with p.open("r", encoding="utf-8") as f:
+                    yield json.load(f)
+            except Exception:
+                continue
+        for p in sorted(d.glob("*.jsonl")):
+            yield from telemetry.iter_jsonl(p)
+
+
+def _iter_snapshot_sentences():
+    """스냅샷 JSON에서 (문장, cleaned, tokens) 추출."""
+    for snap in _iter_snapshots():
+        if not isinstance(snap, dict):
+            continue
+        sentence = snap.get("clean_text") or snap.get("stt") or snap.get("text") or ""
+        tokens = snap.get("tokens")
+        if not tokens and snap.get("gloss"):
+            tokens = [{"text": g, "type": "gloss"} for g in snap["gloss"] if g]
+        if sentence and tokens:
+            cleaned = snap.get("nlp_clean_text") or sentence
+            yield sentence, cleaned, tokens
+
+
+def _iter_script_sentences():
+    if not SCRIPT_PATH.exists():
+        return
+    with SCRIPT_PATH.open("r", encoding="utf-8") as f:
+        for line in f:
+            sent = line.strip()
+            if sent:
+                yield sent
+
+
+def build_entry(sentence: str, cleaned: str, tokens: list[dict], db_index: dict) -> dict:
+    """문장 1개 → tokens/gloss/gloss_ids/clips 미리 계산."""
+    clips = []
+    gloss = []
+    for t in tokens:
+        if not isinstance(t, dict):
+            continue
+        txt = (t.get("text") or "").strip()
+        typ = (t.get("type") or "gloss").strip().lower()
+        if not txt:
+            continue
+        if typ == "gloss":
+            gloss.append(txt)
+            ids, _ = resolve_gloss_token(
+                token_text=txt,
+                original_sentence=cleaned,
+                rules=MERGED_RULES,
+                db_index=db_index,
+            )
+            clips.append({"type": "gloss", "text": txt, "ids": [str(i) for i in ids]})
+        else:
+            clips.append({"type": typ, "text": txt, "ids": []})
+
+    return {
+        "sentence": _norm(sentence),
+        "norm": normalize_sentence(sentence),
+        "cleaned": _norm(cleaned),
+        "tokens": tokens,
+        "gloss": gloss,
+        "gloss_ids": to_gloss_ids(gloss, db_index),
+        "clips": clips,
+    }
+
+
+def render_entry(entry: dict):
+    """문장 영상을 미리 합성해 entry["video"], entry["video_url"]에 기록."""
+    paths, _ = sequence_from_entry(entry)
+    if not paths:
+        return
+    PHRASE_VIDEO_DIR.mkdir(parents=True, exist_ok=True)
+    name = "phrase_" + hashlib.sha1(entry["norm"].encode("utf-8")).hexdigest()[:16] + ".mp4"
+    out = PHRASE_VIDEO_DIR / name
+    if not out.exists():
+        save_sequence(paths, out)
+    if out.exists():
+        entry["video"] = str(out)
+        entry["video_url"] = f"/media/sign_sentences/phrasebook/{name}"
+
+
+def build_phrasebook(render: bool = False) -> Phrasebook:
+    db_index = load_gloss_index()
+    pb = Phrasebook()
+
+    # 1) 실제 응답이 있던 스냅샷 우선 (사람이 확인한 결과)
+    for sentence, cleaned, tokens in _iter_snapshot_sentences():
+        pb.add(build_entry(sentence, cleaned, tokens, db_index))
+    n_snap = len(pb)
+
+    # 2) 스냅샷에 없는 스크립트 문장은 NLP(Gemini 또는 로컬 폴백) 한 번 돌려서 추가
+    for sent in _iter_script_sentences():
+        if normalize_sentence(sent) in pb._exact:
+            continue
+        tokens = extract_tokens(sent)
+        if tokens:
+            pb.add(build_entry(sent, sent, tokens, db_index))
+
+    if render:
+        for e in pb.entries:
+            render_entry(e)
+
+    print(f"[Phrasebook] snapshots={n_snap}, script={len(pb) - n_snap}, total={len(pb)}")
+    return pb
+
+
+if __name__ == "__main__":
+    book = build_phrasebook(render="--render" in sys.argv)
+    book.save(PHRASEBOOK_PATH)
+    print(f"[Phrasebook] saved -> {PHRASEBOOK_PATH}")
@@ -30,6 +30,7 @@ import os
 import csv
 import re
 import json
+import logging
 import ast
 import unicodedata
 import difflib
@@ -41,18 +42,47 @@ import shutil
 import subprocess
 import tempfile
 import time  # 디버깅용
+from fractions import Fraction
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 
 import whisper
 from dotenv import load_dotenv
 
 from PIL import Image, ImageDraw, ImageFont
 
+from core.llm_transport import TRANSPORT as LLM_TRANSPORT, wrap_model
+from core.tracing import traced
+from core.log import debug_payload
+from core import telemetry
+
+from .clip_store import CLIP_STORE, clip_key
+from .morph import MorphStripper
+from .video_index import VIDEO_INDEX
+from .video_profile import (
+    CANONICAL_ENCODE_ARGS,
+    PROFILE_ID,
+    VIDEO_FPS,
+    VIDEO_HEIGHT,
+    VIDEO_TIMESCALE,
+    VIDEO_WIDTH,
+    load_norm_manifest,
+    normalized_paths,
+)
+from .vocab_retrieval import VocabRetriever
+
 # Gemini 라이브러리
 try:
     import google.generativeai as genai
 except Exception:
     genai = None
 
+# PyAV (텍스트 카드 빠른 인코딩용, 없으면 ffmpeg 경로 사용)
+try:
+    import av
+except Exception:
+    av = None
+
 # Django MEDIA_ROOT 연동 (없으면 로컬 media 폴더 사용)
 try:
     from django.conf import settings
@@ -61,13 +91,13 @@ try:
 except Exception:
     MEDIA_ROOT = Path(__file__).resolve().parent / "media"
 
+logger = logging.getLogger(__name__)
+
 # 1. .env 로드
 load_dotenv()
 
 # 2. 환경 변수
-print("[PIPELINE] GOOGLE_API_KEY =", os.getenv("GOOGLE_API_KEY"))
 GOOGLE_API_KEY = (os.getenv("GOOGLE_API_KEY") or "").strip().strip("'\"")
-print("[DEBUG] GOOGLE_API_KEY prefix:", (GOOGLE_API_KEY or "")[:15], "...")
 
 if not GOOGLE_API_KEY:
     print("⚠️  [Warn] GOOGLE_API_KEY가 설정되지 않았습니다. Gemini 없이 로컬 규칙만 사용합니다.")
@@ -89,8 +119,14 @@ GLOSS_DICT_PATH = DATA_DIR / "gloss_dictionary_MOCK.csv"
 RULES_PATH = DATA_DIR / "rules.json"  # 실제 사용 · 자동 업데이트 대상
 RULES_BASE_PATH = DATA_DIR / "rules_base.json"
 
+# 로컬 폴백용 조사/어미 목록 (morph.py의 suffix trie가 읽음)
+MORPH_SUFFIX_PATH = DATA_DIR / "morph_suffixes.json"
+
 GLOSS_MP4_DIR = Path(
-    r"D:\2025-2-DSCD-KKHH-04\backend\pipelines\gloss_new\data\service"
+    os.getenv(
+        "GLOSS_MP4_DIR",
+        r"D:\2025-2-DSCD-KKHH-04\backend\pipelines\gloss_new\data\service",
+    )
 )
 # 수어 mp4가 있는 루트 폴더 (하위 fi, li 등 포함)
 
@@ -102,6 +138,17 @@ VIDEO_OUT_DIR.mkdir(exist_ok=True)
 LOG_DIR = ROOT_DIR / "gloss_tools"
 LOG_DIR.mkdir(parents=True, exist_ok=True)
 GLOSS_LOG_FILE = LOG_DIR / "gloss_mapping_log.csv"
+GLOSS_LOG_FIELDS = [
+    "timestamp",
+    "session_id",
+    "mode",
+    "text",
+    "gloss",
+    "gloss_ids",
+    "gloss_labels",
+    "has_mismatch",
+]
+telemetry.register_stream("gloss_mapping", GLOSS_LOG_FILE, fmt="csv", fields=GLOSS_LOG_FIELDS)
 
 
 # =========================
@@ -241,7 +288,7 @@ def log_gloss_mapping(
     only_mismatch=True,
 ):
     """
-    gloss / gloss_ids / gloss_labels 매핑 결과를 CSV로 기록.
+    gloss / gloss_ids / gloss_labels 매핑 결과를 CSV로 기록 (core.telemetry 큐에 넣기만 함).
     """
     if gloss_list is None:
         gloss_list = []
@@ -269,24 +316,8 @@ def log_gloss_mapping(
         "has_mismatch": "1" if has_mismatch else "0",
     }
 
-    file_exists = GLOSS_LOG_FILE.exists()
-    with GLOSS_LOG_FILE.open("a", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(
-            f,
-            fieldnames=[
-                "timestamp",
-                "session_id",
-                "mode",
-                "text",
-                "gloss",
-                "gloss_ids",
-                "gloss_labels",
-                "has_mismatch",
-            ],
-        )
-        if not file_exists:
-            writer.writeheader()
-        writer.writerow(row)
+    # 파일 쓰기는 telemetry writer 스레드가 모아서 (flock + 회전)
+    telemetry.emit("gloss_mapping", row)
 
 # 파일 업로드
 print("🔄 NEW pipeline.py loaded")
@@ -301,6 +332,10 @@ GEMINI_MODEL_NAME = "models/gemini-2.5-flash"
 WHISPER_MODEL_NAME = "small"
 WHISPER_LANG = "ko"
 
+# 문장별 사전 어휘 검색(vocab_retrieval.py) 결과를 Gemini 입력에 붙일지 여부
+GEMINI_VOCAB_RETRIEVAL = os.getenv("GEMINI_VOCAB_RETRIEVAL", "0") == "1"
+GEMINI_VOCAB_TOP_K = int(os.getenv("GEMINI_VOCAB_TOP_K", "40"))
+
 ALWAYS_RETURN_ID = True  # 매핑 실패 시에도 유사도 기반으로 ID 하나는 선택
 
 # 전역 캐시
@@ -374,24 +409,32 @@ def stt_from_file(audio_path: str) -> str:
         compression_ratio_threshold=2.0,
     )
     t1 = time.perf_counter()
-    print(f"[STT inner] whisper.transcribe only: {t1 - t0:.2f} sec for {audio_path}")
+    logger.debug("whisper transcribe", extra={"audio": str(audio_path), "transcribe_sec": round(t1 - t0, 2)})
 
     stt_text = _norm(res.get("text") or "")
-    print(f"[STT] {audio_path} -> \"{stt_text}\"")
+    debug_payload(logger, "stt text", audio=str(audio_path), text=stt_text)
     return stt_text
 
 
 # ======================================================================
 # Gemini 설정 및 토큰 추출 (고급 버전)
 # ======================================================================
-def build_gemini():
+def build_gemini(vocab_retrieval: bool | None = None):
     """
     Gemini 모델 생성.
+
+    vocab_retrieval=True 이면 요청마다 입력 문장과 관련된 사전 어휘 top-k를
+    user part에 같이 보낸다 (gemini_user_parts 참고). None이면 환경변수
+    GEMINI_VOCAB_RETRIEVAL 값을 따른다.
     """
-    if not GOOGLE_API_KEY or genai is None:
-        return None
+    if vocab_retrieval is None:
+        vocab_retrieval = GEMINI_VOCAB_RETRIEVAL
 
-    genai.configure(api_key=GOOGLE_API_KEY)
+    # replay 모드(LLM_TRANSPORT=replay)면 API 키 없이 cassette 응답으로 동작
+    if not LLM_TRANSPORT.offline:
+        if not GOOGLE_API_KEY or genai is None:
+            return None
+        genai.configure(api_key=GOOGLE_API_KEY)
 
     sys_prompt = f"""
 
@@ -597,17 +640,57 @@ def build_gemini():
     
 
 
-    model = genai.GenerativeModel(
+    if vocab_retrieval:
+        sys_prompt += """
+
+    [사전 후보 어휘]
+    - 입력과 함께 "[사전 후보 어휘]" 목록이 주어지면, gloss 토큰은 가능한 한 그 목록에 있는 단어를 그대로 사용하십시오.
+    - 목록에 맞는 단어가 없을 때만 기초 수어 단어로 풀어 쓰십시오.
+    """
+
+    model = wrap_model(
         GEMINI_MODEL_NAME,
-        system_instruction=sys_prompt,
-        generation_config={
-            "response_mime_type": "application/json",
-            "temperature": 0.2,
-        },
+        sys_prompt,
+        lambda: genai.GenerativeModel(
+            GEMINI_MODEL_NAME,
+            system_instruction=sys_prompt,
+            generation_config={
+                "response_mime_type": "application/json",
+                "temperature": 0.2,
+            },
+        ),
     )
+    model.vocab_retrieval = bool(vocab_retrieval)
     return model
 
 
+_VOCAB_RETRIEVER: VocabRetriever | None = None
+
+
+def _get_vocab_retriever() -> VocabRetriever:
+    global _VOCAB_RETRIEVER
+    if _VOCAB_RETRIEVER is None:
+        _VOCAB_RETRIEVER = VocabRetriever.from_gloss_index(load_gloss_index())
+    return _VOCAB_RETRIEVER
+
+
+def gemini_user_parts(text: str, model=None) -> list[dict]:
+    """
+    Gemini generate_content에 넘길 contents 구성.
+    build_gemini(vocab_retrieval=True)로 만든 모델이면 관련 사전 어휘만 붙인다.
+    """
+    parts = [text]
+    if getattr(model, "vocab_retrieval", False):
+        try:
+            ctx = _get_vocab_retriever().context_for(text, k=GEMINI_VOCAB_TOP_K)
+        except Exception as e:
+            print(f"[VocabRetrieval] 검색 실패, 문장만 전송: {e}")
+            ctx = ""
+        if ctx:
+            parts = [ctx, f"[입력 문장]\n{text}"]
+    return [{"role": "user", "parts": parts}]
+
+
 def _get_gemini_model():
     global GEMINI_MODEL
     if GEMINI_MODEL is None:
@@ -636,12 +719,12 @@ def extract_tokens(text: str, model=None) -> list[dict]:
     # 1) Gemini 사용
     if model:
         try:
-            print(f"[Gemini] call start  text={clean!r}")
-            parts = [{"role": "user", "parts": [clean]}]
+            debug_payload(logger, "gemini call start", text=clean)
+            parts = gemini_user_parts(clean, model)
             t0 = time.perf_counter()
             resp = model.generate_content(parts)
             t1 = time.perf_counter()
-            print(f"[Gemini] call done  {t1 - t0:.2f} sec")
+            logger.info("gemini call done", extra={"gemini_sec": round(t1 - t0, 2)})
 
             # --- Gemini 응답(JSON) 파싱 ---
             raw = ""
@@ -689,22 +772,23 @@ def extract_tokens(text: str, model=None) -> list[dict]:
                     out.append({"text": txt, "type": typ})
 
                 if out:
-                    print(f"[Gemini] tokens -> {out}")
+                    debug_payload(logger, "gemini tokens", tokens=out)
                     return out
 
         except Exception as e:
-            print(f"[Gemini Error] {e}")
+            logger.warning("gemini error: %s", e)
 
     # 2) 로컬 폴백
     # 2-1) "저는 김다영입니다." / "김다영입니다." 같은 이름 패턴
     m = re.match(r"^(?:저는\s*)?([가-힣]{2,4})입니다[\.!]*$", clean)
     if m:
         name = m.group(1)
-        print(f"[LocalFallback] 이름 패턴 감지 -> image 토큰으로 사용: {name}")
+        logger.info("local fallback: name pattern -> image token", extra={"token_text": name})
         return [{"text": name, "type": "image"}]
 
     # 2-2) 그 외 일반 규칙
-    print(f"[LocalFallback] Gemini 토큰 없음 → regex 사용  text={clean!r}")
+    logger.info("local fallback: no gemini tokens -> regex")
+    debug_payload(logger, "local fallback text", text=clean)
     tokens = re.findall(
         r"""
         \d+(?:\.\d+)?(?:천만|천만원|천원|천)?(?:억|억원)?(?:만|만원)?(?:원)?
@@ -716,7 +800,11 @@ def extract_tokens(text: str, model=None) -> list[dict]:
         clean,
         re.VERBOSE,
     )
-    return [{"text": _first_word(t), "type": "gloss"} for t in tokens if _first_word(t)]
+    return [
+        {"text": _strip_local_token(_first_word(t)), "type": "gloss"}
+        for t in tokens
+        if _first_word(t)
+    ]
 
 
 def extract_glosses(text: str, model=None) -> list[str]:
@@ -776,19 +864,23 @@ VIDEO_PATH_INDEX = {}
 
 def build_video_index(root_dir: Path):
     """
-    하위 폴더 포함 모든 mp4 파일을 검색하여
-    { "파일ID": "전체경로" } 형태의 지도를 만듦.
+    하위 폴더 포함 모든 mp4 파일을
+    { "파일ID": "전체경로" } 형태의 지도로 만듦.
+    (video_index.VIDEO_INDEX: SQLite에 저장, 바뀐 폴더만 다시 읽음)
     """
     global VIDEO_PATH_INDEX
     print(f"📂 영상 파일 인덱싱 중... ({root_dir})")
 
-    count = 0
-    for path in root_dir.rglob("*.mp4"):
-        file_id = path.stem
-        VIDEO_PATH_INDEX[file_id] = str(path.resolve())
-        count += 1
+    VIDEO_PATH_INDEX.update(VIDEO_INDEX.load(root_dir))
 
-    print(f"✅ 총 {count}개의 영상 파일을 찾았습니다.")
+    print(f"✅ 총 {len(VIDEO_PATH_INDEX)}개의 영상 파일을 찾았습니다.")
+
+    # 표준 프로파일로 정규화된 클립(gloss_tools/normalize_clips.py)이 있으면 그쪽을 우선 사용
+    # → 문장 합성 시 concat -c copy만으로 재인코딩 없이 이어붙일 수 있음
+    norm = normalized_paths(load_norm_manifest())
+    VIDEO_PATH_INDEX.update(norm)
+    if norm:
+        print(f"✅ 정규화 클립 {len(norm)}개 사용 (manifest)")
 
 
 try:
@@ -796,6 +888,8 @@ try:
         build_video_index(GLOSS_MP4_DIR)
     else:
         print(f"⚠️ GLOSS_MP4_DIR가 존재하지 않습니다: {GLOSS_MP4_DIR}")
+        # 원본 없이 정규화본만 배포된 경우
+        VIDEO_PATH_INDEX.update(normalized_paths(load_norm_manifest()))
 except Exception as e:
     print(f"⚠️ build_video_index 실행 중 오류: {e}")
 
@@ -924,6 +1018,7 @@ def to_gloss_ids(gloss_list: list[str], index: dict) -> list[str]:
     """
     out: list[str] = []
     seen: set[str] = set()
+    no_id: list[str] = []
 
     for raw in (gloss_list or []):
         if raw is None:
@@ -934,7 +1029,6 @@ def to_gloss_ids(gloss_list: list[str], index: dict) -> list[str]:
             continue
 
         if g.startswith("image:"):
-            print(f"[to_gloss_ids] skip image token: {g!r}")
             continue
 
         if g.startswith("gloss:"):
@@ -947,7 +1041,7 @@ def to_gloss_ids(gloss_list: list[str], index: dict) -> list[str]:
 
         gid = map_one_word_to_id(g_clean, index)
         if not gid:
-            print(f"[to_gloss_ids] no id for gloss='{g_clean}' (from {g!r})")
+            no_id.append(g_clean)
             continue
 
         gid_str = str(gid)
@@ -955,6 +1049,8 @@ def to_gloss_ids(gloss_list: list[str], index: dict) -> list[str]:
             out.append(gid_str)
             seen.add(gid_str)
 
+    if no_id:
+        logger.info("gloss without id", extra={"glosses": no_id})
     return out
 
 
@@ -1050,10 +1146,9 @@ def _paths_from_ids(gloss_ids):
             continue
 
         if gid_str.startswith("image:"):
-            print(f"[paths_from_ids] skip image token in gloss_ids: {gid_str!r}")
             continue
         if gid_str.startswith("gloss:"):
-            print(f"[paths_from_ids] unexpected gloss: prefix in gloss_ids: {gid_str!r}")
+            logger.warning("unexpected gloss: prefix in gloss_ids", extra={"gloss_id": gid_str})
             gid_str = gid_str[len("gloss:") :].strip()
             if not gid_str:
                 continue
@@ -1064,16 +1159,22 @@ def _paths_from_ids(gloss_ids):
             missing.append(gid_str)
 
     if missing:
-        print(f"⚠️  매핑 누락 (파일 없음) gloss_id: {missing}")
+        logger.info("gloss_id without video file", extra={"missing": missing})
     return paths
 
 
 # ======================================================================
 # 영상 합성/저장 및 텍스트 이미지 영상 (캐시 포함)
 # ======================================================================
-IMAGE_VIDEO_CACHE: dict[str, str] = {}  # key: "text|duration" -> mp4 경로
+# 텍스트 카드/빈 화면 클립은 CLIP_STORE(디스크, 내용 주소)에 저장해서
+# 재시작 후에도, 여러 워커 사이에서도 재사용한다.
+
 
+# 1이면 텍스트 카드를 PyAV로 2프레임만 인코딩 (실패/미설치 시 ffmpeg 경로)
+CARD_FAST_ENCODE = os.getenv("CARD_FAST_ENCODE", "1") == "1"
 
+
+@lru_cache(maxsize=8)
 def get_korean_font(size=80):
     font_paths = [
         "C:/Windows/Fonts/malgun.ttf",
@@ -1089,15 +1190,14 @@ def get_korean_font(size=80):
     return ImageFont.load_default()
 
 
-def generate_image_video(text: str, duration: float = 2.0) -> str:
-    """
-    실제로 ffmpeg를 돌려 텍스트 이미지 영상을 생성.
-    (캐싱 없이 순수 생성만 담당)
-    """
-    with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tf:
-        img_path = tf.name
+def _font_id(font) -> str:
+    """캐시 키용 폰트 식별자 (파일 경로 + 크기)."""
+    return f"{getattr(font, 'path', 'default')}@{getattr(font, 'size', '')}"
 
-    width, height = 1280, 720
+
+def _render_card_image(text: str) -> Image.Image:
+    """검은 배경 가운데에 흰 글씨 (1280x720)."""
+    width, height = VIDEO_WIDTH, VIDEO_HEIGHT
     img = Image.new("RGB", (width, height), color="black")
     d = ImageDraw.Draw(img)
 
@@ -1109,9 +1209,67 @@ def generate_image_video(text: str, duration: float = 2.0) -> str:
     position = ((width - text_w) / 2, (height - text_h) / 2)
 
     d.text(position, text, font=font, fill="white")
+    return img
+
+
+def _encode_card_av(img: Image.Image, duration: float, out_mp4: str) -> bool:
+    """
+    정지 화면 카드를 PyAV(libx264)로 인코딩.
+    같은 프레임을 60장 인코딩하는 대신 IDR 1장(pts=0) + 마지막 프레임 1장(pts=n-1)만 넣어서
+    길이는 타임스탬프로 표현한다. 코덱 파라미터는 CANONICAL_ENCODE_ARGS와 맞춰
+    수어 클립과 그대로(-c copy) 이어붙일 수 있다.
+    """
+    if av is None or not CARD_FAST_ENCODE:
+        return False
+
+    n_frames = max(1, round(duration * VIDEO_FPS))
+    container = av.open(
+        out_mp4, mode="w", format="mp4",
+        options={"video_track_timescale": str(VIDEO_TIMESCALE)},
+    )
+    try:
+        stream = container.add_stream("libx264", rate=VIDEO_FPS)
+        stream.width = VIDEO_WIDTH
+        stream.height = VIDEO_HEIGHT
+        stream.pix_fmt = "yuv420p"
+        stream.codec_context.time_base = Fraction(1, VIDEO_FPS)
+        stream.options = {"preset": "veryfast", "profile": "high", "bf": "2"}
+
+        frame = av.VideoFrame.from_image(img).reformat(format="yuv420p")
+        frame.time_base = Fraction(1, VIDEO_FPS)
+        for pts in ([0] if n_frames == 1 else [0, n_frames - 1]):
+            frame.pts = pts
+            for packet in stream.encode(frame):
+                container.mux(packet)
+        for packet in stream.encode():
+            container.mux(packet)
+    finally:
+        container.close()
+    return True
+
+
+@traced("card_render")
+def generate_image_video(text: str, duration: float = 2.0, out_path: str | None = None) -> str:
+    """
+    텍스트 이미지 영상을 생성 (PyAV 빠른 경로 → 실패하면 ffmpeg).
+    (캐싱 없이 순수 생성만 담당, out_path가 없으면 임시 파일에 저장)
+    """
+    img = _render_card_image(text)
+
+    if out_path is None:
+        with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as tf:
+            out_path = tf.name
+
+    try:
+        if _encode_card_av(img, duration, out_path):
+            return out_path
+    except Exception as e:
+        print(f"[Card] PyAV 인코딩 실패 → ffmpeg 사용: {e}")
+
+    with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tf:
+        img_path = tf.name
     img.save(img_path)
 
-    out_mp4 = img_path.replace(".png", ".mp4")
     cmd = [
         "ffmpeg",
         "-y",
@@ -1121,81 +1279,51 @@ def generate_image_video(text: str, duration: float = 2.0) -> str:
         img_path,
         "-t",
         str(duration),
-        "-c:v",
-        "libx264",
-        "-preset",
-        "veryfast",
-        "-profile:v",
-        "high",
-        "-pix_fmt",
-        "yuv420p",
-        "-r",
-        "30",
-        "-video_track_timescale",
-        "90000",
-        "-bf",
-        "2",
-        "-an",
+        *CANONICAL_ENCODE_ARGS,
         "-vf",
-        "scale=1280:720",
+        f"scale={VIDEO_WIDTH}:{VIDEO_HEIGHT}",
         "-loglevel",
         "error",
-        out_mp4,
+        out_path,
     ]
-    subprocess.run(cmd, check=True)
-
     try:
-        os.remove(img_path)
-    except Exception:
-        pass
+        subprocess.run(cmd, check=True)
+    finally:
+        try:
+            os.remove(img_path)
+        except Exception:
+            pass
 
-    return out_mp4
+    return out_path
 
 
 def get_image_video_cached(text: str, duration: float = 2.0) -> str:
     """
-    같은 text + duration 조합에 대해 한 번만 ffmpeg를 돌리고,
-    이후에는 캐시된 mp4 경로를 재사용.
+    같은 (text, duration, 폰트, 해상도) 조합에 대해 한 번만 ffmpeg를 돌리고,
+    이후에는 CLIP_STORE에 저장된 mp4 경로를 재사용.
     """
-    key = f"{text}|{duration}"
-    mp4 = IMAGE_VIDEO_CACHE.get(key)
-
-    # 캐시에 있고 실제 파일도 존재하면 그대로 사용
-    if mp4 and os.path.exists(mp4):
-        return mp4
-
-    # 없거나 파일이 지워졌으면 새로 생성
-    mp4 = generate_image_video(text, duration=duration)
-    IMAGE_VIDEO_CACHE[key] = mp4
-    return mp4
+    key = clip_key(
+        "image",
+        text=text,
+        duration=float(duration),
+        font=_font_id(get_korean_font(80)),
+        resolution=f"{VIDEO_WIDTH}x{VIDEO_HEIGHT}",
+        profile=PROFILE_ID,
+    )
+    return CLIP_STORE.get_or_create(
+        key, lambda tmp: generate_image_video(text, duration=duration, out_path=tmp)
+    )
 
 
-def generate_blank_video(duration: float = 1.0) -> str:
-    with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as tf:
-        out_mp4 = tf.name
-
+def _render_blank_video(duration: float, out_mp4: str) -> str:
     cmd = [
         "ffmpeg",
         "-y",
         "-f",
         "lavfi",
         "-i",
-        f"color=c=black:s=1280x720:d={duration}",
-        "-c:v",
-        "libx264",
-        "-preset",
-        "veryfast",
-        "-profile:v",
-        "high",
-        "-pix_fmt",
-        "yuv420p",
-        "-r",
-        "30",
-        "-video_track_timescale",
-        "90000",
-        "-bf",
-        "2",
-        "-an",
+        f"color=c=black:s={VIDEO_WIDTH}x{VIDEO_HEIGHT}:r={VIDEO_FPS}:d={duration}",
+        *CANONICAL_ENCODE_ARGS,
         "-loglevel",
         "error",
         out_mp4,
@@ -1203,6 +1331,42 @@ def generate_blank_video(duration: float = 1.0) -> str:
     subprocess.run(cmd, check=True)
     return out_mp4
 
+
+def generate_blank_video(duration: float = 1.0) -> str:
+    """pause용 빈 화면 영상 (길이별로 한 번만 인코딩)."""
+    key = clip_key(
+        "pause",
+        duration=float(duration),
+        resolution=f"{VIDEO_WIDTH}x{VIDEO_HEIGHT}",
+        profile=PROFILE_ID,
+    )
+    return CLIP_STORE.get_or_create(key, lambda tmp: _render_blank_video(duration, tmp))
+
+
+# 텍스트 카드/빈 화면 렌더링용 스레드 풀 (PIL + ffmpeg 프로세스라 스레드로 충분)
+IMAGE_RENDER_WORKERS = max(1, int(os.getenv("IMAGE_RENDER_WORKERS", "4")))
+_IMAGE_RENDER_POOL = ThreadPoolExecutor(
+    max_workers=IMAGE_RENDER_WORKERS, thread_name_prefix="card-render"
+)
+
+
+def _render_clip_jobs(jobs: list[tuple]) -> dict[tuple, str]:
+    """
+    중복 없는 (종류, 값) 작업들을 렌더링(또는 CLIP_STORE 재사용)해서 {작업: mp4 경로} 반환.
+    작업이 2개 이상이면 _IMAGE_RENDER_POOL에서 동시에 처리.
+    """
+    def run(job):
+        kind, value = job
+        if kind == "image":
+            return get_image_video_cached(value, duration=2.0)
+        return generate_blank_video(duration=value)
+
+    if len(jobs) <= 1:
+        return {job: run(job) for job in jobs}
+    futures = {job: _IMAGE_RENDER_POOL.submit(run, job) for job in jobs}
+    return {job: fut.result() for job, fut in futures.items()}
+
+
 def build_video_sequence_from_tokens(
     tokens: list[dict],
     db_index: dict,
@@ -1219,6 +1383,9 @@ def build_video_sequence_from_tokens(
     - pause  → (옵션) 빈 화면 mp4 경로
     를 이어붙인 video_list를 만든다.
 
+    1차: gloss 매핑처럼 가벼운 작업을 전부 끝내고 필요한 카드/빈 화면 목록만 모음
+    2차: 없는 카드를 스레드 풀에서 한꺼번에 렌더링한 뒤 토큰 순서대로 채움
+
     반환:
       video_paths: 실제 합성에 쓸 mp4 경로 리스트 (순서 보장)
       debug_info : 각 토큰별 매핑 결과(검증용)
@@ -1229,11 +1396,13 @@ def build_video_sequence_from_tokens(
     if rules is None:
         rules = MERGED_RULES
 
-    video_paths: list[str] = []
     debug_info: list[dict] = []
+    # debug_info 인덱스 → 렌더링 작업 (image/pause 토큰만)
+    pending: dict[int, tuple] = {}
 
     step_idx = 0
 
+    # ---------- 1차: 매핑 ----------
     for t in tokens:
         if not isinstance(t, dict):
             continue
@@ -1243,6 +1412,15 @@ def build_video_sequence_from_tokens(
         if not raw_text:
             continue
 
+        debug_entry = {
+            "idx": step_idx,
+            "token_type": ttype,
+            "token_text": raw_text,
+            "ids": [],
+            "paths": [],
+            "resolve_logs": [],
+        }
+
         # 1) gloss 토큰: 규칙 + 사전 기반으로 id → mp4 매핑
         if ttype == "gloss":
             ids, resolve_logs = resolve_gloss_token(
@@ -1251,100 +1429,43 @@ def build_video_sequence_from_tokens(
                 rules=rules,
                 db_index=db_index,
             )
-            paths = _paths_from_ids(ids)
-
-            video_paths.extend(paths)
-
-            debug_entry = {
-                "idx": step_idx,
-                "token_type": "gloss",
-                "token_text": raw_text,
-                "ids": ids,
-                "paths": paths,
-                "resolve_logs": resolve_logs,
-            }
-            debug_info.append(debug_entry)
-
-            if debug_log:
-                print(
-                    f"[SEQ][{step_idx:02d}] gloss '{raw_text}' "
-                    f"-> ids={ids}, paths={paths}"
-                )
+            debug_entry["ids"] = ids
+            debug_entry["paths"] = _paths_from_ids(ids)
+            debug_entry["resolve_logs"] = resolve_logs
 
-            step_idx += 1
-
-        # 2) image 토큰: 텍스트 이미지 영상 생성(또는 캐시 재사용)
+        # 2) image 토큰: 텍스트 이미지 영상 (2차에서 생성 또는 캐시 재사용)
         elif ttype == "image":
-            img_mp4 = get_image_video_cached(raw_text, duration=2.0)
-            video_paths.append(img_mp4)
-
-            debug_entry = {
-                "idx": step_idx,
-                "token_type": "image",
-                "token_text": raw_text,
-                "ids": [],
-                "paths": [img_mp4],
-                "resolve_logs": [],
-            }
-            debug_info.append(debug_entry)
-
-            if debug_log:
-                print(
-                    f"[SEQ][{step_idx:02d}] image '{raw_text}' "
-                    f"-> path={img_mp4}"
-                )
-
-            step_idx += 1
+            pending[len(debug_info)] = ("image", raw_text)
 
         # 3) pause 토큰: include_pause=True일 때만 빈 영상 끼워넣음
         elif ttype == "pause":
-            paths: list[str] = []
             if include_pause:
-                blank_mp4 = generate_blank_video(duration=pause_duration)
-                paths.append(blank_mp4)
-                video_paths.append(blank_mp4)
-
-                if debug_log:
-                    print(
-                        f"[SEQ][{step_idx:02d}] pause -> blank video "
-                        f"duration={pause_duration}s, path={blank_mp4}"
-                    )
-            else:
-                if debug_log:
-                    print(
-                        f"[SEQ][{step_idx:02d}] pause skipped "
-                        f"(include_pause=False)"
-                    )
-
-            debug_entry = {
-                "idx": step_idx,
-                "token_type": "pause",
-                "token_text": raw_text,
-                "ids": [],
-                "paths": paths,
-                "resolve_logs": [],
-            }
-            debug_info.append(debug_entry)
-            step_idx += 1
+                pending[len(debug_info)] = ("pause", pause_duration)
 
         # 4) 알 수 없는 타입은 그냥 무시
-        else:
-            if debug_log:
-                print(
-                    f"[SEQ][{step_idx:02d}] unknown type '{ttype}' "
-                    f"for token '{raw_text}' -> skip"
-                )
-            debug_entry = {
-                "idx": step_idx,
-                "token_type": ttype,
-                "token_text": raw_text,
-                "ids": [],
-                "paths": [],
-                "resolve_logs": [],
-            }
-            debug_info.append(debug_entry)
-            step_idx += 1
 
+        debug_info.append(debug_entry)
+        step_idx += 1
+
+    # ---------- 2차: 카드/빈 화면 병렬 렌더링 ----------
+    rendered = _render_clip_jobs(list(dict.fromkeys(pending.values())))
+    for i, job in pending.items():
+        debug_info[i]["paths"] = [rendered[job]]
+
+    video_paths: list[str] = []
+    for entry in debug_info:
+        video_paths.extend(entry["paths"])
+
+    # 토큰별 매핑 결과: debug_log=True(요청 opt-in)면 항상, 아니면 DEBUG 레벨에서 샘플링
+    debug_payload(
+        logger, "sequence mapped", debug_log,
+        include_pause=include_pause,
+        pause_duration=pause_duration,
+        seq=[
+            {k: entry.get(k) for k in ("idx", "token_type", "token_text", "ids", "paths")}
+            for entry in debug_info
+        ],
+    )
     return video_paths, debug_info
 
 
@@ -1491,7 +1612,7 @@ def save_sequence(paths, output_path: Path):
 
 
 # 모듈 로드 시 Gemini 모델 한 번만 빌드
-if GOOGLE_API_KEY and genai is not None:
+if (GOOGLE_API_KEY and genai is not None) or LLM_TRANSPORT.offline:
     try:
         GEMINI_MODEL = build_gemini()
         print("[Gemini] 모델 초기화 완료")
@@ -1513,10 +1634,34 @@ except Exception as e:
 # ======================================================================
 # 로컬 규칙 기반 gloss 추출 (service.py에서 Gemini 실패 시 사용할 수 있는 최소 버전)
 # ======================================================================
+_MORPH_STRIPPER: MorphStripper | None = None
+
+
+def _get_morph_stripper() -> MorphStripper:
+    """글로스 사전 표제어를 vocab으로 쓰는 조사/어미 제거기 (최초 1회 생성)."""
+    global _MORPH_STRIPPER
+    if _MORPH_STRIPPER is None:
+        try:
+            vocab = load_gloss_index()["exact"].keys()
+        except Exception as e:
+            print(f"[Morph] 사전 로드 실패, vocab 없이 동작: {e}")
+            vocab = ()
+        _MORPH_STRIPPER = MorphStripper.from_file(MORPH_SUFFIX_PATH, vocab)
+    return _MORPH_STRIPPER
+
+
+def _strip_local_token(word: str) -> str:
+    """한글 토큰이면 조사/어미를 떼어 사전 어간으로, 숫자/영문은 그대로."""
+    if re.fullmatch(r"[가-힣]+", word or ""):
+        return _get_morph_stripper().strip(word) or word
+    return word
+
+
 def _local_gloss_rules(text: str) -> list[str]:
     """
     Gemini 없이도 사용할 수 있는 초간단 폴백 규칙.
     (extract_tokens의 로컬 폴백과 동일 패턴, 모두 gloss 취급)
+    한글 토큰은 morph.py의 suffix trie로 조사/어미를 떼어 사전 어간에 맞춘다.
     """
     clean = _norm(text)
     tokens = re.findall(
@@ -1530,4 +1675,4 @@ def _local_gloss_rules(text: str) -> list[str]:
         clean,
         re.VERBOSE,
     )
-    return [_first_word(t) for t in tokens if _first_word(t)]
+    return [_strip_local_token(_first_word(t)) for t in tokens if _first_word(t)]
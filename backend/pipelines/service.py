@@ -9,11 +9,14 @@ Django API(/speech_to_sign)에서 호출되는 파이프라인 래퍼
 - tokens → gloss_list / gloss_ids / 수어 mp4 영상 리스트
 - 문장 단위 영상 concat
 - latency 측정
-- 스냅샷(snapshot) 저장 (backend/snapshots/api)
+- 스냅샷(snapshot) 저장 (backend/snapshots/api/snapshots.jsonl, core.telemetry로 백그라운드 기록)
 - 프론트가 읽는 최종 결과 JSON 구성
 """
 
 import os
+import hashlib
+import logging
+import uuid
 import subprocess
 import tempfile
 from pathlib import Path
@@ -24,10 +27,18 @@ import ast
 import contextlib
 import wave
 import re
+from concurrent.futures import ThreadPoolExecutor
 
 from django.conf import settings
 from django.core.cache import cache  # 🔹 추가
 
+from core.cancellation import check_cancelled, run_cancellable  # 세션 재요청/연결 끊김 시 중단
+from core.scheduler import get_scheduler  # STT/합성 슬롯 우선순위 배정
+from core.tracing import record, span, traced  # 단계별 지연 히스토그램 (/metrics)
+from core.log import debug_payload
+from core import telemetry  # 스냅샷 백그라운드 기록 (jsonl, 회전/gzip)
+from accounts.snapshot_store import ingest_from_sink as ingest_snapshots
+
 # ============================== #
 # pipeline.py 내부 기능 import
 # ============================== #
@@ -48,7 +59,17 @@ from .pipeline import (
     WHISPER_LOAD_MS,
     log_gloss_mapping,    # 🔹 gloss 매핑 로그
     build_video_sequence_from_tokens,  # 🔹 tokens → 영상 시퀀스
+    gemini_user_parts,    # 🔹 (옵션) 문장별 사전 어휘 문맥 포함 contents
 )
+from .phrasebook import Phrasebook, sequence_from_entry
+from .captions import segments_from_debug_info, write_vtt
+from .clip_store import touch_atime  # LRU 사용 기록 (mtime은 캐시 키라 유지)
+from .clip_meta import timeline, token_timeline
+from .dag import Dag
+from .hls import build_playlist
+from .mp4concat import Mp4ConcatError, concat_mp4
+
+logger = logging.getLogger(__name__)
 
 # ==============================
 # API Snapshot 디렉토리
@@ -56,8 +77,12 @@ from .pipeline import (
 BASE_DIR = Path(__file__).resolve().parent.parent   # backend/
 API_SNAPSHOT_DIR = BASE_DIR / "snapshots" / "api"
 API_SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+API_SNAPSHOT_FILE = API_SNAPSHOT_DIR / "snapshots.jsonl"
+telemetry.register_stream("api_snapshots", API_SNAPSHOT_FILE, fmt="jsonl")
+telemetry.add_hook("api_snapshots", ingest_snapshots)  # 파일에 쓴 뒤 SnapshotRecord 테이블에도 적재
 
 
+@traced("gemini")
 def nlp_with_gemini(text, model):
     """
     Gemini가 {"cleaned": "...", "tokens": [...]} 형식으로 줄 때
@@ -79,7 +104,7 @@ def nlp_with_gemini(text, model):
 
     try:
         # build_gemini에서 system_instruction + response_mime_type=application/json 세팅 완료
-        parts = [{"role": "user", "parts": [clean]}]
+        parts = gemini_user_parts(clean, model)
         resp = model.generate_content(parts)
 
         raw = resp.text if getattr(resp, "text", None) else ""
@@ -125,19 +150,15 @@ def nlp_with_gemini(text, model):
         return cleaned, gloss, []
 
 
+@traced("snapshot_write")
 def save_api_snapshot(payload: dict) -> str:
-    """REST API 호출 스냅샷 저장"""
-    ts = now_ts()
-    out_path = API_SNAPSHOT_DIR / f"snapshot_{ts}.json"
-
-    try:
-        with open(out_path, "w", encoding="utf-8") as f:
-            json.dump(payload, f, ensure_ascii=False, indent=2)
-        print(f"[API Snapshot saved] {out_path}")
-    except Exception as e:
-        print(f"[API Snapshot ERROR] {e}")
-
-    return str(out_path)
+    """
+    REST API 호출 스냅샷 저장
+    요청마다 파일을 만들지 않고 telemetry 큐에 넣기만 함 → snapshots/api/snapshots.jsonl에 모아서 기록
+    """
+    if not telemetry.emit("api_snapshots", dict(payload)):  # 얕은 복사: 응답 뒤 result가 바뀌어도 기록 값 고정
+        logger.warning("api snapshot dropped (ts=%s)", payload.get("ts"))
+    return str(API_SNAPSHOT_FILE)
 
 
 # ==============================
@@ -146,6 +167,15 @@ def save_api_snapshot(payload: dict) -> str:
 SENTENCE_DIR = MEDIA_ROOT / "sign_sentences"
 SENTENCE_DIR.mkdir(parents=True, exist_ok=True)
 
+# 문장 영상 캐시 용량 한도 (넘으면 가장 오래 안 쓴 sent_*.mp4부터 삭제)
+SENTENCE_CACHE_MAX_BYTES = int(os.getenv("SENTENCE_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+
+# concat 인코딩 설정 (캐시 키에 포함 → 설정이 바뀌면 새로 렌더링)
+CONCAT_OUTPUT_ARGS = ["-c", "copy"]
+
+# 코덱 헤더가 같은 클립은 ffmpeg 프로세스 없이 MP4 box 단위로 이어붙임 (0이면 항상 ffmpeg)
+MP4_BOX_CONCAT = os.getenv("MP4_BOX_CONCAT", "1") == "1"
+
 # ==============================
 # 글로스 사전 전역 로딩
 # ==============================
@@ -186,12 +216,119 @@ def load_gloss_meanings():
 GLOSS_MEANINGS = load_gloss_meanings()
 # -----------------------------------------------------------
 
+# ==============================
+# 스크립트 문장 phrasebook (python -m pipelines.phrasebook 으로 빌드)
+# ==============================
+PHRASEBOOK = Phrasebook.load()
+PHRASEBOOK_THRESHOLD = float(os.getenv("PHRASEBOOK_THRESHOLD", "0.85"))
+
+
+def sentence_cache_key(video_paths) -> str:
+    """
+    클립 경로(순서 포함) + 각 파일 mtime/size + concat 설정으로 만든 내용 주소.
+    같은 클립 시퀀스면 같은 키 → 이미 렌더링된 문장 영상을 그대로 재사용.
+    """
+    h = hashlib.sha1()
+    h.update(" ".join(CONCAT_OUTPUT_ARGS).encode("utf-8"))
+    for p in video_paths:
+        try:
+            st = os.stat(p)
+            sig = f"{os.path.abspath(p)}|{st.st_mtime_ns}|{st.st_size}"
+        except OSError:
+            sig = f"{os.path.abspath(p)}|missing"
+        h.update(sig.encode("utf-8") + b"\n")
+    return h.hexdigest()[:24]
+
+
+def _sentence_cache_group(name: str) -> str | None:
+    """sent_<키>.mp4 / sent_<키>.<해시>.vtt → "<키>" (같은 문장 영상 묶음). 캐시 파일이 아니면 None."""
+    if not name.startswith("sent_"):
+        return None
+    if name.endswith(".mp4"):
+        return name[5:-4]
+    if name.endswith(".vtt"):
+        return name[5:-4].split(".", 1)[0]
+    return None
+
+
+def _enforce_sentence_cache_budget(keep: Path | None = None):
+    """
+    sent_*.mp4 + 자막 sent_*.vtt 총 용량이 한도를 넘으면
+    atime(=마지막 사용) 오래된 문장부터 영상과 자막을 같이 삭제.
+    """
+    groups: dict[str, list] = {}  # 키 → [마지막 사용, 용량, 경로들]
+    total = 0
+    for entry in os.scandir(SENTENCE_DIR):
+        key = _sentence_cache_group(entry.name) if entry.is_file() else None
+        if key is None:
+            continue
+        st = entry.stat()
+        g = groups.setdefault(key, [0.0, 0, []])
+        g[0] = max(g[0], st.st_atime)
+        g[1] += st.st_size
+        g[2].append(entry.path)
+        total += st.st_size
+
+    if total <= SENTENCE_CACHE_MAX_BYTES:
+        return
+
+    keep_key = _sentence_cache_group(Path(keep).name) if keep is not None else None
+    for key, (_atime, size, paths) in sorted(groups.items(), key=lambda kv: kv[1][0]):
+        if total <= SENTENCE_CACHE_MAX_BYTES:
+            break
+        if key == keep_key:
+            continue
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        total -= size
 
+
+@traced("concat")
 def concat_videos_ffmpeg(video_paths):
-    """여러 개 수어 mp4를 하나로 합쳐 문장 단위 영상 생성"""
+    """
+    여러 개 수어 mp4를 하나로 합쳐 문장 단위 영상 생성.
+    클립 시퀀스 해시(sentence_cache_key)로 파일명을 정해서
+    같은 문장은 ffmpeg 없이 바로 반환하고, 동시 요청끼리 파일을 덮어쓰지 않는다.
+    """
     if not video_paths:
         return None, None
 
+    out_name = f"sent_{sentence_cache_key(video_paths)}.mp4"
+    out_path = SENTENCE_DIR / out_name
+    out_url = f"/media/sign_sentences/{out_name}"
+
+    # 캐시 hit: atime 갱신(LRU용)만 하고 바로 반환 (mtime은 HLS 세그먼트 키라 건드리지 않음)
+    if touch_atime(out_path):
+        return out_path, out_url
+
+    # 임시 파일에 쓰고 완성되면 os.replace (다른 요청이 반쯤 쓴 파일을 읽지 않도록)
+    tmp_path = SENTENCE_DIR / f".tmp_{uuid.uuid4().hex}.mp4"
+
+    # 1) 코덱 헤더가 같은 클립이면 ffmpeg 없이 box 단위로 이어붙임
+    if MP4_BOX_CONCAT:
+        try:
+            concat_mp4([str(p) for p in video_paths], str(tmp_path))
+            os.replace(tmp_path, out_path)
+        except Mp4ConcatError as e:
+            print(f"[Concat] box concat 불가 → ffmpeg 폴백: {e}")
+        except Exception as e:
+            print(f"[Concat] box concat 실패 → ffmpeg 폴백: {e}")
+        finally:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        if out_path.exists():
+            try:
+                _enforce_sentence_cache_budget(keep=out_path)
+            except Exception as e:
+                print(f"[SentenceCache] eviction error: {e}")
+            return out_path, out_url
+
+    # 2) ffmpeg concat demuxer
     with tempfile.NamedTemporaryFile(
         mode="w", suffix=".txt", delete=False, encoding="utf-8"
     ) as f:
@@ -199,29 +336,46 @@ def concat_videos_ffmpeg(video_paths):
             f.write(f"file '{p}'\n")
         list_path = f.name
 
-    out_name = f"sent_{now_ts()}.mp4"
-    out_path = SENTENCE_DIR / out_name
-
     cmd = [
         "ffmpeg", "-y",
         "-f", "concat",
         "-safe", "0",
         "-i", list_path,
-        "-c", "copy",
-        str(out_path),
+        *CONCAT_OUTPUT_ARGS,
+        str(tmp_path),
     ]
 
     try:
-        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        # 요청이 취소되면(같은 세션 재요청 등) ffmpeg 프로세스를 바로 kill
+        run_cancellable(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        os.replace(tmp_path, out_path)
     finally:
-        try:
-            os.remove(list_path)
-        except OSError:
-            pass
+        for p in (list_path, tmp_path):
+            try:
+                os.remove(p)
+            except OSError:
+                pass
 
-    return out_path, f"/media/sign_sentences/{out_name}"
+    try:
+        _enforce_sentence_cache_budget(keep=out_path)
+    except Exception as e:
+        print(f"[SentenceCache] eviction error: {e}")
 
+    return out_path, out_url
 
+
+# HLS 모드에서 단일 mp4가 필요한 클라이언트용 백그라운드 합성 워커
+_SENTENCE_RENDER_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="sent-render")
+
+
+def _render_sentence_background(video_paths):
+    try:
+        concat_videos_ffmpeg(video_paths)
+    except Exception as e:
+        print(f"[SentenceRender] background concat error: {e}")
+
+
+@traced("decode")
 def convert_to_wav_if_needed(src_path: Path) -> Path:
     """webm/mp3 등 → wav(16kHz, mono) 변환"""
     if src_path.suffix.lower() == ".wav":
@@ -238,10 +392,11 @@ def convert_to_wav_if_needed(src_path: Path) -> Path:
         str(dst_path),
     ]
 
-    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    run_cancellable(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
     return dst_path
 
 
+@traced("ffprobe")
 def get_media_duration(path: Path) -> float:
     """
     ffprobe로 미디어(오디오/비디오) 길이(초) 구하기.
@@ -266,144 +421,310 @@ def get_media_duration(path: Path) -> float:
 
 
 def get_audio_duration(path: Path) -> float:
-    """과거 코드 호환용 wrapper (실제로는 get_media_duration 사용)"""
+    """
+    업로드 음성 길이(초).
+    wav는 헤더만 읽어서 계산 (ffprobe 없음), 그 외 포맷은 get_media_duration.
+    """
+    if Path(path).suffix.lower() == ".wav":
+        try:
+            with contextlib.closing(wave.open(str(path), "rb")) as wf:
+                return wf.getnframes() / float(wf.getframerate() or 1)
+        except Exception:
+            pass
     return get_media_duration(path)
 
 
 # ==============================
 # 메인 처리 함수 (API에서 호출)
 # ==============================
-def process_audio_file(django_file, mode=None, session_id=None):
+def _emit_stage(on_stage, stage: str, data: dict):
+    """비동기 job용 단계별 부분 결과 콜백 (콜백 오류로 파이프라인이 멈추지 않도록)."""
+    if on_stage is None:
+        return
+    try:
+        on_stage(stage, data)
+    except Exception as e:
+        print(f"[Stage] on_stage({stage}) error: {e}")
+
+
+def _video_urls(video_paths) -> list[str]:
+    """클립 경로 → 프론트용 URL (MEDIA_ROOT 밖이면 경로 그대로)."""
+    urls = []
+    for p in video_paths:
+        p = Path(p)
+        try:
+            rel = p.relative_to(MEDIA_ROOT)
+            urls.append(settings.MEDIA_URL.rstrip("/") + "/" + str(rel).replace("\\", "/"))
+        except ValueError:
+            urls.append(str(p))
+    return urls
+
+
+def process_audio_file(
+    django_file, mode=None, session_id=None, output="mp4", sentence_file=True, on_stage=None,
+    debug=False,
+):
     """
     업로드된 오디오를 처리하여
     STT → Gemini(NLP) → tokens → gloss_id → 영상 합성 → latency → snapshot 저장 → 최종 응답
 
+    단계는 pipelines.dag.Dag로 실행한다.
+      audio → stt → phrase → nlp ┬→ mapping ┬→ synth
+                                 │          ├→ captions (합성과 동시)
+                                 │          └→ clips    (합성과 동시, 클립 URL/타임라인)
+                                 └→ gloss_meta (매핑/합성과 동시)
+      persist(스냅샷/매핑 로그)는 응답 뒤에 실행
+    latency_ms 키(stt, stt_load, nlp, mapping, synth)는 각 노드 실행 시간.
+    현재 취소 토큰(core.cancellation)이 취소되면 다음 단계 전에 Cancelled 발생 (ffmpeg는 kill).
+
     mode: "질문" / "응답" 등 프론트에서 넘겨주는 발화 타입 (선택)
     session_id: 이번 상담 세션 식별자 (선택)
+    output: "mp4"(기본, 서버 concat) / "hls"(m3u8 재생목록만 생성)
+    sentence_file: output="hls"일 때 단일 mp4도 필요한지
+                   (True면 백그라운드에서 합성, URL은 바로 내려줌)
+    on_stage: (stage, data) 콜백. 단계가 끝날 때마다 부분 결과 전달
+              transcript → tokens → clips (accounts.jobs 비동기 모드에서 사용)
+    debug: True면 원문/토큰별 매핑/경로 목록 같은 큰 디버그 로그를 이 요청에 대해 항상 남김
+           (기본은 DEBUG 레벨 + 샘플링, core.log.debug_payload)
     """
+    dag = Dag("speech_to_sign")
 
     # ----------------------------------------
-    # 1) 업로드 파일을 temp 폴더에 저장
+    # 1) 업로드 파일을 temp 폴더에 저장 + wav 변환
     # ----------------------------------------
-    temp_dir = Path(settings.MEDIA_ROOT) / "temp"
-    temp_dir.mkdir(parents=True, exist_ok=True)
-    temp_path = temp_dir / django_file.name
-
-    with open(temp_path, "wb") as f:
-        for chunk in django_file.chunks():
-            f.write(chunk)
+    @dag.node()
+    def audio():
+        temp_dir = Path(settings.MEDIA_ROOT) / "temp"
+        temp_dir.mkdir(parents=True, exist_ok=True)
+        temp_path = temp_dir / django_file.name
 
-    # webm → wav 변환
-    wav_path = convert_to_wav_if_needed(temp_path)
+        with span("upload"), open(temp_path, "wb") as f:
+            for chunk in django_file.chunks():
+                f.write(chunk)
 
-    # wav 길이(초) 측정 (STT 성능 비교용)
-    audio_sec = get_audio_duration(wav_path)
+        # webm → wav 변환
+        wav_path = convert_to_wav_if_needed(temp_path)
 
-    latency = {}   # latency 기록용
+        # wav 길이(초) 측정 (STT 성능 비교용)
+        return wav_path, get_audio_duration(wav_path)
 
     # ----------------------------------------
     # 2) STT
     # ----------------------------------------
-        # 2) STT
-    t0 = time.perf_counter()
-    text = stt_from_file(str(wav_path))   # Whisper STT 결과 (원문)
-    t1 = time.perf_counter()
-    latency["stt"] = round((t1 - t0) * 1000, 1)
-    latency["stt_load"] = WHISPER_LOAD_MS  # whisper 모델 로딩 시간(ms, 최초 1회)
-
-    # 2-1) 화면/자막용 문장: STT 결과 + 발음/오타 교정만 적용
-    stt_norm = _norm(text)
-    ui_text = apply_text_normalization(stt_norm)
-
-    # STT 성능 로그
-    stt_ms = latency["stt"]
-    ratio = stt_ms / (audio_sec * 1000 + 1e-6) if audio_sec else 0.0
-    print(f"[Perf] audio_sec={audio_sec:.2f}, stt_ms={stt_ms:.1f}, ratio={ratio:.2f}")
-    print(f"[DEBUG] STT raw text: {repr(text)}")
+    @dag.node(deps=["audio"])
+    def stt(audio):
+        wav_path, audio_sec = audio
+        # whisper 슬롯은 모드 우선순위 / deadline / 세션 공정성 순서로 배정 (짧은 발화가 먼저)
+        with get_scheduler("stt").slot(mode=mode, session_id=session_id, size=audio_sec) as ticket:
+            # 슬롯을 기다리는 동안 취소됐으면 whisper를 돌리지 않고 바로 슬롯 반납
+            check_cancelled("stt")
+            t0 = time.perf_counter()
+            text = stt_from_file(str(wav_path))   # Whisper STT 결과 (원문)
+            stt_ms = round((time.perf_counter() - t0) * 1000, 1)
+            record("stt", stt_ms)
+
+        # 2-1) 화면/자막용 문장: STT 결과 + 발음/오타 교정만 적용
+        with span("normalize"):
+            ui_text = apply_text_normalization(_norm(text))
+
+        # STT 성능 로그
+        ratio = stt_ms / (audio_sec * 1000 + 1e-6) if audio_sec else 0.0
+        logger.info("stt done", extra={"audio_sec": round(audio_sec, 2), "stt_ms": stt_ms, "ratio": round(ratio, 2)})
+        debug_payload(logger, "stt raw text", debug, text=text)
+        _emit_stage(on_stage, "transcript", {"text": text, "clean_text": ui_text})
+        return {"text": text, "ui_text": ui_text, "ms": stt_ms, "wait_ms": ticket.wait_ms}
 
     # ----------------------------------------
-    # 3) NLP 단계: clean + gloss + tokens (Gemini)
+    # 2-2) 스크립트 문장 phrasebook 조회
+    #      거의 같은 문장이면 NLP + 매핑을 건너뛰고 저장된 결과 사용
     # ----------------------------------------
-    model = GEMINI_MODEL
-
-    t2 = time.perf_counter()
-    # 교정된 ui_text를 가지고 Gemini 돌리기
-    nlp_clean_text, gloss_list, tokens = nlp_with_gemini(ui_text, model)
-    t3 = time.perf_counter()
-    latency["nlp"] = round((t3 - t2) * 1000, 1)
-
-    # 3-1) 수어용 cleaned에도 규칙 한 번 더 적용(선택 사항이지만 문제 없음)
-    nlp_clean_text = apply_text_normalization(nlp_clean_text)
+    @dag.node(deps=["stt"])
+    def phrase(stt):
+        hit = PHRASEBOOK.lookup(stt["ui_text"], threshold=PHRASEBOOK_THRESHOLD)
+        if hit:
+            logger.info("phrasebook hit", extra={"score": hit["score"], "sentence": hit["entry"]["sentence"]})
+        return hit
 
+    # ----------------------------------------
+    # 3) NLP 단계: clean + gloss + tokens (Gemini)
+    # ----------------------------------------
+    @dag.node(deps=["stt", "phrase"])
+    def nlp(stt, phrase):
+        ui_text = stt["ui_text"]
+        entry = phrase["entry"] if phrase else None
+        if entry:
+            nlp_clean_text = entry.get("cleaned") or ui_text
+            gloss_list = list(entry.get("gloss") or [])
+            tokens = entry.get("tokens") or []
+        else:
+            # 교정된 ui_text를 가지고 Gemini 돌리기
+            nlp_clean_text, gloss_list, tokens = nlp_with_gemini(ui_text, GEMINI_MODEL)
+            # 3-1) 수어용 cleaned에도 규칙 한 번 더 적용(선택 사항이지만 문제 없음)
+            nlp_clean_text = apply_text_normalization(nlp_clean_text)
+
+        _emit_stage(on_stage, "tokens", {
+            "nlp_clean_text": nlp_clean_text,
+            "gloss": gloss_list,
+            "tokens": tokens,
+        })
+        return nlp_clean_text, gloss_list, tokens
 
     # ----------------------------------------
     # 4) tokens → 영상 시퀀스 (토큰 순서 그대로)
     # ----------------------------------------
-    t4 = time.perf_counter()
-    video_paths_for_concat, debug_info = build_video_sequence_from_tokens(
-        tokens=tokens,
-        db_index=GLOSS_INDEX,
-        original_text=nlp_clean_text,
-        # rules=None  # 넘기지 않으면 MERGED_RULES 사용
-        include_pause=False,   # pause를 실제 빈 화면으로 넣고 싶으면 True
-        pause_duration=0.7,
-        debug_log=True,        # 디버깅 로그 보고 싶으면 True
-    )
-    t5 = time.perf_counter()
-    latency["mapping"] = round((t5 - t4) * 1000, 1)
-
-    # gloss_ids / gloss_labels는 "메타 정보" 용도로만 따로 계산
-    gloss_ids = to_gloss_ids(gloss_list, GLOSS_INDEX)
+    @dag.node(deps=["nlp", "phrase"])
+    @traced("mapping")
+    def mapping(nlp, phrase):
+        nlp_clean_text, _gloss_list, tokens = nlp
+        if phrase:
+            return sequence_from_entry(phrase["entry"])
+        return build_video_sequence_from_tokens(
+            tokens=tokens,
+            db_index=GLOSS_INDEX,
+            original_text=nlp_clean_text,
+            # rules=None  # 넘기지 않으면 MERGED_RULES 사용
+            include_pause=False,   # pause를 실제 빈 화면으로 넣고 싶으면 True
+            pause_duration=0.7,
+            debug_log=debug,       # 토큰별 매핑 로그 (요청에서 debug=1일 때만)
+        )
 
-    gloss_labels = []
-    for gid in gloss_ids:
-        terms = GLOSS_MEANINGS.get(gid) or []
-        if terms:
-            gloss_labels.append(terms[0])
+    # 4-1) gloss_ids / gloss_labels는 "메타 정보" 용도로만 따로 계산 (매핑/합성과 동시)
+    @dag.node(deps=["nlp", "phrase"])
+    def gloss_meta(nlp, phrase):
+        if phrase:
+            gloss_ids = [str(g) for g in phrase["entry"].get("gloss_ids") or []]
         else:
-            gloss_labels.append(gid)
+            gloss_ids = to_gloss_ids(nlp[1], GLOSS_INDEX)
+
+        gloss_labels = []
+        for gid in gloss_ids:
+            terms = GLOSS_MEANINGS.get(gid) or []
+            if terms:
+                gloss_labels.append(terms[0])
+            else:
+                gloss_labels.append(gid)
+        return gloss_ids, gloss_labels
+
+    # 4-2) 개별 영상 URL + 토큰/클립 재생 구간 (클립 메타 인덱스 합산, 합성과 동시)
+    @dag.node(deps=["mapping", "gloss_meta"])
+    def clips(mapping, gloss_meta):
+        video_paths, debug_info = mapping
+        sign_video_list = _video_urls(video_paths)
+        _emit_stage(on_stage, "clips", {
+            "gloss_ids": gloss_meta[0],
+            "gloss_labels": gloss_meta[1],
+            "sign_video_list": sign_video_list,
+        })
+
+        clip_tl = timeline(video_paths)
+        for item, url in zip(clip_tl, sign_video_list):
+            item["url"] = url
+            del item["path"]
+        return sign_video_list, clip_tl, token_timeline(debug_info)
 
     # ----------------------------------------
     # 5) 영상 합성
     # ----------------------------------------
-    t6 = time.perf_counter()
-    sent_abs, sent_url = concat_videos_ffmpeg(video_paths_for_concat)
-    t7 = time.perf_counter()
-    latency["synth"] = round((t7 - t6) * 1000, 1)
-
-    # 5-1) 합성된 문장 영상 길이(초) 측정
-    video_sec = 0.0
-    if sent_abs is not None:
-        video_sec = get_media_duration(sent_abs)
-        print(f"[Perf] video_sec={video_sec:.2f} s")
-
-    # 개별 영상 URL 리스트(sign_video_list) 구성
-    sign_video_list = []
-    for p in video_paths_for_concat:
-        p = Path(p)
+    @dag.node(deps=["mapping", "phrase"])
+    def synth(mapping, phrase):
+        video_paths, _debug_info = mapping
+        entry = phrase["entry"] if phrase else None
+        out = {"sent_abs": None, "sent_url": None, "hls_url": None, "sent_ready": True, "wait_ms": 0.0}
+        if output == "hls":
+            # 세그먼트 목록으로 m3u8만 작성 (concat/ffprobe 없음)
+            _m3u8, out["hls_url"], _total = build_playlist(video_paths)
+            if sentence_file and video_paths:
+                # 문장 영상 파일명은 클립 해시로 정해지므로 URL은 미리 알 수 있음
+                sent_name = f"sent_{sentence_cache_key(video_paths)}.mp4"
+                out["sent_url"] = f"/media/sign_sentences/{sent_name}"
+                out["sent_ready"] = (SENTENCE_DIR / sent_name).exists()
+                if not out["sent_ready"]:
+                    _SENTENCE_RENDER_POOL.submit(_render_sentence_background, list(video_paths))
+        elif entry and entry.get("video") and os.path.exists(entry["video"]):
+            # phrasebook에 미리 합성해 둔 문장 영상 재사용
+            out["sent_abs"], out["sent_url"] = Path(entry["video"]), entry.get("video_url")
+        else:
+            with get_scheduler("synth").slot(mode=mode, session_id=session_id, size=len(video_paths)) as ticket:
+                out["sent_abs"], out["sent_url"] = concat_videos_ffmpeg(video_paths)
+            out["wait_ms"] = ticket.wait_ms
+        return out
+
+    # 5-1) 토큰 자막: 영상에 굽지 않고 WebVTT sidecar로 (클립 길이만 사용, 합성과 동시)
+    @dag.node(deps=["mapping"])
+    def captions(mapping):
         try:
-            rel = p.relative_to(MEDIA_ROOT)
-            url = settings.MEDIA_URL.rstrip("/") + "/" + str(rel).replace("\\", "/")
-            sign_video_list.append(url)
-        except ValueError:
-            sign_video_list.append(str(p))
+            vtt_path = write_vtt(
+                segments_from_debug_info(mapping[1]),
+                SENTENCE_DIR,
+                video_key=sentence_cache_key(mapping[0]),  # sent_<키>.mp4와 같이 용량 관리/삭제
+            )
+        except Exception as e:
+            logger.warning("vtt error: %s", e)
+            return None
+        return f"/media/sign_sentences/{vtt_path.name}" if vtt_path is not None else None
+
+    # 6) 응답 뒤: gloss 매핑 로그 + API 스냅샷 (result는 res.release로 전달)
+    @dag.node(deps=["result"], after_response=True)
+    def persist(result):
+        # 🔹 gloss vs gloss_labels 매핑 로그 기록 (mismatch만 저장)
+        try:
+            log_gloss_mapping(
+                gloss_list=result["gloss"],
+                gloss_ids=[str(g) for g in result["gloss_ids"]],
+                gloss_labels=[str(l) for l in result["gloss_labels"]],
+                text=result["nlp_clean_text"],
+                mode=mode,
+                session_id=session_id,
+                ts=result["ts"],
+                only_mismatch=True,  # 전부 보고 싶으면 False로 변경
+            )
+        except Exception as e:
+            logger.warning("gloss mapping log error: %s", e)
+        save_api_snapshot(result)
+
+    res = dag.run()
+
+    _wav_path, audio_sec = res["audio"]
+    text, ui_text = res["stt"]["text"], res["stt"]["ui_text"]
+    phrase_hit = res["phrase"]
+    phrase_entry = phrase_hit["entry"] if phrase_hit else None
+    nlp_clean_text, gloss_list, tokens = res["nlp"]
+    video_paths_for_concat, debug_info = res["mapping"]
+    gloss_ids, gloss_labels = res["gloss_meta"]
+    sign_video_list, clip_tl, token_tl = res["clips"]
+    synth_out = res["synth"]
+    sent_url, hls_url, sent_ready = synth_out["sent_url"], synth_out["hls_url"], synth_out["sent_ready"]
+    vtt_url = res["captions"]
+
+    # 5-2) 문장 영상 길이(초): 클립 메타 인덱스 합산 (ffprobe 없음)
+    video_sec = clip_tl[-1]["end"] if clip_tl else 0.0
+
+    latency = {
+        "stt": res["stt"]["ms"],
+        "stt_load": WHISPER_LOAD_MS,  # whisper 모델 로딩 시간(ms, 최초 1회)
+        "nlp": res.ms("nlp"),
+        "mapping": res.ms("mapping"),
+        "synth": res.ms("synth"),
+    }
+    # 실제 경과 시간 (단계가 겹치므로 단계 합보다 짧음)
+    wall_ms = max((t["end"] for t in res.timing.values()), default=0.0)
 
     # ----------------------------------------
     # 6) 디버그 로그
     # ----------------------------------------
-    print("\n========== [DEBUG process_audio_file] ==========")
-    print(f"text (STT 원문): {repr(text)}")
-    print(f"ui_text (교정된 STT): {repr(ui_text)}")
-    print(f"nlp_clean_text (수어용): {repr(nlp_clean_text)}")
-    print(f"gloss_list: {gloss_list}")
-
-    print(f"gloss_ids: {gloss_ids}")
-    print(f"gloss_labels: {gloss_labels}")
-    print(f"sentence_video_url: {sent_url}")
-    print(f"latency_ms: {latency}")
-    print(f"video_paths_for_concat: {video_paths_for_concat}")
-    print(f"sign_video_list: {sign_video_list}")
-    print("===============================================\n")
+    debug_payload(
+        logger, "speech_to_sign payload", debug,
+        session_id=session_id,
+        text=text,                     # STT 원문
+        ui_text=ui_text,               # 교정된 STT
+        nlp_clean_text=nlp_clean_text, # 수어용
+        gloss_list=gloss_list,
+        gloss_ids=gloss_ids,
+        gloss_labels=gloss_labels,
+        sentence_video_url=sent_url,
+        video_paths_for_concat=video_paths_for_concat,
+        sign_video_list=sign_video_list,
+    )
 
     # ----------------------------------------
     # 7) latency 보정: sec 단위 + total까지 계산
@@ -423,16 +744,21 @@ def process_audio_file(django_file, mode=None, session_id=None):
         "mapping_sec": round(mapping_ms / 1000.0, 2),
         "synth_sec":   round(synth_ms / 1000.0, 2),
         "total_sec":   round(total_ms / 1000.0, 2),
+        "wall_sec":    round(wall_ms / 1000.0, 2),
     }
 
-    print(
-        f"[Perf Sentence] STT load: {latency_sec['stt_load_sec']:.2f} s / "
-        f"STT: {latency_sec['stt_sec']:.2f} s / "
-        f"NLP: {latency_sec['nlp_sec']:.2f} s / "
-        f"매핑: {latency_sec['mapping_sec']:.2f} s / "
-        f"합성: {latency_sec['synth_sec']:.2f} s"
+    logger.info(
+        "speech_to_sign done",
+        extra={
+            "session_id": session_id,
+            "mode": mode,
+            "phrasebook": bool(phrase_entry),
+            "clips": len(video_paths_for_concat),
+            "video_sec": video_sec,
+            "latency_sec": latency_sec,
+            "stage_timing_ms": res.timing,
+        },
     )
-    print(f"[Perf Sentence] 총합: {latency_sec['total_sec']:.2f} s")
 
     # ----------------------------------------
     current_ts = now_ts()
@@ -448,30 +774,35 @@ def process_audio_file(django_file, mode=None, session_id=None):
         "gloss": gloss_list,
         "gloss_ids": gloss_ids,
         "sentence_video_url": sent_url,
+        "sentence_video_ready": sent_ready,
+        "hls_playlist_url": hls_url,
+        "sentence_vtt_url": vtt_url,
         "sign_video_list": sign_video_list,
         "gloss_labels": gloss_labels,
         "audio_sec": audio_sec,
         "video_sec": video_sec,
+        "timeline": {
+            "tokens": token_tl,   # 토큰별 [start, end) 초
+            "clips": clip_tl,     # sign_video_list와 같은 순서
+        },
         "latency_ms": latency,
         "latency_sec": latency_sec,
+        "stage_timing_ms": dict(res.timing),  # 노드별 {start, end, ms} (DAG 시작 기준)
+        "sched_wait_ms": {                     # 워커 슬롯 대기 시간 (core.scheduler)
+            "stt": res["stt"]["wait_ms"],
+            "synth": synth_out["wait_ms"],
+        },
         "tokens": tokens,        # Gemini가 준 전체 토큰 로그
-        "debug_info": debug_info # 토큰별 매핑 상세 (원하면 프론트에서 써도 됨)
+        "debug_info": debug_info, # 토큰별 매핑 상세 (원하면 프론트에서 써도 됨)
+        "phrasebook": {
+            "hit": bool(phrase_entry),
+            "score": phrase_hit["score"] if phrase_hit else None,
+            "sentence": phrase_entry.get("sentence") if phrase_entry else None,
+        },
     }
 
-    # 🔹 gloss vs gloss_labels 매핑 로그 기록 (mismatch만 저장)
-    try:
-        log_gloss_mapping(
-            gloss_list=gloss_list,
-            gloss_ids=[str(g) for g in gloss_ids],
-            gloss_labels=[str(l) for l in gloss_labels],
-            text=nlp_clean_text,
-            mode=mode,
-            session_id=session_id,
-            ts=current_ts,
-            only_mismatch=True,  # 전부 보고 싶으면 False로 변경
-        )
-    except Exception as e:
-        print(f"[GlossLog] logging error: {e}")
+    # 취소된 요청(더 새 요청이 들어옴 등)은 최신 결과를 옛 결과로 덮어쓰지 않음
+    check_cancelled("result")
 
     # 🔹 세션별 최신 결과를 서버 캐시에 저장 (다른 브라우저에서도 공유)
     if session_id:
@@ -479,7 +810,8 @@ def process_audio_file(django_file, mode=None, session_id=None):
         try:
             cache.set(cache_key, result, timeout=60 * 60)  # 1시간
         except Exception as e:
-            print(f"[Cache] save error for {cache_key}: {e}")
+            logger.warning("last_result cache save error for %s: %s", cache_key, e)
 
-    save_api_snapshot(result)
+    # 🔹 gloss 매핑 로그 + 스냅샷 저장은 persist 노드에서 (응답 뒤)
+    res.release(result=result)
     return result
@@ -5,4 +5,10 @@ from . import views_metrics
 
 urlpatterns = [
     path("api/metrics/snapshots/", views_metrics.list_snapshots, name="metrics-snapshots"),
+    path("api/metrics/snapshots/aggregates/", views_metrics.snapshot_aggregates, name="metrics-snapshot-aggregates"),
+    path("api/metrics/admission/", views_metrics.admission_stats, name="metrics-admission"),
+    path("api/metrics/scheduler/", views_metrics.scheduler_stats, name="metrics-scheduler"),
+    path("api/metrics/cancellation/", views_metrics.cancellation_stats, name="metrics-cancellation"),
+    path("api/metrics/idempotency/", views_metrics.idempotency_stats, name="metrics-idempotency"),
+    path("api/metrics/stages/", views_metrics.stage_latency, name="metrics-stages"),
 ]
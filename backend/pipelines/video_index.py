@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+video_index.py
+gloss_id → 수어 mp4 경로 인덱스 (SQLite에 저장, 디렉터리 mtime 기준 증분 갱신)
+
+예전에는 프로세스마다 import 시점에 GLOSS_MP4_DIR.rglob("*.mp4")로 전체 트리를 훑었다.
+- 폴더마다 (mtime_ns, 하위 폴더 목록)을 저장해 두고
+  mtime이 그대로인 폴더는 파일 목록을 다시 읽지 않음 (폴더당 stat 1번)
+- 바뀐 폴더만 scandir해서 그 폴더의 파일 행을 교체
+- 조회는 mapping()이 돌려주는 dict로 O(1), 요청 처리 중에는 파일시스템 접근 없음
+
+pipelines.pipeline(VIDEO_PATH_INDEX)과 pipeline_second.HybridSynthesizer가 같이 사용.
+
+강제 갱신:
+    python -m pipelines.video_index [--root D:/.../service]
+
+환경변수:
+    VIDEO_INDEX_DB   SQLite 파일 경로 (기본: backend/outputs/video_index.sqlite3)
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_DB_PATH = BACKEND_DIR / "outputs" / "video_index.sqlite3"
+
+
+class VideoPathIndex:
+    def __init__(self, db_path: Path | str = DEFAULT_DB_PATH, suffix: str = ".mp4"):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.suffix = suffix.lower()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS dirs (
+                dir TEXT PRIMARY KEY,
+                root TEXT NOT NULL,
+                mtime_ns INTEGER,
+                subdirs TEXT
+            );
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                gid TEXT NOT NULL,
+                dir TEXT NOT NULL,
+                root TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS files_root_gid ON files (root, gid);
+            CREATE INDEX IF NOT EXISTS files_dir ON files (dir);
+            """
+        )
+        self._conn.commit()
+
+    @classmethod
+    def from_env(cls) -> "VideoPathIndex":
+        return cls(os.getenv("VIDEO_INDEX_DB") or DEFAULT_DB_PATH)
+
+    # ------------------------------------------------------------------
+    def _drop_dir_tree(self, root: str, d: str):
+        """사라진 폴더와 그 하위 폴더/파일 행 삭제."""
+        # LIKE는 폴더명의 _ / %를 와일드카드로 읽으므로 앞부분 문자열을 그대로 비교
+        prefix = d.rstrip(os.sep) + os.sep
+        args = (root, d, len(prefix), prefix)
+        self._conn.execute("DELETE FROM files WHERE root = ? AND (dir = ? OR substr(dir, 1, ?) = ?)", args)
+        self._conn.execute("DELETE FROM dirs WHERE root = ? AND (dir = ? OR substr(dir, 1, ?) = ?)", args)
+
+    def refresh(self, root_dir: Path | str) -> dict:
+        """
+        root_dir 아래 인덱스를 증분 갱신.
+        반환: {"dirs": 확인한 폴더 수, "rescanned": 다시 읽은 폴더 수, "files": 파일 수}
+        """
+        root = str(Path(root_dir).resolve())
+        stats = {"dirs": 0, "rescanned": 0, "files": 0}
+
+        with self._lock:
+            known = {
+                d: (mtime, json.loads(subs or "[]"))
+                for d, mtime, subs in self._conn.execute(
+                    "SELECT dir, mtime_ns, subdirs FROM dirs WHERE root = ?", (root,)
+                )
+            }
+            stack = [root]
+            while stack:
+                d = stack.pop()
+                try:
+                    mtime = os.stat(d).st_mtime_ns
+                except OSError:
+                    self._drop_dir_tree(root, d)
+                    continue
+                stats["dirs"] += 1
+
+                prev = known.get(d)
+                if prev and prev[0] == mtime:
+                    stack.extend(prev[1])
+                    continue
+
+                # 바뀐 폴더: 파일 목록 다시 읽기
+                stats["rescanned"] += 1
+                subdirs, files = [], []
+                try:
+                    with os.scandir(d) as it:
+                        for e in it:
+                            if e.is_dir(follow_symlinks=False):
+                                subdirs.append(e.path)
+                            elif e.name.lower().endswith(self.suffix):
+                                files.append(e.path)
+                except OSError:
+                    continue
+
+                for gone in set(prev[1] if prev else []) - set(subdirs):
+                    self._drop_dir_tree(root, gone)
+                self._conn.execute("DELETE FROM files WHERE dir = ?", (d,))
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO files (path, gid, dir, root) VALUES (?, ?, ?, ?)",
+                    [(p, Path(p).stem, d, root) for p in files],
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO dirs (dir, root, mtime_ns, subdirs) VALUES (?, ?, ?, ?)",
+                    (d, root, mtime, json.dumps(sorted(subdirs), ensure_ascii=False)),
+                )
+                stack.extend(subdirs)
+            self._conn.commit()
+
+            stats["files"] = self._conn.execute(
+                "SELECT COUNT(*) FROM files WHERE root = ?", (root,)
+            ).fetchone()[0]
+        return stats
+
+    def mapping(self, root_dir: Path | str) -> dict[str, str]:
+        """{gloss_id: 경로}. 같은 gloss_id가 여러 폴더에 있으면 경로 정렬상 마지막 것."""
+        root = str(Path(root_dir).resolve())
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT gid, path FROM files WHERE root = ? ORDER BY path", (root,)
+            ).fetchall()
+        return {gid: path for gid, path in rows}
+
+    def load(self, root_dir: Path | str) -> dict[str, str]:
+        """증분 갱신 후 mapping 반환 (프로세스 시작 시 1번)."""
+        t0 = time.perf_counter()
+        stats = self.refresh(root_dir)
+        out = self.mapping(root_dir)
+        print(
+            f"[VideoIndex] {root_dir}: files={stats['files']}, dirs={stats['dirs']}, "
+            f"rescanned={stats['rescanned']} ({(time.perf_counter() - t0) * 1000:.0f} ms)"
+        )
+        return out
+
+
+VIDEO_INDEX = VideoPathIndex.from_env()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--root", default=os.getenv("GLOSS_MP4_DIR", ""), help="수어 mp4 루트 폴더")
+    args = ap.parse_args()
+    if not args.root or not Path(args.root).exists():
+        print(f"[Error] 폴더 없음: {args.root!r} (--root 또는 GLOSS_MP4_DIR 지정)")
+        raise SystemExit(1)
+    VIDEO_INDEX.load(args.root)
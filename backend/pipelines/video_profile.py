@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+video_profile.py
+수어 클립 / 텍스트 카드 / 빈 화면 영상이 공유하는 표준 인코딩 프로파일
+
+concat demuxer의 "-c copy"는 모든 입력의 코덱 파라미터, 해상도, fps,
+timescale이 같아야 깨지지 않는다. generate_image_video / generate_blank_video와
+오프라인 정규화 작업(gloss_tools/normalize_clips.py)이 모두 이 값을 사용한다.
+
+정규화된 클립은 GLOSS_NORM_DIR 아래에 저장되고, manifest.json에
+{gloss_id: 원본 경로/mtime/size, 출력 경로}가 기록된다.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent
+
+VIDEO_WIDTH = 1280
+VIDEO_HEIGHT = 720
+VIDEO_FPS = 30
+VIDEO_TIMESCALE = 90000
+
+# libx264 / high / yuv420p / 30fps / timescale 90000 / 첫 프레임 키프레임 / 오디오 없음
+CANONICAL_ENCODE_ARGS = [
+    "-c:v", "libx264",
+    "-preset", "veryfast",
+    "-profile:v", "high",
+    "-pix_fmt", "yuv420p",
+    "-r", str(VIDEO_FPS),
+    "-video_track_timescale", str(VIDEO_TIMESCALE),
+    "-bf", "2",
+    "-force_key_frames", "expr:eq(n,0)",
+    "-an",
+]
+
+# 해상도가 다른 원본은 비율 유지 + 검은 여백으로 1280x720에 맞춤
+CANONICAL_VF = (
+    f"scale={VIDEO_WIDTH}:{VIDEO_HEIGHT}:force_original_aspect_ratio=decrease,"
+    f"pad={VIDEO_WIDTH}:{VIDEO_HEIGHT}:(ow-iw)/2:(oh-ih)/2,setsar=1,fps={VIDEO_FPS}"
+)
+
+PROFILE_ID = hashlib.sha1(
+    json.dumps([CANONICAL_ENCODE_ARGS, CANONICAL_VF]).encode("utf-8")
+).hexdigest()[:12]
+
+GLOSS_NORM_DIR = Path(
+    os.getenv("GLOSS_NORM_DIR", str(ROOT_DIR / "gloss_new" / "data" / "service_norm"))
+)
+NORM_MANIFEST_PATH = GLOSS_NORM_DIR / "manifest.json"
+
+
+def load_norm_manifest(path: Path = NORM_MANIFEST_PATH) -> dict:
+    """정규화 manifest 로드. 없거나 프로파일이 다르면 빈 dict."""
+    if not path.exists():
+        return {}
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception as e:
+        print(f"[VideoProfile] manifest 로드 실패: {e}")
+        return {}
+    if data.get("profile_id") != PROFILE_ID:
+        print("[VideoProfile] manifest 프로파일이 현재 설정과 달라 무시합니다.")
+        return {}
+    return data
+
+
+def normalized_paths(manifest: dict) -> dict[str, str]:
+    """
+    manifest에서 {gloss_id: 정규화 mp4 경로}를 만든다.
+    원본이 정규화 이후 바뀐 클립(mtime/size 불일치)은 제외.
+    """
+    out = {}
+    for gid, item in (manifest.get("clips") or {}).items():
+        dst = item.get("out")
+        if not dst or not os.path.exists(dst):
+            continue
+        try:
+            st = os.stat(item.get("src") or "")
+            if st.st_mtime_ns != item.get("src_mtime_ns") or st.st_size != item.get("src_size"):
+                continue
+        except OSError:
+            # 원본이 없는 서버(정규화본만 배포)에서는 정규화본을 그대로 사용
+            pass
+        out[gid] = dst
+    return out
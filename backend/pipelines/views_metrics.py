@@ -1,38 +1,274 @@
 # pipelines/views_metrics.py
 
-import json
-from pathlib import Path
-from django.conf import settings
-from django.http import JsonResponse
+import base64
 
+from django.http import HttpResponse, JsonResponse
 
-# pipeline.py가 있는 폴더 기준
-PIPELINES_ROOT = Path(__file__).resolve().parent
-SNAPSHOT_DIR = PIPELINES_ROOT / "snapshots" / "delta_backend"
+from accounts.snapshot_store import STAGE_COLUMNS
+
+
+SNAPSHOT_PAGE_SIZE = 50
+SNAPSHOT_PAGE_MAX = 200
+SNAPSHOT_AGG_WINDOW_MIN = 60
+
+
+def _snapshot_filters(request):
+    """?session_id= / ?mode= / ?since= / ?until= (ISO 또는 YYYYmmdd_HHMMSS) 공통 필터."""
+    from accounts.models import SnapshotRecord
+    from accounts.snapshot_store import parse_ts
+
+    qs = SnapshotRecord.objects.all()
+    if request.GET.get("session_id"):
+        qs = qs.filter(session_id=request.GET["session_id"])
+    if request.GET.get("mode"):
+        qs = qs.filter(mode=request.GET["mode"])
+    since = parse_ts(request.GET.get("since"))
+    until = parse_ts(request.GET.get("until"))
+    if since is not None:
+        qs = qs.filter(ts__gte=since)
+    if until is not None:
+        qs = qs.filter(ts__lt=until)
+    return qs
+
+
+def _encode_cursor(rec) -> str:
+    raw = f"{rec.ts.isoformat()}|{rec.id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str):
+    from accounts.snapshot_store import parse_ts
+
+    raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+    ts, _, rec_id = raw.rpartition("|")
+    ts = parse_ts(ts)
+    if ts is None:
+        raise ValueError("bad cursor")
+    return ts, int(rec_id)
 
 
 def list_snapshots(request):
     """
-    snapshots/delta_backend/*.json 파일을 읽어서
-    프론트엔드에 리스트로 내려주는 API
+    API 스냅샷 목록 (SnapshotRecord 테이블, 최신 순)
+    - ?limit= (기본 50, 최대 200), ?cursor= (이전 응답의 next_cursor)
+    - 필터: ?session_id= ?mode= ?since= ?until=
+    - ?payload=0 이면 원본 JSON 없이 인덱스 컬럼만
+    응답: {"items": [...], "next_cursor": "..." | null}
     """
-    if not SNAPSHOT_DIR.exists():
-        return JsonResponse([], safe=False)
+    from django.db.models import Q
+
+    try:
+        limit = min(max(int(request.GET.get("limit") or SNAPSHOT_PAGE_SIZE), 1), SNAPSHOT_PAGE_MAX)
+    except ValueError:
+        limit = SNAPSHOT_PAGE_SIZE
+
+    qs = _snapshot_filters(request).order_by("-ts", "-id")
+    cursor = request.GET.get("cursor")
+    if cursor:
+        try:
+            ts, rec_id = _decode_cursor(cursor)
+        except ValueError:
+            return JsonResponse({"error": "invalid cursor"}, status=400)
+        qs = qs.filter(Q(ts__lt=ts) | Q(ts=ts, id__lt=rec_id))
+
+    with_payload = request.GET.get("payload", "1") != "0"
+    rows = list(qs[: limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
 
     items = []
-    # 최신 순 or 오래된 순 정렬 원하면 여기 조절
-    json_files = sorted(SNAPSHOT_DIR.glob("*.json"))
+    for r in rows:
+        item = {
+            "id": r.id,
+            "ts": r.ts.isoformat(),
+            "session_id": r.session_id,
+            "mode": r.mode,
+            "latency_ms": {stage: getattr(r, col) for stage, col in STAGE_COLUMNS.items()},
+        }
+        if with_payload:
+            item["payload"] = r.payload
+        items.append(item)
 
-    # 너무 많이 쌓일 수 있으니 최근 200개 정도만
-    json_files = json_files[-200:]
+    return JsonResponse({
+        "items": items,
+        "next_cursor": _encode_cursor(rows[-1]) if has_more else None,
+    })
 
-    for path in json_files:
+
+def snapshot_aggregates(request):
+    """
+    기간 안의 단계별 지연 평균/p95 (ms, SnapshotRecord 인덱스 쿼리)
+    - ?window=분 (기본 60, since가 없을 때), ?since= ?until= ?session_id= ?mode=
+    - ?by=mode 이면 모드별로 나눠서
+    """
+    from datetime import timedelta
+
+    from django.utils import timezone
+
+    from accounts.snapshot_store import stage_aggregates
+
+    qs = _snapshot_filters(request)
+    window = None
+    if not request.GET.get("since"):
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            items.append(data)
-        except Exception:
-            # 깨진 파일 있으면 그냥 스킵
-            continue
-
-    return JsonResponse(items, safe=False)
+            window = int(request.GET.get("window") or SNAPSHOT_AGG_WINDOW_MIN)
+        except ValueError:
+            window = SNAPSHOT_AGG_WINDOW_MIN
+        qs = qs.filter(ts__gte=timezone.now() - timedelta(minutes=window))
+
+    out = {"window_min": window, "count": qs.count(), "stages": stage_aggregates(qs)}
+    if request.GET.get("by") == "mode":
+        modes = qs.order_by().values_list("mode", flat=True).distinct()
+        out["by_mode"] = {m or "-": stage_aggregates(qs.filter(mode=m)) for m in modes}
+    return JsonResponse(out)
+
+
+def admission_stats(request):
+    """엔드포인트별 입장 제어 지표 (동시 실행 수, 대기열 깊이, 대기 시간 p50/p95/p99, 거절 수)."""
+    from core.admission import all_stats
+
+    return JsonResponse(all_stats(), safe=False)
+
+
+def scheduler_stats(request):
+    """STT / 합성 스케줄러 상태 (실행/대기 수, deadline을 넘겨 시작한 작업 수)."""
+    from core.scheduler import all_stats
+
+    return JsonResponse(all_stats(), safe=False)
+
+
+def cancellation_stats(request):
+    """취소된 작업 수 (사유별: superseded/disconnected/client_cancel, 걸린 단계별), kill한 프로세스 수."""
+    from core.cancellation import stats
+
+    return JsonResponse(stats())
+
+
+def idempotency_stats(request):
+    """재시도 중복 제거 지표 (fresh/replay/joined 건수, 처리 중인 키 수)."""
+    from core.idempotency import stats
+
+    return JsonResponse(stats())
+
+
+def stage_latency(request):
+    """span별 최근 TRACE_WINDOW_MIN분 지연 분포 (p50/p95/p99, 버킷). ?window=분"""
+    from core.tracing import TRACE_WINDOW_MIN, all_histograms
+
+    try:
+        window = int(request.GET.get("window") or TRACE_WINDOW_MIN)
+    except ValueError:
+        window = TRACE_WINDOW_MIN
+    return JsonResponse(all_histograms(window))
+
+
+def _prom_labels(**labels) -> str:
+    if not labels:
+        return ""
+    esc = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in labels.items()) + "}"
+
+
+def prometheus_metrics(request):
+    """
+    Prometheus text 형식 지표 (GET /metrics)
+    - signance_stage_latency_ms: span별 히스토그램 (프로세스 시작 후 누적)
+    - signance_stage_latency_window_ms{quantile=0.5|0.95|0.99}, signance_stage_window_count:
+      최근 TRACE_WINDOW_MIN분 롤링 값 (gauge)
+    - 입장 제어(admission) / 스케줄러 / 취소 / 중복 제거 / 캐시 / telemetry 기록기 카운터 (프로세스 단위)
+    """
+    from core import admission, cancellation, idempotency, scheduler, telemetry, tracing
+
+    lines = []
+
+    def metric(name, mtype, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {mtype}")
+        for labels, value in samples:
+            lines.append(f"{name}{_prom_labels(**labels)} {value}")
+
+    # 1) 단계별 지연
+    #    histogram: 프로세스 시작 후 누적 카운터 (줄어들지 않음 → rate()/histogram_quantile() 가능)
+    #    quantile / window: 최근 TRACE_WINDOW_MIN분 롤링 값이라 gauge
+    totals = tracing.all_cumulative()
+    lines.append("# HELP signance_stage_latency_ms Stage latency in ms (cumulative since process start)")
+    lines.append("# TYPE signance_stage_latency_ms histogram")
+    for stage, h in totals.items():
+        cum = 0
+        for le, c in h["buckets"]:
+            cum += c
+            lines.append(f"signance_stage_latency_ms_bucket{_prom_labels(stage=stage, le=le)} {cum}")
+        lines.append(f"signance_stage_latency_ms_sum{_prom_labels(stage=stage)} {h['sum_ms']}")
+        lines.append(f"signance_stage_latency_ms_count{_prom_labels(stage=stage)} {h['count']}")
+    hists = tracing.all_histograms()
+    metric(
+        "signance_stage_latency_window_ms", "gauge", "Stage latency quantiles in ms over the rolling window",
+        [({"stage": stage, "quantile": q}, h[key])
+         for stage, h in hists.items() for q, key in (("0.5", "p50"), ("0.95", "p95"), ("0.99", "p99"))],
+    )
+    metric(
+        "signance_stage_window_count", "gauge", "Spans recorded in the rolling window",
+        [({"stage": stage}, h["count"]) for stage, h in hists.items()],
+    )
+
+    # 2) 입장 제어
+    gates = admission.all_stats()
+    metric("signance_admission_active", "gauge", "Requests running inside the gate",
+           [({"gate": g["name"]}, g["active"]) for g in gates])
+    metric("signance_admission_queue_depth", "gauge", "Requests waiting for the gate",
+           [({"gate": g["name"]}, g["waiting"]) for g in gates])
+    metric("signance_admission_reserved", "gauge", "Async jobs holding a gate slot before they start",
+           [({"gate": g["name"]}, g["reserved"]) for g in gates])
+    metric("signance_admission_requests_total", "counter", "Gate outcomes",
+           [({"gate": g["name"], "result": r}, g[r]) for g in gates for r in ("admitted", "rejected", "timed_out")])
+    metric("signance_admission_wait_ms", "gauge", "Gate wait time quantiles in ms (recent samples)",
+           [({"gate": g["name"], "quantile": q}, g["wait_ms"][key])
+            for g in gates for q, key in (("0.5", "p50"), ("0.95", "p95"), ("0.99", "p99"))])
+
+    # 3) 스케줄러
+    scheds = scheduler.all_stats()
+    metric("signance_scheduler_running", "gauge", "Jobs holding a worker slot",
+           [({"scheduler": s["name"]}, s["running"]) for s in scheds])
+    metric("signance_scheduler_waiting", "gauge", "Jobs waiting for a worker slot",
+           [({"scheduler": s["name"]}, s["waiting"]) for s in scheds])
+    metric("signance_scheduler_jobs_total", "counter", "Jobs started (overdue = started after deadline)",
+           [({"scheduler": s["name"], "result": r}, s[r]) for s in scheds for r in ("served", "overdue")])
+
+    # 4) 취소
+    cs = cancellation.stats()
+    metric("signance_cancelled_total", "counter", "Cancelled requests by reason",
+           [({"reason": r}, n) for r, n in cs["by_reason"].items()])
+    metric("signance_cancelled_stage_total", "counter", "Cancelled requests by the stage that noticed",
+           [({"stage": st}, n) for st, n in cs["by_stage"].items()])
+    metric("signance_killed_procs_total", "counter", "Subprocesses killed on cancel", [({}, cs["killed_procs"])])
+
+    # 5) 중복 제거 / 캐시
+    ids = idempotency.stats()
+    metric("signance_idempotency_requests_total", "counter", "Idempotent request outcomes",
+           [({"result": r}, ids[r]) for r in ("fresh", "replay", "joined")])
+
+    caches = []
+    try:
+        from .clip_store import CLIP_STORE
+
+        caches.append(("clip_store", CLIP_STORE.hits, CLIP_STORE.misses))
+    except Exception:
+        pass
+    try:
+        from sign.gloss_cache import GLOSS_SENTENCE_CACHE
+
+        caches.append(("gloss_sentence", GLOSS_SENTENCE_CACHE.hits, GLOSS_SENTENCE_CACHE.misses))
+    except Exception:
+        pass
+    metric("signance_cache_requests_total", "counter", "Cache lookups by result",
+           [({"cache": name, "result": r}, n) for name, hits, misses in caches
+            for r, n in (("hit", hits), ("miss", misses))])
+
+    # 6) 스냅샷/로그 백그라운드 기록기
+    tel = telemetry.stats()
+    metric("signance_telemetry_queue_depth", "gauge", "Telemetry records waiting to be written", [({}, tel["queued"])])
+    metric("signance_telemetry_records_total", "counter", "Telemetry records by result",
+           [({"result": r}, tel[r]) for r in ("written", "dropped")])
+    metric("signance_telemetry_write_errors_total", "counter", "Failed telemetry batch writes", [({}, tel["errors"])])
+
+    return HttpResponse("\n".join(lines) + "\n", content_type="text/plain; version=0.0.4; charset=utf-8")
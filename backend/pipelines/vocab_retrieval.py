@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+vocab_retrieval.py
+Gemini 프롬프트에 넣을 사전 어휘를 문장별로 골라주는 검색 단계
+
+기존 방식:
+- 사전 전체 어휘(최대 15,000자)를 system prompt에 매번 통째로 넣음
+  -> 요청마다 프롬프트 토큰/지연이 커짐
+
+이 모듈:
+- 사전 표제어를 글자 bigram 역색인으로 한 번만 인덱싱 (한 글자 표제어는 그 글자로)
+- 입력 문장과 bigram이 많이 겹치는 표제어 top-k(기본 40개)만 선택
+- "[사전 후보 어휘] a, b, c" 형태의 짧은 문맥 문자열로 만들어 user part에 붙임
+"""
+
+import ast
+import csv
+import re
+import unicodedata
+from collections import defaultdict
+from pathlib import Path
+
+DEFAULT_TOP_K = 40
+MIN_COVERAGE = 0.5  # 표제어 bigram 중 이 비율 이상이 문장에 있어야 후보로 인정
+
+
+def _ns(s: str) -> str:
+    """NFKC + 공백/기호 제거 (pipeline._nospace와 같은 규칙)."""
+    s = unicodedata.normalize("NFKC", s or "")
+    return re.sub(r"[^\w가-힣]", "", re.sub(r"\s+", "", s))
+
+
+def _grams(s: str) -> set[str]:
+    if len(s) < 2:
+        return {s} if s else set()
+    return {s[i : i + 2] for i in range(len(s) - 1)}
+
+
+class VocabRetriever:
+    """사전 표제어 bigram 역색인."""
+
+    def __init__(self, terms):
+        uniq = []
+        seen = set()
+        for t in terms or []:
+            t = (t or "").strip()
+            key = _ns(t)
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            uniq.append(t)
+
+        self.terms: list[str] = uniq
+        self._keys: list[str] = [_ns(t) for t in uniq]
+        self._gram_cnt: list[int] = []
+        self._postings: dict[str, list[int]] = defaultdict(list)
+        for i, key in enumerate(self._keys):
+            grams = _grams(key)
+            self._gram_cnt.append(len(grams))
+            for g in grams:
+                self._postings[g].append(i)
+
+    @classmethod
+    def from_gloss_index(cls, index: dict) -> "VocabRetriever":
+        """pipeline.load_gloss_index() 결과에서 생성."""
+        return cls(r.get("term") for r in (index or {}).get("rows", []))
+
+    @classmethod
+    def from_csv(cls, csv_path: Path | str) -> "VocabRetriever":
+        """korean_meanings 컬럼이 있는 사전 CSV에서 바로 생성."""
+        terms = []
+        with open(csv_path, "r", encoding="utf-8-sig") as f:
+            for row in csv.DictReader(f):
+                k_key = next(
+                    (k for k in row.keys() if "ko" in k.lower() or "mean" in k.lower()),
+                    None,
+                )
+                cell = (row.get(k_key) or "").strip() if k_key else ""
+                if not cell:
+                    continue
+                try:
+                    obj = ast.literal_eval(cell)
+                    terms.extend(str(x) for x in (obj if isinstance(obj, (list, tuple)) else [obj]))
+                except Exception:
+                    terms.append(cell)
+        return cls(terms)
+
+    def select(self, text: str, k: int = DEFAULT_TOP_K) -> list[str]:
+        """문장과 관련 있는 표제어 최대 k개 (관련도 높은 순)."""
+        q = _ns(text)
+        if not q or not self.terms:
+            return []
+
+        hits: dict[int, int] = defaultdict(int)
+        # bigram + 글자 하나씩 (한 글자 표제어 "돈", "집"은 글자로만 색인돼 있음)
+        for g in _grams(q) | set(q):
+            for i in self._postings.get(g, ()):
+                hits[i] += 1
+
+        scored = []
+        for i, h in hits.items():
+            cov = h / (self._gram_cnt[i] or 1)
+            if cov < MIN_COVERAGE:
+                continue
+            # 문장에 통째로 들어 있는 표제어는 가산점, 긴 표제어 우선
+            exact = 1.0 if self._keys[i] in q else 0.0
+            scored.append((exact + cov, len(self._keys[i]), i))
+
+        scored.sort(reverse=True)
+        return [self.terms[i] for _, _, i in scored[:k]]
+
+    def context_for(self, text: str, k: int = DEFAULT_TOP_K) -> str:
+        """user part에 붙일 짧은 어휘 문맥. 후보가 없으면 빈 문자열."""
+        terms = self.select(text, k=k)
+        if not terms:
+            return ""
+        return "[사전 후보 어휘]\n" + ", ".join(terms)
@@ -1,13 +1,30 @@
 # ~/backend/sign/gemini_client.py
 import os
-from google import genai
+
+from core.llm_transport import TRANSPORT
+
+try:
+    from google import genai
+except Exception:
+    genai = None
 
 # 🔹 API 키 읽기 (환경변수)
 API_KEY = os.environ.get("GOOGLE_API_KEY")
-if not API_KEY:
-    raise RuntimeError("환경변수 GOOGLE_API_KEY가 없습니다. 서버 환경변수를 확인하세요.")
 
-client = genai.Client(api_key=API_KEY)
+# 🔹 클라이언트는 첫 호출 때 생성 (키가 없어도 import는 되도록,
+#    LLM_TRANSPORT=replay면 클라이언트 없이 cassette 응답 사용)
+_client = None
+
+
+def get_client():
+    global _client
+    if _client is None:
+        if not API_KEY:
+            raise RuntimeError("환경변수 GOOGLE_API_KEY가 없습니다. 서버 환경변수를 확인하세요.")
+        if genai is None:
+            raise RuntimeError("google-genai 패키지가 설치되어 있지 않습니다.")
+        _client = genai.Client(api_key=API_KEY)
+    return _client
 
 # 🔹 GenAI 클라이언트
 DEFAULT_MODEL = "gemini-2.5-flash"
@@ -52,9 +69,14 @@ def gloss_to_sentence_korean(tokens: list[str], model: str | None = None) -> str
 존댓말 한 문장으로만 출력하십시오.
 """.strip()
 
-    resp = client.models.generate_content(
-        model=DEFAULT_MODEL,
-        contents=prompt,
+    resp = TRANSPORT.generate(
+        DEFAULT_MODEL,
+        None,
+        prompt,
+        lambda: get_client().models.generate_content(
+            model=DEFAULT_MODEL,
+            contents=prompt,
+        ),
     )
 
     text = getattr(resp, "text", "") or ""
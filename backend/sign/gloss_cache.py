@@ -0,0 +1,119 @@
+# backend/sign/gloss_cache.py
+"""
+글로스 시퀀스 → 한국어 문장 캐시 + 템플릿 테이블
+
+- 템플릿: logs/e2e_sps_log.csv 기록에서 자주 나온 (gloss_pred → sent_pred) 쌍을 뽑아
+  "계좌 비밀번호 잊다" → "계좌 비밀번호를 잊어버렸어요." 같은 고정 문장으로 사용
+- 캐시: 한 번 Gemini로 만든 문장은 django cache에 저장해서 재사용 (워커 간 공유)
+- 조회 결과(hit/miss)는 누적해서 hit rate로 로그에 남긴다
+"""
+import csv
+import hashlib
+import threading
+from collections import Counter, defaultdict
+
+from django.core.cache import cache
+
+from core import telemetry
+
+from .log_utils import LOG_PATH
+
+CACHE_TIMEOUT = 60 * 60 * 24   # 24시간
+TEMPLATE_MIN_COUNT = 2         # 이 횟수 이상 같은 문장으로 나온 시퀀스만 템플릿으로 사용
+
+
+def _seq_key(tokens: list[str]) -> str:
+    return " ".join(t.strip() for t in tokens if t and t.strip())
+
+
+def mine_templates(log_path=LOG_PATH, min_count: int = TEMPLATE_MIN_COUNT) -> dict[str, str]:
+    """
+    E2E 로그 CSV(회전된 .gz 포함)에서 글로스 2개 이상 시퀀스별 최빈 문장을 뽑는다.
+    반환: {"계좌 비밀번호 잊다": "계좌 비밀번호를 잊어버렸어요.", ...}
+    """
+    files = telemetry.iter_files(log_path)  # 회전된 .csv.gz 포함
+    if not files:
+        return {}
+
+    counts: dict[str, Counter] = defaultdict(Counter)
+    for p in files:
+        # 파일 하나가 깨졌어도(잘린 .gz → EOFError 등) 나머지 파일은 그대로 사용
+        try:
+            with telemetry.open_text(p) as f:
+                for row in csv.DictReader(f):
+                    seq = _seq_key((row.get("gloss_pred") or "").split())
+                    sent = (row.get("sent_pred") or "").strip()
+                    if len(seq.split()) < 2 or not sent:
+                        continue
+                    counts[seq][sent] += 1
+        except Exception as e:
+            print(f"[GlossCache] 템플릿 로드 실패 ({p.name}): {e}")
+
+    templates = {}
+    for seq, c in counts.items():
+        sent, n = c.most_common(1)[0]
+        if n >= min_count:
+            templates[seq] = sent
+    return templates
+
+
+class GlossSentenceCache:
+    def __init__(self):
+        self._templates: dict[str, str] | None = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def templates(self) -> dict[str, str]:
+        if self._templates is None:
+            self._templates = mine_templates()
+            print(f"[GlossCache] templates loaded: {len(self._templates)}")
+        return self._templates
+
+    def reload_templates(self):
+        self._templates = None
+
+    @staticmethod
+    def _cache_key(seq: str) -> str:
+        return "signance:gloss2ko:" + hashlib.sha1(seq.encode("utf-8")).hexdigest()
+
+    def get(self, tokens: list[str]) -> tuple[str | None, str]:
+        """
+        반환: (문장 또는 None, source)
+        source: "template" / "cache" / "miss"
+        """
+        seq = _seq_key(tokens)
+        sent = self.templates.get(seq)
+        source = "template" if sent else "miss"
+
+        if not sent:
+            try:
+                sent = cache.get(self._cache_key(seq))
+            except Exception:
+                sent = None
+            if sent:
+                source = "cache"
+
+        with self._lock:
+            if sent:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return sent, source
+
+    def put(self, tokens: list[str], sentence: str):
+        if not sentence:
+            return
+        try:
+            cache.set(self._cache_key(_seq_key(tokens)), sentence, timeout=CACHE_TIMEOUT)
+        except Exception as e:
+            print(f"[GlossCache] save error: {e}")
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return round(self.hits / total, 4) if total else 0.0
+
+
+GLOSS_SENTENCE_CACHE = GlossSentenceCache()
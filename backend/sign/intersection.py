@@ -1,6 +1,7 @@
 # backend/sign/intersection.py
 
 from .gemini_client import gloss_to_sentence_korean
+from .gloss_cache import GLOSS_SENTENCE_CACHE
 
 # 이미 정중체 문장처럼 끝나는 단어들 (안녕하세요, 감사합니다 등)
 END_WITH_POLITE = ("요", "니다", "예", "다" )
@@ -17,7 +18,18 @@ def _attach_polite_suffix(word: str) -> str:
     return word + "입니다"
 
 
-def gloss_tokens_to_korean(tokens: list[str]) -> str:
+def _cached_gloss_to_sentence(tokens: list[str]) -> tuple[str, str]:
+    """템플릿/캐시에 있으면 그대로, 없을 때만 Gemini 호출 후 캐시에 저장."""
+    sent, source = GLOSS_SENTENCE_CACHE.get(tokens)
+    if sent:
+        return sent, source
+
+    sent = gloss_to_sentence_korean(tokens)
+    GLOSS_SENTENCE_CACHE.put(tokens, sent)
+    return sent, "gemini"
+
+
+def gloss_tokens_to_korean(tokens: list[str], return_source: bool = False):
     """
     글로스 토큰 → 한국어 문장 변환 규칙
 
@@ -26,11 +38,19 @@ def gloss_tokens_to_korean(tokens: list[str]) -> str:
         1) FORCE_GEMINI_WORDS 안에 있으면 → Gemini로 보내기
         2) 요/니다/예요/이에요 로 끝나면 → 그대로 반환
         3) 그 외 → '단어 + 입니다'
-    ● 토큰 2개 이상 → Gemini 호출
+    ● 토큰 2개 이상 → 템플릿/캐시 조회, 처음 보는 시퀀스만 Gemini 호출
+
+    return_source=True면 (문장, source) 반환.
+    source: "empty" / "rule" / "template" / "cache" / "gemini"
     """
+    sent, source = _gloss_tokens_to_korean(tokens)
+    return (sent, source) if return_source else sent
+
+
+def _gloss_tokens_to_korean(tokens: list[str]) -> tuple[str, str]:
     # 0) 비어 있으면 반환
     if not tokens:
-        return ""
+        return "", "empty"
 
     # 1) 단어 1개인 경우
     if len(tokens) == 1:
@@ -38,14 +58,14 @@ def gloss_tokens_to_korean(tokens: list[str]) -> str:
 
         # 1-1) 단어 하나라도 문장 구조가 필요한 것 → Gemini로 보내기
         if word in FORCE_GEMINI_WORDS:
-            return gloss_to_sentence_korean(tokens)
+            return _cached_gloss_to_sentence(tokens)
 
         # 1-2) 이미 존댓말/문장 형식이면 그대로 사용
         if word.endswith(END_WITH_POLITE):
-            return word
+            return word, "rule"
 
         # 1-3) 기본 규칙: "입니다"
-        return _attach_polite_suffix(word)
+        return _attach_polite_suffix(word), "rule"
 
-    # 2) 두 단어 이상이면 Gemini로
-    return gloss_to_sentence_korean(tokens)
+    # 2) 두 단어 이상이면 템플릿/캐시 → 없을 때만 Gemini
+    return _cached_gloss_to_sentence(tokens)
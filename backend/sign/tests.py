@@ -1,3 +1,111 @@
-from django.test import TestCase
+import json
+import shutil
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from pipelines import mp4concat
+from pipelines.mp4concat import Mp4ConcatError, concat_mp4
+from pipelines.vocab_retrieval import VocabRetriever
+
+
+class VocabRetrieverTests(SimpleTestCase):
+    def test_select_keeps_one_char_terms(self):
+        r = VocabRetriever(["돈", "통장", "비밀번호", "집"])
+        got = r.select("돈을 찾고 싶어요 통장 비밀번호")
+        self.assertIn("돈", got)
+        self.assertIn("통장", got)
+        self.assertIn("비밀번호", got)
+        self.assertNotIn("집", got)
+
+    def test_select_one_char_query(self):
+        r = VocabRetriever(["돈", "통장"])
+        self.assertEqual(r.select("돈"), ["돈"])
+
+
+HAS_FFMPEG = bool(shutil.which("ffmpeg") and shutil.which("ffprobe"))
+
+
+@unittest.skipUnless(HAS_FFMPEG, "ffmpeg/ffprobe 필요")
+class Mp4ConcatTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+
+    def _clip(self, name: str, size: str = "320x240", sec: float = 1.0, src: str = "testsrc", crf: int = 18) -> str:
+        # 같은 인코딩 설정 → stsd(avcC)가 같아서 box concat 가능, B-프레임 있음(ctts/elst)
+        out = self.tmp / name
+        subprocess.run(
+            [
+                "ffmpeg", "-y", "-loglevel", "error",
+                "-f", "lavfi", "-i", f"{src}=size={size}:rate=25:duration={sec}",
+                "-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p",
+                "-bf", "2", "-g", "25", "-crf", str(crf),
+                "-video_track_timescale", "12800",
+                "-an", str(out),
+            ],
+            check=True,
+        )
+        return str(out)
+
+    def _probe(self, path: str) -> tuple[int, float]:
+        res = subprocess.run(
+            [
+                "ffprobe", "-v", "error", "-select_streams", "v:0", "-count_frames",
+                "-show_entries", "stream=nb_read_frames:format=duration",
+                "-of", "json", path,
+            ],
+            check=True, capture_output=True, text=True,
+        )
+        info = json.loads(res.stdout)
+        return int(info["streams"][0]["nb_read_frames"]), float(info["format"]["duration"])
+
+    def _ffmpeg_concat(self, paths: list[str]) -> str:
+        lst = self.tmp / "list.txt"
+        lst.write_text("".join(f"file '{p}'\n" for p in paths), encoding="utf-8")
+        out = self.tmp / "ref.mp4"
+        subprocess.run(
+            ["ffmpeg", "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+             "-i", str(lst), "-c", "copy", str(out)],
+            check=True,
+        )
+        return str(out)
+
+    def _assert_same_as_ffmpeg(self, paths: list[str], out: str):
+        frames, dur = self._probe(out)
+        ref_frames, ref_dur = self._probe(self._ffmpeg_concat(paths))
+        self.assertEqual(frames, ref_frames)
+        self.assertEqual(frames, sum(self._probe(p)[0] for p in paths))
+        self.assertAlmostEqual(dur, ref_dur, delta=0.05)
+
+    def test_concat_matches_ffmpeg(self):
+        paths = [self._clip("a.mp4"), self._clip("b.mp4", sec=1.4)]
+        out = str(self.tmp / "out.mp4")
+        concat_mp4(paths, out)
+        self._assert_same_as_ffmpeg(paths, out)
+
+    def test_concat_co64(self):
+        # 4GB짜리 입력 대신 한계값을 낮춰서 co64 + 64비트 mdat 헤더 경로를 탄다
+        big = {"size": "640x480", "src": "testsrc2", "crf": 4}
+        paths = [self._clip("a.mp4", **big), self._clip("b.mp4", **big)]
+        limit = sum(Path(p).stat().st_size for p in paths) // 2
+        # 한계값은 box 크기/duration 값보다 커야 그쪽은 32비트로 남음
+        self.assertGreater(limit, 100_000)
+        out = str(self.tmp / "out.mp4")
+        with mock.patch.object(mp4concat, "U32_MAX", limit):
+            concat_mp4(paths, out)
+        data = Path(out).read_bytes()
+        self.assertIn(b"co64", data)
+        self.assertNotIn(b"stco", data)
+        self._assert_same_as_ffmpeg(paths, out)
+
+    def test_mismatched_clips_raise(self):
+        paths = [self._clip("a.mp4"), self._clip("b.mp4", size="160x120")]
+        out = self.tmp / "out.mp4"
+        with self.assertRaises(Mp4ConcatError):
+            concat_mp4(paths, str(out))
+        self.assertFalse(out.exists())
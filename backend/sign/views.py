@@ -7,13 +7,17 @@ from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
 
+from core.admission import admission_gate       # 동시 처리 제한 (429 + Retry-After)
+from core.idempotency import hash_json, idempotent  # 재시도 중복 제거
 from core.ingest_service import enqueue_frames  # npz 저장 함수
+from core.tracing import record, span            # 단계별 지연 히스토그램 (/metrics)
 from .segment_infer import (
     infer_segments_from_seq,
     load_seq_from_npz,
 )
 from .intersection import gloss_tokens_to_korean  # ✅ 단어 1개 예외 처리 + Gemini 호출 래퍼
 from .log_utils import append_e2e_log            # ★ 로그 기록 함수 (별도 파일)
+from .gloss_cache import GLOSS_SENTENCE_CACHE     # 글로스 시퀀스 문장 캐시 (hit rate 기록용)
 
 
 @api_view(["POST", "OPTIONS"])
@@ -53,7 +57,16 @@ def ingest(request):
     )
 
 
+def _frames_hash(request):
+    frames = request.data.get("frames")
+    if not isinstance(frames, list) or not frames:
+        return None
+    return hash_json({"frames": frames, "fps": request.data.get("fps"), "eval_id": request.data.get("eval_id", "")})
+
+
 @api_view(["POST", "OPTIONS"])
+@idempotent("ingest_and_infer", _frames_hash)
+@admission_gate("ingest_and_infer")
 def ingest_and_infer(request):
     """
     1) frames를 받아서 npz로 저장 (enqueue_frames)
@@ -93,7 +106,8 @@ def ingest_and_infer(request):
 
     # 1) 먼저 npz 저장 (기존 ingest와 동일)
     try:
-        file_path, T = enqueue_frames(session_id, frames)
+        with span("sign.npz_save"):
+            file_path, T = enqueue_frames(session_id, frames)
     except ValueError as e:
         return Response(
             {"ok": False, "error": str(e)},
@@ -107,7 +121,8 @@ def ingest_and_infer(request):
 
     try:
         # segment_infer 쪽 유틸을 그대로 사용해서 (T,F) 시퀀스 로드
-        seq = load_seq_from_npz(npz_path)
+        with span("sign.npz_load"):
+            seq = load_seq_from_npz(npz_path)
     except Exception as e:
         return Response(
             {"ok": False, "error": f"npz 로드 에러: {e}"},
@@ -116,17 +131,18 @@ def ingest_and_infer(request):
 
     # 3) 세그먼트 + 글로스 단어 인퍼런스
     try:
-        seg_result = infer_segments_from_seq(
-            seq,
-            fps=fps_val,
-            pause_sec=0.3,
-            motion_th=0.06,
-            min_word_sec=0.3,
-            smooth_alpha=0.7,
-            conf_thr=0.8,
-            alt_thr=0.5,
-            debug=False,  # 필요하면 True로 두고 로그 확인
-        )
+        with span("sign.segment_infer"):
+            seg_result = infer_segments_from_seq(
+                seq,
+                fps=fps_val,
+                pause_sec=0.3,
+                motion_th=0.06,
+                min_word_sec=0.3,
+                smooth_alpha=0.7,
+                conf_thr=0.8,
+                alt_thr=0.5,
+                debug=False,  # 필요하면 True로 두고 로그 확인
+            )
     except Exception as e:
         return Response(
             {"ok": False, "error": f"세그먼트/단어 추론 에러: {e}"},
@@ -138,7 +154,10 @@ def ingest_and_infer(request):
 
     # 4) 글로스 토큰 → 한국어 문장
     try:
-        natural_sentence = gloss_tokens_to_korean(gloss_tokens)
+        with span("sign.sentence"):
+            natural_sentence, sentence_source = gloss_tokens_to_korean(
+                gloss_tokens, return_source=True
+            )
     except Exception as e:
         return Response(
             {"ok": False, "error": f"문장 생성 에러: {e}"},
@@ -147,6 +166,8 @@ def ingest_and_infer(request):
 
     # ★ 총 소요 시간 계산 (프레임 저장 ~ 한국어 문장 생성까지)
     elapsed = time.time() - t0
+    record("sign.total", elapsed * 1000)
+    cache_hit_rate = GLOSS_SENTENCE_CACHE.hit_rate
 
     # 5) E2E 로그 CSV에 한 줄 기록
     try:
@@ -161,6 +182,8 @@ def ingest_and_infer(request):
                 "npz_path": str(npz_path),
                 "T": int(T),
                 "gloss_sentence": gloss_sentence,
+                "sentence_source": sentence_source,
+                "cache_hit_rate": cache_hit_rate,
             },
         )
     except Exception:
@@ -184,8 +207,10 @@ def ingest_and_infer(request):
             "params": seg_result.get("params", {}),
             "motion_stats": seg_result.get("motion_stats", {}),
 
-            # ★ E2E 소요 시간(초)
+            # ★ E2E 소요 시간(초) + 글로스 문장 캐시 적중률
             "elapsed_sec": elapsed,
+            "sentence_source": sentence_source,
+            "cache_hit_rate": cache_hit_rate,
         },
         status=status.HTTP_200_OK,
     )